@@ -0,0 +1,37 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class JobCheckpoint:
+    """Completed stage outputs of one job, so a redelivered job resumes instead of redoing work.
+
+    Stored as results/.checkpoints/<job_id>.json and replaced atomically after
+    each stage, so a crash mid-write leaves the previous checkpoint intact.
+    """
+
+    def __init__(self, results_path: str, job_id: str):
+        self.path = os.path.join(results_path, ".checkpoints", f"{job_id}.json")
+        self.stages = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.stages = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+
+    def get(self, stage: str):
+        return self.stages.get(stage)
+
+    def save(self, stage: str, value):
+        self.stages[stage] = value
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.stages, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,43 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_executor: Executor = None
+
+
+def start_executor(config) -> Executor:
+    """Create the pool that runs blocking stages off the event loop."""
+    global _executor
+    if config.worker_executor == "process":
+        # spawn: forking a process that runs an event loop and HTTP clients is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=config.worker_executor_size,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    else:
+        _executor = ThreadPoolExecutor(
+            max_workers=config.worker_executor_size,
+            thread_name_prefix="ai-stage",
+        )
+    logger.info(f"Running blocking stages in a {config.worker_executor} pool of {config.worker_executor_size}")
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking (CPU-bound or sleeping) function without stalling the event loop.
+
+    fn must be a module-level function when the process pool is used.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+BULK_PATH = "/api/internal/jobs/status"
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+async def wait_for_event(event, timeout):
+    """Wait until event is set or timeout seconds pass."""
+    try:
+        await asyncio.wait_for(event.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+class StatusBuffer:
+    """Coalesces job status transitions and sends them to the API gateway in batches.
+
+    Transitions of one job that are still waiting merge into one update. The
+    later status wins, and result_url/error are kept unless overwritten, which
+    is what the gateway would end up with after applying each PATCH in turn.
+    A single flusher sends batches in order. A failed batch goes back in
+    front of newer updates and is retried with backoff, so no update is
+    dropped and none is applied out of order.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.pending = {}
+        self.wakeup = asyncio.Event()
+        self.closing = asyncio.Event()
+        self.failures = 0
+        self.bulk_supported = True
+        self.flusher = None
+        # HTTP/2 is negotiated over TLS (https API_BASE_URL); plain http stays on pooled HTTP/1.1 keep-alive
+        self.client = httpx.AsyncClient(
+            base_url=config.api_base_url,
+            http2=config.status_http2,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+            headers={"X-Internal-API-Key": config.internal_api_key},
+            timeout=10.0,
+        )
+
+    def start(self):
+        self.flusher = asyncio.create_task(self.run())
+
+    def update(self, job_id, status, result_url=None, error=None):
+        entry = self.pending.setdefault(job_id, {"job_id": job_id})
+        entry["status"] = status
+        if result_url:
+            entry["result_url"] = result_url
+        if error:
+            entry["error"] = error
+        # Final states and full batches go out without waiting for the interval
+        if status in TERMINAL_STATUSES or len(self.pending) >= self.config.status_batch_size:
+            self.wakeup.set()
+
+    def retry_delay(self):
+        return min(0.5 * 2 ** (self.failures - 1), self.config.status_retry_max_delay)
+
+    async def run(self):
+        while not self.closing.is_set():
+            await wait_for_event(self.wakeup, self.config.status_flush_interval)
+            self.wakeup.clear()
+            if self.closing.is_set():
+                break
+            if not await self.flush():
+                # Back off; only closing cuts the wait short
+                await wait_for_event(self.closing, self.retry_delay())
+
+    async def flush(self) -> bool:
+        """Send everything pending; False if a batch failed (it is kept for the next flush)."""
+        while self.pending:
+            job_ids = list(self.pending)[:self.config.status_batch_size]
+            batch = [self.pending.pop(job_id) for job_id in job_ids]
+            try:
+                await self.send(batch)
+            except asyncio.CancelledError:
+                self.requeue(batch)
+                raise
+            except Exception as e:
+                self.requeue(batch)
+                self.failures += 1
+                logger.warning(f"Status update for {len(batch)} jobs failed (attempt {self.failures}): {e}")
+                return False
+            self.failures = 0
+        return True
+
+    def requeue(self, batch):
+        """Put a failed batch back in front, with any newer transitions merged on top."""
+        merged = {entry["job_id"]: entry for entry in batch}
+        for job_id, entry in self.pending.items():
+            merged[job_id] = {**merged.get(job_id, {}), **entry}
+        self.pending = merged
+
+    async def send(self, batch):
+        if self.bulk_supported:
+            response = await self.client.post(BULK_PATH, json={"updates": batch})
+            if response.status_code in (404, 405):
+                logger.warning("API gateway has no bulk status endpoint, sending updates one at a time")
+                self.bulk_supported = False
+            else:
+                response.raise_for_status()
+                missing = response.json().get("missing") or []
+                if missing:
+                    logger.error(f"API gateway does not know jobs {missing}; their status updates were dropped")
+                logger.info(f"Sent status updates for {len(batch)} jobs")
+                return
+
+        for update in batch:
+            job_id = update["job_id"]
+            payload = {key: value for key, value in update.items() if key != "job_id"}
+            response = await self.client.patch(f"/api/internal/jobs/{job_id}", json=payload)
+            if response.status_code == 404:
+                logger.error(f"API gateway does not know job {job_id}; its status update was dropped")
+                continue
+            response.raise_for_status()
+
+    async def close(self):
+        """Stop the flusher and deliver what is left, giving up after status_drain_timeout."""
+        # Let an in-flight batch finish rather than cancelling it
+        self.closing.set()
+        self.wakeup.set()
+        if self.flusher:
+            await self.flusher
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.status_drain_timeout
+        while not await self.flush() and loop.time() < deadline:
+            await asyncio.sleep(min(self.retry_delay(), max(deadline - loop.time(), 0)))
+        if self.pending:
+            logger.error(f"Could not deliver status updates for jobs {list(self.pending)}: {list(self.pending.values())}")
+        await self.client.aclose()
@@ -1,7 +1,10 @@
+import asyncio
 import logging
 import os
 import time
 
+from app.executor import run_blocking
+
 logger = logging.getLogger(__name__)
 
 async def transcribe_audio(file_path: str, language: str, config) -> str:
@@ -10,16 +13,16 @@ async def transcribe_audio(file_path: str, language: str, config) -> str:
         if config.use_openai and config.openai_api_key:
             return await transcribe_with_openai(file_path, language, config)
         else:
-            return transcribe_with_stub(file_path, language)
+            return await run_blocking(transcribe_with_stub, file_path, language)
     except Exception as e:
         logger.error(f"Transcription failed: {e}")
-        return transcribe_with_stub(file_path, language)
+        return await run_blocking(transcribe_with_stub, file_path, language)
 
 async def transcribe_with_openai(file_path: str, language: str, config) -> str:
     """Stub for OpenAI transcription"""
     logger.info(f"Using OpenAI Whisper for: {file_path}")
-    # Implementation would go here
-    time.sleep(0.5)
+    # Implementation would go here (an HTTP call, so it awaits rather than blocks)
+    await asyncio.sleep(0.5)
     return "This is a transcribed text sample."
 
 def transcribe_with_stub(file_path: str, language: str) -> str:
@@ -1,20 +1,22 @@
 import logging
 import time
 
+from app.executor import run_blocking
+
 logger = logging.getLogger(__name__)
 
 async def translate_text(text: str, source_lang: str, target_lang: str, config) -> str:
     """Translate text using Helsinki NLP or stub"""
     try:
         if config.use_helsinki:
-            return await translate_with_helsinki(text, source_lang, target_lang, config)
+            return await run_blocking(translate_with_helsinki, text, source_lang, target_lang, config)
         else:
-            return translate_with_stub(text, source_lang, target_lang)
+            return await run_blocking(translate_with_stub, text, source_lang, target_lang)
     except Exception as e:
         logger.error(f"Translation failed: {e}")
-        return translate_with_stub(text, source_lang, target_lang)
+        return await run_blocking(translate_with_stub, text, source_lang, target_lang)
 
-async def translate_with_helsinki(text: str, source_lang: str, target_lang: str, config) -> str:
+def translate_with_helsinki(text: str, source_lang: str, target_lang: str, config) -> str:
     """Stub for Helsinki NLP translation"""
     logger.info(f"Using Helsinki NLP: {source_lang} -> {target_lang}")
     time.sleep(0.5)
@@ -5,20 +5,26 @@ import time
 import numpy as np
 import soundfile as sf
 
+from app.executor import run_blocking
+
 logger = logging.getLogger(__name__)
 
+STUB_SAMPLE_RATE = 22050
+# Frames synthesized and written per block by write_tone
+BLOCK_FRAMES = 65536
+
 async def generate_audio(text: str, language: str, output_path: str, config) -> str:
     """Generate audio using Coqui TTS or stub"""
     try:
         if config.use_coqui:
-            return await generate_with_coqui(text, language, output_path, config)
+            return await run_blocking(generate_with_coqui, text, language, output_path, config)
         else:
-            return generate_with_stub(text, language, output_path)
+            return await run_blocking(generate_with_stub, text, language, output_path)
     except Exception as e:
         logger.error(f"TTS failed: {e}")
-        return generate_with_stub(text, language, output_path)
+        return await run_blocking(generate_with_stub, text, language, output_path)
 
-async def generate_with_coqui(text: str, language: str, output_path: str, config) -> str:
+def generate_with_coqui(text: str, language: str, output_path: str, config) -> str:
     """Stub for Coqui TTS"""
     logger.info(f"Using Coqui TTS for: {language}")
     time.sleep(1.0)
@@ -31,13 +37,29 @@ def generate_with_stub(text: str, language: str, output_path: str) -> str:
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
     duration = max(1.0, len(text) / 10)
-    sample_rate = 22050
-    samples = int(duration * sample_rate)
-    
-    t = np.linspace(0, duration, samples, False)
-    audio_data = np.sin(440 * 2 * np.pi * t) * 0.01
-    
-    sf.write(output_path, audio_data, sample_rate, subtype='PCM_16')
+    write_tone(output_path, duration)
     logger.info(f"Generated audio: {output_path}")
     
     return output_path
+
+def write_tone(output_path: str, duration: float, sample_rate: int = STUB_SAMPLE_RATE,
+               frequency: float = 440.0, amplitude: float = 0.01):
+    """Write a mono sine tone as 16-bit PCM, one fixed-size float32 block at a time.
+
+    Memory use does not depend on duration, so long stub jobs cost what the
+    write costs rather than a full-length sample array.
+    """
+    frames = int(duration * sample_rate)
+    step = 2 * np.pi * frequency / sample_rate
+    offsets = np.arange(BLOCK_FRAMES, dtype=np.float32) * np.float32(step)
+    block = np.empty(BLOCK_FRAMES, dtype=np.float32)
+    with sf.SoundFile(output_path, 'w', samplerate=sample_rate, channels=1, subtype='PCM_16') as f:
+        for start in range(0, frames, BLOCK_FRAMES):
+            n = min(BLOCK_FRAMES, frames - start)
+            # Phase at the block start, wrapped so float32 keeps its precision
+            phase = np.float32((start * step) % (2 * np.pi))
+            out = block[:n]
+            np.add(offsets[:n], phase, out=out)
+            np.sin(out, out=out)
+            out *= amplitude
+            f.write(out)
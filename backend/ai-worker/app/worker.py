@@ -4,15 +4,20 @@ import logging
 import os
 
 import aio_pika
-import httpx
 from aio_pika import Message, DeliveryMode
 
+from app.checkpoints import JobCheckpoint
+from app.executor import shutdown_executor, start_executor
+from app.status_updates import StatusBuffer
 from app.tasks.transcribe import transcribe_audio
 from app.tasks.translate import translate_text
 from app.tasks.tts import generate_audio
 
 logger = logging.getLogger(__name__)
 
+REQUIRED_FIELDS = ("job_id", "source_file", "source_lang", "target_lang")
+
+
 class Worker:
     def __init__(self, config):
         self.config = config
@@ -20,22 +25,46 @@ class Worker:
         self.channel = None
         self.queue = None
         self.is_running = False
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        self.consumer_tag = None
+        self.status_updates = StatusBuffer(config)
+        # Jobs run concurrently up to worker_concurrency; further deliveries wait here
+        self.job_slots = asyncio.Semaphore(config.worker_concurrency)
+        self.active_jobs = set()
+        self.running_job_ids = set()
     
     async def connect(self):
         self.connection = await aio_pika.connect_robust(self.config.rabbitmq_url)
         self.channel = await self.connection.channel()
+        # Without a prefetch limit RabbitMQ pushes the whole backlog to this worker
+        await self.channel.set_qos(prefetch_count=self.config.worker_prefetch)
         self.queue = await self.channel.declare_queue(
             self.config.rabbitmq_queue,
             durable=True
         )
-        logger.info(f"Connected to RabbitMQ queue: {self.config.rabbitmq_queue}")
+        await self.channel.declare_queue(self.config.rabbitmq_dlq, durable=True)
+        # One delay queue per backoff step; expired messages dead-letter back to the main queue
+        for delay in sorted(set(self.retry_delays())):
+            await self.channel.declare_queue(
+                self.retry_queue_name(delay),
+                durable=True,
+                arguments={
+                    "x-message-ttl": delay * 1000,
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.config.rabbitmq_queue,
+                },
+            )
+        logger.info(
+            f"Connected to RabbitMQ queue: {self.config.rabbitmq_queue} "
+            f"(prefetch {self.config.worker_prefetch}, concurrency {self.config.worker_concurrency})"
+        )
     
     async def start(self):
         self.is_running = True
         try:
+            start_executor(self.config)
+            self.status_updates.start()
             await self.connect()
-            await self.queue.consume(self.process_message, no_ack=False)
+            self.consumer_tag = await self.queue.consume(self.process_message, no_ack=False)
             logger.info("Worker started consuming messages")
             
             while self.is_running:
@@ -47,60 +76,145 @@ class Worker:
     
     async def stop(self):
         self.is_running = False
+        # Stop taking deliveries, then let running jobs finish and ack before closing
+        if self.queue and self.consumer_tag:
+            await self.queue.cancel(self.consumer_tag)
+            self.consumer_tag = None
+        if self.active_jobs:
+            logger.info(f"Waiting for {len(self.active_jobs)} running jobs")
+            await asyncio.gather(*self.active_jobs, return_exceptions=True)
         if self.channel:
             await self.channel.close()
         if self.connection:
             await self.connection.close()
-        if self.http_client:
-            await self.http_client.aclose()
+        await self.status_updates.close()
+        shutdown_executor()
         logger.info("Worker stopped")
     
+    def retry_delays(self):
+        """Backoff before attempt 2, 3, ... in seconds (doubling, capped)."""
+        return [
+            min(self.config.worker_retry_base_delay * 2 ** i, self.config.worker_retry_max_delay)
+            for i in range(self.config.worker_max_attempts - 1)
+        ]
+    
+    def retry_queue_name(self, delay):
+        return f"{self.config.rabbitmq_queue}.retry.{delay}s"
+    
+    async def republish(self, message, routing_key, attempts, error):
+        """Publish a copy of message with its attempt count (confirmed before the original is acked)."""
+        headers = dict(message.headers or {})
+        headers["x-attempts"] = attempts
+        headers["x-last-error"] = error[:1000]
+        await self.channel.default_exchange.publish(
+            Message(
+                message.body,
+                headers=headers,
+                content_type=message.content_type,
+                message_id=message.message_id,
+                delivery_mode=DeliveryMode.PERSISTENT,
+            ),
+            routing_key=routing_key,
+        )
+    
     async def process_message(self, message: aio_pika.IncomingMessage):
-        async with message.process():
-            try:
-                job_data = json.loads(message.body.decode())
-                logger.info(f"Processing job: {job_data.get('job_id')}")
-                await self.process_job(job_data)
-            except Exception as e:
-                logger.error(f"Error processing message: {e}")
+        task = asyncio.current_task()
+        self.active_jobs.add(task)
+        try:
+            # If republishing fails the exception requeues the message, so it is never lost
+            async with self.job_slots, message.process(requeue=True):
+                await self.handle_delivery(message)
+        finally:
+            self.active_jobs.discard(task)
     
-    async def process_job(self, job_data):
+    async def handle_delivery(self, message: aio_pika.IncomingMessage):
+        previous_attempts = int((message.headers or {}).get("x-attempts", 0))
+        try:
+            job_data = json.loads(message.body.decode())
+            missing = [field for field in REQUIRED_FIELDS if not job_data.get(field)]
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+        except (ValueError, AttributeError) as e:
+            # Poison message: retrying cannot fix it
+            logger.error(f"Dead-lettering malformed message {message.message_id}: {e}")
+            await self.republish(message, self.config.rabbitmq_dlq, previous_attempts + 1, f"Malformed message: {e}")
+            return
+        
         job_id = job_data["job_id"]
+        if job_id in self.running_job_ids:
+            logger.warning(f"Job {job_id} is already running here, dropping duplicate delivery")
+            return
+        
+        checkpoint = JobCheckpoint(self.config.results_path, job_id)
+        # Count starts too, so a job that crashes the worker (no x-attempts update) still runs out of attempts
+        starts = (checkpoint.get("starts") or 0) + 1
+        checkpoint.save("starts", starts)
+        attempt = max(previous_attempts + 1, starts)
+        if attempt > self.config.worker_max_attempts:
+            # The last attempts never reached the except below (the worker died running them)
+            last_error = (message.headers or {}).get("x-last-error") or "worker stopped while running it"
+            error = f"Job did not finish in {self.config.worker_max_attempts} attempts: {last_error}"
+            logger.error(f"Job {job_id} is on attempt {attempt}, dead-lettering without running it: {error}")
+            await self.republish(message, self.config.rabbitmq_dlq, attempt - 1, error)
+            await self.update_job_status(job_id, "failed", error=error)
+            return
         
+        self.running_job_ids.add(job_id)
         try:
-            await self.update_job_status(job_id, "processing")
-            
-            source_path = job_data["source_file"]
-            source_lang = job_data["source_lang"]
-            target_lang = job_data["target_lang"]
-            result_path = os.path.join(self.config.results_path, f"{job_id}.wav")
-            
+            logger.info(f"Processing job: {job_id} (attempt {attempt}/{self.config.worker_max_attempts})")
+            await self.process_job(job_data, checkpoint)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if attempt >= self.config.worker_max_attempts:
+                logger.error(f"Job {job_id} failed after {attempt} attempts, dead-lettering: {error}")
+                await self.republish(message, self.config.rabbitmq_dlq, attempt, error)
+                await self.update_job_status(job_id, "failed", error=error)
+            else:
+                delay = self.retry_delays()[attempt - 1]
+                logger.warning(f"Job {job_id} attempt {attempt} failed, retrying in {delay}s: {error}")
+                await self.republish(message, self.retry_queue_name(delay), attempt, error)
+                # Stays "processing" (the documented job statuses); the error says a retry is pending
+                await self.update_job_status(job_id, "processing", error=f"Attempt {attempt} failed, retrying in {delay}s: {error}")
+        finally:
+            self.running_job_ids.discard(job_id)
+    
+    async def process_job(self, job_data, checkpoint):
+        """Run the pipeline, skipping stages the checkpoint already holds."""
+        job_id = job_data["job_id"]
+        
+        result_url = checkpoint.get("result_url")
+        if result_url:
+            logger.info(f"Job {job_id} already completed, resending its status")
+            await self.update_job_status(job_id, "succeeded", result_url=result_url)
+            return
+        
+        await self.update_job_status(job_id, "processing")
+        
+        source_path = job_data["source_file"]
+        source_lang = job_data["source_lang"]
+        target_lang = job_data["target_lang"]
+        result_path = os.path.join(self.config.results_path, f"{job_id}.wav")
+        
+        transcription = checkpoint.get("transcription")
+        if transcription is None:
             transcription = await transcribe_audio(source_path, source_lang, self.config)
+            checkpoint.save("transcription", transcription)
+        
+        translation = checkpoint.get("translation")
+        if translation is None:
             translation = await translate_text(transcription, source_lang, target_lang, self.config)
-            audio_path = await generate_audio(translation, target_lang, result_path, self.config)
-            
-            result_url = f"/results/{os.path.basename(audio_path)}"
-            await self.update_job_status(job_id, "succeeded", result_url=result_url)
-            logger.info(f"Job {job_id} completed")
-            
-        except Exception as e:
-            logger.error(f"Job {job_id} failed: {e}")
-            await self.update_job_status(job_id, "failed", error=str(e))
+            checkpoint.save("translation", translation)
+        
+        audio_path = await generate_audio(translation, target_lang, result_path, self.config)
+        
+        result_url = f"/results/{os.path.basename(audio_path)}"
+        checkpoint.save("result_url", result_url)
+        await self.update_job_status(job_id, "succeeded", result_url=result_url)
+        logger.info(f"Job {job_id} completed")
     
 
 
     async def update_job_status(self, job_id, status, result_url=None, error=None):
-        url = f"{self.config.api_base_url}/api/internal/jobs/{job_id}"  # ✅ Changed path
-        headers = {"X-Internal-API-Key": self.config.internal_api_key}
-
-        payload = {"status": status}
-        if result_url:
-            payload["result_url"] = result_url
-        if error:
-            payload["error"] = error
-        
-        try:
-            response = await self.http_client.patch(url, json=payload, headers=headers)
-            logger.info(f"Updated job {job_id} to {status}")
-        except Exception as e:
-            logger.error(f"Failed to update job status: {e}")
\ No newline at end of file
+        """Queue a status transition; the buffer coalesces and delivers it in a batch."""
+        self.status_updates.update(job_id, status, result_url=result_url, error=error)
+        logger.info(f"Job {job_id} status: {status}")
@@ -15,6 +15,22 @@ class Config:
         self.use_coqui = os.getenv("USE_COQUI", "false").lower() == "true"
         self.openai_api_key = os.getenv("OPENAI_API_KEY", "")
         self.internal_api_key = os.getenv("INTERNAL_API_KEY", "internal_key_change_in_production")
+        # Jobs processed at once, and unacked messages RabbitMQ may push ahead (>= concurrency)
+        self.worker_concurrency = int(os.getenv("WORKER_CONCURRENCY") or 2)
+        self.worker_prefetch = int(os.getenv("WORKER_PREFETCH") or self.worker_concurrency * 2)
+        # Where blocking model/NumPy work runs: "thread" or "process" pool
+        self.worker_executor = (os.getenv("WORKER_EXECUTOR") or "thread").lower()
+        self.worker_executor_size = int(os.getenv("WORKER_EXECUTOR_SIZE") or self.worker_concurrency)
+        # Failed jobs are retried with exponential backoff, then sent to rabbitmq_dlq
+        self.worker_max_attempts = int(os.getenv("WORKER_MAX_ATTEMPTS") or 5)
+        self.worker_retry_base_delay = int(os.getenv("WORKER_RETRY_BASE_DELAY") or 5)
+        self.worker_retry_max_delay = int(os.getenv("WORKER_RETRY_MAX_DELAY") or 300)
+        # Job status updates to the API gateway are coalesced and sent in batches
+        self.status_flush_interval = float(os.getenv("STATUS_FLUSH_INTERVAL") or 0.5)
+        self.status_batch_size = int(os.getenv("STATUS_BATCH_SIZE") or 100)
+        self.status_http2 = (os.getenv("STATUS_HTTP2") or "true").lower() == "true"
+        self.status_retry_max_delay = float(os.getenv("STATUS_RETRY_MAX_DELAY") or 30)
+        self.status_drain_timeout = float(os.getenv("STATUS_DRAIN_TIMEOUT") or 10)
         
         for path in [self.storage_path, self.upload_path, self.results_path]:
             os.makedirs(path, exist_ok=True)
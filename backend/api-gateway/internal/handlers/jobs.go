@@ -171,6 +171,59 @@ func (h *JobsHandler) UpdateJob(c *fiber.Ctx) error {
 	return c.JSON(job)
 }
 
+type JobStatusUpdate struct {
+	JobID string `json:"job_id"`
+	UpdateJobRequest
+}
+
+type BulkUpdateJobsRequest struct {
+	Updates []JobStatusUpdate `json:"updates"`
+}
+
+// BulkUpdateJobs applies a batch of worker status updates in one transaction,
+// in the order given. Like UpdateJob, only non-empty fields are written.
+func (h *JobsHandler) BulkUpdateJobs(c *fiber.Ctx) error {
+	var req BulkUpdateJobsRequest
+	if err := c.BodyParser(&req); err != nil {
+		return fiber.NewError(fiber.StatusBadRequest, "Invalid request body")
+	}
+
+	missing := []string{}
+	updated := 0
+	err := h.db.Transaction(func(tx *gorm.DB) error {
+		for _, update := range req.Updates {
+			jobID, err := uuid.Parse(update.JobID)
+			if err != nil {
+				missing = append(missing, update.JobID)
+				continue
+			}
+			result := tx.Model(&models.Job{}).Where("id = ?", jobID).Updates(models.Job{
+				Status:    update.Status,
+				ResultURL: update.ResultURL,
+				Error:     update.Error,
+				UpdatedAt: time.Now(),
+			})
+			if result.Error != nil {
+				return result.Error
+			}
+			if result.RowsAffected == 0 {
+				missing = append(missing, update.JobID)
+				continue
+			}
+			updated++
+		}
+		return nil
+	})
+	if err != nil {
+		return fiber.NewError(fiber.StatusInternalServerError, "Failed to update jobs")
+	}
+
+	return c.JSON(fiber.Map{
+		"updated": updated,
+		"missing": missing,
+	})
+}
+
 func (h *JobsHandler) GetJob(c *fiber.Ctx) error {
 	jobID, err := uuid.Parse(c.Params("id"))
 	if err != nil {
@@ -99,6 +99,7 @@ func registerRoutes(
 	// INTERNAL WORKER ROUTES - COMPLETELY SEPARATE
 	internal := app.Group("/api/internal")
 	internal.Use(handlers.WorkerAuthMiddleware(cfg.InternalAPIKey))
+	internal.Post("/jobs/status", jobsHandler.BulkUpdateJobs)
 	internal.Patch("/jobs/:id", jobsHandler.UpdateJob)
 
 }
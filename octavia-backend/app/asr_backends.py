@@ -0,0 +1,207 @@
+"""Pluggable speech recognition backends.
+
+Every backend returns the same structure that transcribe_audio writes to
+`_transcript.json` (text, language, segments, duration), so the engine used
+for a job is invisible downstream.
+
+Backends:
+    whisper         openai-whisper (PyTorch)
+    faster-whisper  CTranslate2 engine, int8 on CPU by default
+
+The deployment default comes from ASR_BACKEND; a job can override it with
+`asr_backend` in its metadata. ML libraries are imported lazily so the API
+process never loads them.
+"""
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+from . import model_cache
+from .resource_limits import JOB_CPU_THREADS
+from .task_routing import DEFAULT_ASR_BACKEND, asr_model_key
+
+logger = logging.getLogger(__name__)
+
+# CTranslate2 settings for the faster-whisper backend
+ASR_DEVICE = os.environ.get("ASR_DEVICE", "cpu")
+ASR_COMPUTE_TYPE = os.environ.get("ASR_COMPUTE_TYPE", "int8")
+ASR_CPU_THREADS = int(os.environ.get("ASR_CPU_THREADS", 0))  # 0 = the per-job thread budget
+ASR_NUM_WORKERS = int(os.environ.get("ASR_NUM_WORKERS", 1))
+ASR_BEAM_SIZE = int(os.environ.get("ASR_BEAM_SIZE", 5))
+
+# Language identification runs on a few short windows instead of the whole file
+SAMPLE_RATE = 16000
+LANGUAGE_ID_SECONDS = float(os.environ.get("LANGUAGE_ID_SECONDS", 30))
+LANGUAGE_ID_WINDOWS = int(os.environ.get("LANGUAGE_ID_WINDOWS", 3))
+
+
+class ASRBackend(ABC):
+    """Base class for speech recognition engines."""
+
+    name = "base"
+
+    def __init__(self, model_size: str = "base"):
+        self.model_size = model_size
+
+    @abstractmethod
+    def transcribe(self, audio, language: Optional[str] = None, **options) -> dict:
+        """
+        Transcribe audio.
+
+        Args:
+            audio: Path to an audio file or a 16 kHz mono float32 array
+            language: ISO 639-1 code, or None to auto-detect
+            **options: Engine-specific decoding options
+
+        Returns:
+            dict with 'text', 'language', 'segments' and 'duration'
+        """
+
+    @abstractmethod
+    def detect_language(self, audio) -> Tuple[str, float]:
+        """
+        Identify the spoken language of a short 16 kHz mono float32 clip.
+
+        Returns:
+            (language code, probability)
+        """
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper on PyTorch."""
+
+    name = "whisper"
+
+    def __init__(self, model_size: str = "base"):
+        super().__init__(model_size)
+        import whisper
+        self.model = whisper.load_model(model_size)
+
+    def transcribe(self, audio, language: Optional[str] = None, **options) -> dict:
+        from .inference_batcher import WHISPER_BATCHING, BatcherClosed, transcribe_batched
+
+        if WHISPER_BATCHING and not isinstance(audio, str):
+            try:
+                return transcribe_batched(self.model, asr_model_key(self.model_size, self.name), audio, language)
+            except BatcherClosed:
+                # Evicted from the model cache mid-call; this job still holds the model
+                logger.info(f"Batcher for whisper {self.model_size} closed, decoding unbatched")
+        return self.model.transcribe(audio, language=language, verbose=False, **options)
+
+    def detect_language(self, audio) -> Tuple[str, float]:
+        import whisper
+
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), self.model.dims.n_mels)
+        _, probs = self.model.detect_language(mel.to(self.model.device))
+        language = max(probs, key=probs.get)
+        return language, float(probs[language])
+
+
+class FasterWhisperBackend(ASRBackend):
+    """faster-whisper (CTranslate2), int8 quantized on CPU by default."""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_size: str = "base"):
+        super().__init__(model_size)
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(
+            model_size,
+            device=ASR_DEVICE,
+            compute_type=ASR_COMPUTE_TYPE,
+            cpu_threads=ASR_CPU_THREADS or JOB_CPU_THREADS,
+            num_workers=ASR_NUM_WORKERS,
+        )
+
+    def transcribe(self, audio, language: Optional[str] = None, **options) -> dict:
+        options.setdefault("beam_size", ASR_BEAM_SIZE)
+        segments_iter, info = self.model.transcribe(audio, language=language, **options)
+
+        # Segments are produced lazily; decoding happens while iterating
+        segments = [
+            {
+                "id": segment.id,
+                "seek": segment.seek,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "tokens": list(segment.tokens),
+                "temperature": segment.temperature,
+                "avg_logprob": segment.avg_logprob,
+                "compression_ratio": segment.compression_ratio,
+                "no_speech_prob": segment.no_speech_prob,
+            }
+            for segment in segments_iter
+        ]
+
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "language": info.language,
+            "segments": segments,
+            "duration": info.duration,
+        }
+
+    def detect_language(self, audio) -> Tuple[str, float]:
+        # Language detection runs eagerly; segments are lazy and left undecoded
+        _, info = self.model.transcribe(audio, language=None, beam_size=1)
+        return info.language, float(info.language_probability)
+
+
+ASR_BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def get_asr_backend(model_size: str = "base", name: Optional[str] = None) -> ASRBackend:
+    """
+    Return a loaded backend, reusing the per-process model cache.
+
+    Args:
+        model_size: Model size ('tiny', 'base', 'small', 'medium', 'large')
+        name: Backend name, defaults to ASR_BACKEND
+
+    Returns:
+        ASRBackend instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    name = name or DEFAULT_ASR_BACKEND
+    backend_cls = ASR_BACKENDS.get(name)
+    if backend_cls is None:
+        raise ValueError(f"Unknown ASR backend '{name}'. Available: {', '.join(ASR_BACKENDS)}")
+
+    return model_cache.get_model(asr_model_key(model_size, name), lambda: backend_cls(model_size))
+
+
+def identify_language(backend: ASRBackend, audio) -> Tuple[str, float]:
+    """
+    Identify the spoken language from a few sampled windows of a clip.
+
+    LANGUAGE_ID_WINDOWS windows of LANGUAGE_ID_SECONDS are spread evenly over
+    the audio (a single window for short clips). Each window votes with its
+    probability, so one silent or music-only window cannot decide alone.
+
+    Args:
+        backend: Loaded ASR backend
+        audio: 16 kHz mono float32 array
+
+    Returns:
+        (language code, mean probability of the winning language)
+    """
+    window = int(LANGUAGE_ID_SECONDS * SAMPLE_RATE)
+    if len(audio) <= window or LANGUAGE_ID_WINDOWS <= 1:
+        offsets = [0]
+    else:
+        last = len(audio) - window
+        offsets = sorted({last * i // (LANGUAGE_ID_WINDOWS - 1) for i in range(LANGUAGE_ID_WINDOWS)})
+
+    votes: dict = {}
+    for offset in offsets:
+        language, probability = backend.detect_language(audio[offset:offset + window])
+        votes[language] = votes.get(language, 0.0) + probability
+
+    language = max(votes, key=votes.get)
+    return language, votes[language] / len(offsets)
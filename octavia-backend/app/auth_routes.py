@@ -1,3 +1,5 @@
+import logging
+
 from fastapi import APIRouter, Request, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
 from app.core import security
@@ -5,6 +7,8 @@ from app.core.database import get_db
 from app.models import User
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
 
@@ -15,10 +19,6 @@ def me(request: Request, db: Session = Depends(get_db)):
     This endpoint reads the token from the Authorization header or from the
     HttpOnly cookie `octavia_token` and returns the user object.
     """
-    print("🔍 /me endpoint called")  # Debug
-    print(f"   Headers: {dict(request.headers)}")  # Debug
-    print(f"   Cookies: {dict(request.cookies)}")  # Debug
-    
     try:
         # Extract token from Authorization header or cookie
         token = security.extract_token_from_request(
@@ -27,33 +27,26 @@ def me(request: Request, db: Session = Depends(get_db)):
         )
         
         if not token:
-            print("❌ No token found in request")
+            logger.debug("/me: no token in request")
             raise HTTPException(status_code=401, detail="Not authenticated - no token")
         
-        print(f"✅ Token found: {token[:20]}...")
-        
         # Decode token to get user ID
         payload = security.decode_token(token)
         if not payload:
-            print("❌ Token decode failed")
+            logger.debug("/me: token decode failed")
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        print(f"✅ Token payload: {payload}")
-        
         # Get user from database
         user_id = payload.get("sub")
         if not user_id:
-            print("❌ No 'sub' in token payload")
+            logger.debug("/me: no 'sub' in token payload")
             raise HTTPException(status_code=401, detail="Invalid token payload")
         
-        print(f"🔍 Looking up user_id: {user_id}")
-        
         # Try to convert to int if it's a string
         try:
             user_id_int = int(user_id)
-            print(f"✅ Converted user_id to int: {user_id_int}")
         except (ValueError, TypeError) as e:
-            print(f"❌ Invalid user_id format: {user_id}, type: {type(user_id)}, error: {e}")
+            logger.debug("/me: invalid user_id format %r: %s", user_id, e)
             raise HTTPException(status_code=401, detail=f"Invalid user ID format in token: {user_id}")
         
         # Query user - try both with ID as int and as string just in case
@@ -61,14 +54,11 @@ def me(request: Request, db: Session = Depends(get_db)):
         
         # If not found, also try treating the field as string (some DBs store it differently)
         if not user:
-            print(f"⚠️  User not found with int ID, trying string lookup...")
             user = db.query(User).filter(User.id == str(user_id)).first()
         if not user:
-            print(f"❌ User not found: {user_id_int}")
+            logger.debug("/me: user %s not found", user_id)
             raise HTTPException(status_code=404, detail="User not found")
         
-        print(f"✅ User found: {user.email}")
-        
         # Build response with all fields, using getattr with defaults for optional fields
         response_data = {
             "id": user.id,
@@ -98,15 +88,12 @@ def me(request: Request, db: Session = Depends(get_db)):
         if hasattr(user, 'name') and user.name:
             response_data["name"] = user.name
         
-        print(f"✅ Returning user data: {response_data}")
         return response_data
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ /me endpoint error: {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("/me endpoint error")
         raise HTTPException(status_code=401, detail=f"Authentication error: {str(e)}")
 
 
@@ -1,9 +1,20 @@
 """Celery configuration and task definitions for Octavia backend."""
 import os
-from celery import Celery
+import inspect
+import json
+import logging
+from celery import Celery, chord, group
 from celery.schedules import crontab
+from celery.signals import (
+    setup_logging, task_postrun, task_prerun, worker_init, worker_process_init, worker_process_shutdown,
+    worker_shutdown,
+)
 from kombu import Queue, Exchange
 
+from app import logging_config, metrics, profiling, resource_limits
+
+logger = logging.getLogger(__name__)
+
 # Determine if using real Redis or fake Redis for development
 USE_FAKE_REDIS = os.environ.get("USE_FAKE_REDIS", "false").lower() == "true"
 
@@ -93,9 +104,128 @@ app.conf.update(
 )
 
 
+def chords_supported() -> bool:
+    """Chord callbacks need a result backend that every worker process shares (not in-memory)."""
+    backend = str(app.conf.result_backend or "")
+    return bool(backend) and not backend.startswith(("cache+memory", "memory", "disabled"))
+
+
+@setup_logging.connect
+def configure_worker_logging(**kwargs):
+    """Use the app's queued JSON logging instead of Celery's handlers."""
+    logging_config.configure_logging()
+
+
+@worker_process_init.connect
+def restart_log_writer(**kwargs):
+    """Forked children need their own log writer thread."""
+    logging_config.configure_logging()
+
+
+@worker_process_shutdown.connect
+def flush_logs(**kwargs):
+    logging_config.shutdown_logging()
+
+
+@worker_init.connect
+def set_up_resource_limits(**kwargs):
+    """
+    Cap math-library threads and create the node's resource pools in the main worker process.
+
+    Both happen before the pool forks, so children inherit the thread
+    environment and share one set of pools.
+    """
+    resource_limits.configure_threads()
+    resource_limits.init_pools()
+
+
+@worker_process_init.connect
+def limit_threads(**kwargs):
+    """Match each child's math-library thread pools to the per-job thread budget."""
+    resource_limits.configure_threads()
+
+
+@worker_process_init.connect
+def preload_warm_models(**kwargs):
+    """Load the models this worker advertises (WORKER_WARM_MODELS) in each child process."""
+    from app.task_routing import warm_model_keys
+    from app import workers
+
+    for model_key in warm_model_keys():
+        workers.preload_model(model_key)
+
+
+@worker_init.connect
+def start_tts_engines(sender=None, **kwargs):
+    """
+    Start the persistent TTS engine pool with threaded and solo workers (TTS_ENGINES_AT_START).
+
+    Prefork workers never prestart: their children are daemonic and cannot
+    start engine processes, and engines started before the fork would be
+    shared by every child. They start (or fall back) on first synthesis.
+    """
+    if os.environ.get("TTS_ENGINES_AT_START", "false").lower() not in ("1", "true", "yes"):
+        return
+    pool_cls = getattr(sender, "pool_cls", None)
+    pool_name = pool_cls if isinstance(pool_cls, str) else getattr(pool_cls, "__module__", "")
+    if pool_name.rsplit(".", 1)[-1] in ("thread", "threads", "solo"):
+        from app.speech_synthesis import get_tts_pool
+        get_tts_pool()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def stop_tts_engines(**kwargs):
+    """Stop the process's TTS engine processes with it."""
+    from app.speech_synthesis import shutdown_tts_pool
+    shutdown_tts_pool()
+
+
+@worker_init.connect
+def serve_worker_metrics(**kwargs):
+    """Expose worker metrics on WORKER_METRICS_PORT from the main worker process."""
+    metrics.start_worker_metrics_server()
+
+
+@worker_process_shutdown.connect
+def drop_child_metrics(pid=None, **kwargs):
+    """Remove an exiting child's live gauges from the shared metrics directory."""
+    metrics.mark_process_dead(pid or os.getpid())
+
+
+@task_prerun.connect
+def time_task_start(task_id=None, **kwargs):
+    metrics.task_started(task_id)
+
+
+@task_postrun.connect
+def time_task_end(task_id=None, task=None, state=None, **kwargs):
+    metrics.task_finished(task_id, task.name, state or "unknown")
+
+
+@task_prerun.connect
+def bind_task_job(task=None, args=None, kwargs=None, **extra):
+    """Tag the task's log records with the job it works on."""
+    job_id = (kwargs or {}).get("job_id")
+    if job_id is None:
+        try:
+            job_id = inspect.signature(task.run).bind_partial(*(args or ()), **(kwargs or {})).arguments.get("job_id")
+        except TypeError:
+            pass
+    logging_config.bind_job(job_id)
+
+
+@task_postrun.connect
+def unbind_task_job(**kwargs):
+    logging_config.bind_job(None)
+
+
 # Task definitions
 @app.task(bind=True, name="app.celery_tasks.process_transcription")
-def process_transcription(self, job_id: str, user_id: str, input_file_path: str, language: str = None, model_size: str = "base"):
+@profiling.profiled("transcribe")
+@resource_limits.limited("transcribe")
+def process_transcription(self, job_id: str, user_id: str, input_file_path: str, language: str = None, model_size: str = "base",
+                          asr_backend: str = None):
     """Async transcription task with progress tracking."""
     from app.core.database import SessionLocal
     from app.job_model import Job, JobStatus, JobPhase
@@ -120,7 +250,7 @@ def process_transcription(self, job_id: str, user_id: str, input_file_path: str,
         try:
             # Update progress: 20% - starting transcription
             job.progress_percentage = 20.0
-            job.current_step = "Transcribing audio with Whisper"
+            job.current_step = "Transcribing audio"
             db.commit()
             
             success = workers.transcribe_audio(
@@ -129,6 +259,7 @@ def process_transcription(self, job_id: str, user_id: str, input_file_path: str,
                 input_file_path=input_file_path,
                 language=language,
                 model_size=model_size,
+                asr_backend=asr_backend,
             )
             
             if success:
@@ -163,6 +294,8 @@ def process_transcription(self, job_id: str, user_id: str, input_file_path: str,
 
 
 @app.task(bind=True, name="app.celery_tasks.process_translation")
+@profiling.profiled("translate")
+@resource_limits.limited("translate")
 def process_translation(self, job_id: str, user_id: str, input_file_path: str, source_lang: str, target_lang: str):
     """Async translation task with progress tracking."""
     from app.core.database import SessionLocal
@@ -227,7 +360,10 @@ def process_translation(self, job_id: str, user_id: str, input_file_path: str, s
 
 
 @app.task(bind=True, name="app.celery_tasks.process_synthesis")
-def process_synthesis(self, job_id: str, user_id: str, input_file_path: str, language: str = "en"):
+@profiling.profiled("synthesize")
+@resource_limits.limited("synthesize")
+def process_synthesis(self, job_id: str, user_id: str, input_file_path: str, language: str = "en",
+                      voice_id: str = None, speed: float = 1.0):
     """Async synthesis task with progress tracking."""
     from app.core.database import SessionLocal
     from app.job_model import Job, JobStatus, JobPhase
@@ -258,6 +394,8 @@ def process_synthesis(self, job_id: str, user_id: str, input_file_path: str, lan
                 job_id=job_id,
                 input_file_path=input_file_path,
                 language=language,
+                voice_id=voice_id,
+                speed=speed,
             )
             
             if success:
@@ -290,8 +428,11 @@ def process_synthesis(self, job_id: str, user_id: str, input_file_path: str, lan
 
 
 @app.task(bind=True, name="app.celery_tasks.process_video_translation")
+@profiling.profiled("video_translate")
+@resource_limits.limited("video_translate")
 def process_video_translation(self, job_id: str, user_id: str, input_file_path: str, 
-                               source_lang: str, target_lang: str, model_size: str = "base"):
+                               source_lang: str, target_lang: str, model_size: str = "base",
+                               asr_backend: str = None):
     """Async video translation task with progress tracking."""
     from app.core.database import SessionLocal
     from app.job_model import Job, JobStatus, JobPhase
@@ -317,6 +458,44 @@ def process_video_translation(self, job_id: str, user_id: str, input_file_path:
             job.current_step = f"Transcribing video audio from {source_lang}"
             db.commit()
             
+            # Output options were stored on the job when it was created
+            options = json.loads(job.job_metadata) if job.job_metadata else {}
+            output_mode = options.get("output_mode") or "dub"
+            enable_dubbing = options.get("enable_dubbing", True)
+            
+            # Long inputs fan out into pieces processed by parallel tasks
+            if enable_dubbing or output_mode == "subtitles":
+                from app.video_chunking import should_chunk
+                from app.video_processor import VideoProcessor
+                
+                duration = options.get("video_duration") or VideoProcessor().get_video_duration(input_file_path)
+                chunk = bool(duration) and should_chunk(duration, options.get("chunked"))
+                if chunk and not chords_supported():
+                    logger.info(f"Job {job_id}: result backend cannot run chords, processing in one pass")
+                    chunk = False
+                if chunk:
+                    pieces, source_lang = workers.prepare_chunked_video(
+                        db, job_id, input_file_path, duration, source_lang, model_size, asr_backend
+                    )
+                    # Set before dispatch: pieces add to this progress as they finish
+                    job.progress_percentage = 10.0
+                    job.current_step = f"Processing {len(pieces)} pieces in parallel"
+                    db.commit()
+                    queue = (self.request.delivery_info or {}).get("routing_key") or "default"
+                    header = group(
+                        process_video_piece.s(
+                            job_id, piece, input_file_path, source_lang, target_lang,
+                            model_size, asr_backend, output_mode,
+                        ).set(queue=queue)
+                        for piece in pieces
+                    )
+                    callback = finalize_video_pieces.s(
+                        job_id, input_file_path, source_lang, target_lang,
+                        output_mode, options.get("mux_subtitles", False),
+                    ).set(queue=queue)
+                    chord(header)(callback.on_error(fail_chunked_video.s(job_id)))
+                    return {"status": "dispatched", "job_id": job_id, "pieces": len(pieces)}
+            
             success = workers.video_translate_pipeline(
                 session=db,
                 job_id=job_id,
@@ -324,7 +503,10 @@ def process_video_translation(self, job_id: str, user_id: str, input_file_path:
                 source_language=source_lang,
                 target_language=target_lang,
                 model_size=model_size,
-                enable_dubbing=True,
+                asr_backend=asr_backend,
+                enable_dubbing=enable_dubbing,
+                output_mode=output_mode,
+                mux_subtitles=options.get("mux_subtitles", False),
             )
             
             if success:
@@ -356,6 +538,173 @@ def process_video_translation(self, job_id: str, user_id: str, input_file_path:
         db.close()
 
 
+@app.task(bind=True, name="app.celery_tasks.process_video_piece")
+@profiling.profiled("video_translate")
+@resource_limits.limited("video_translate")
+def process_video_piece(self, job_id: str, piece: dict, input_file_path: str, source_lang: str,
+                        target_lang: str, model_size: str = "base", asr_backend: str = None,
+                        output_mode: str = "dub"):
+    """Process one keyframe-aligned piece of a chunked video translation."""
+    from app.core.database import SessionLocal
+    from app import workers
+    
+    db = SessionLocal()
+    try:
+        return workers.translate_video_piece(
+            db, job_id, piece, input_file_path, source_lang, target_lang,
+            model_size=model_size, asr_backend=asr_backend, output_mode=output_mode,
+        )
+    finally:
+        db.close()
+
+
+@app.task(bind=True, name="app.celery_tasks.finalize_video_pieces")
+@profiling.profiled("video_translate")
+def finalize_video_pieces(self, piece_results: list, job_id: str, input_file_path: str, source_lang: str,
+                          target_lang: str, output_mode: str = "dub", mux_subtitles: bool = False):
+    """Join the processed pieces of a chunked video translation (chord callback)."""
+    from app.core.database import SessionLocal
+    from app.job_model import Job, JobPhase
+    from app import workers
+    
+    db = SessionLocal()
+    try:
+        success = workers.finalize_chunked_video(
+            db, job_id, piece_results, input_file_path, source_lang, target_lang,
+            output_mode=output_mode, mux_subtitles=mux_subtitles,
+        )
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if job:
+            job.phase = JobPhase.COMPLETED if success else JobPhase.FAILED
+            job.current_step = "Video translation completed" if success else "Video translation failed"
+            job.progress_percentage = 100.0 if success else 0.0
+            db.commit()
+        return {"status": "success" if success else "error", "job_id": job_id}
+    finally:
+        db.close()
+
+
+@app.task(name="app.celery_tasks.fail_chunked_video")
+def fail_chunked_video(request, exc, traceback, job_id: str):
+    """Mark a chunked job failed when one of its pieces fails (chord error callback)."""
+    from app.core.database import SessionLocal
+    from app.job_model import Job, JobStatus, JobPhase
+    from app import workers
+    import shutil
+    
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if job:
+            job.status = JobStatus.FAILED
+            job.phase = JobPhase.FAILED
+            job.current_step = f"Error: {str(exc)}"
+            job.error_message = f"Video translation error: {str(exc)}"
+            job.progress_percentage = 0.0
+            db.commit()
+            shutil.rmtree(workers.chunked_work_dir(job.input_file), ignore_errors=True)
+    finally:
+        db.close()
+
+
+@app.task(bind=True, name="app.celery_tasks.process_audio_translation")
+@profiling.profiled("audio_translate")
+@resource_limits.limited("audio_translate")
+def process_audio_translation(self, job_id: str, user_id: str, input_file_path: str,
+                              source_lang: str, target_lang: str, model_size: str = "base",
+                              asr_backend: str = None):
+    """Async audio translation task: transcribe, translate, then synthesize on the same job."""
+    from app.core.database import SessionLocal
+    from app.job_model import Job, JobStatus, JobPhase
+    from app import workers
+    from datetime import datetime
+
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            return {"status": "error", "message": f"Job {job_id} not found"}
+
+        job.status = JobStatus.PROCESSING
+        job.phase = JobPhase.TRANSCRIBING
+        job.current_step = "Initializing audio translation pipeline"
+        job.progress_percentage = 0.0
+        job.started_at = datetime.utcnow()
+        db.commit()
+
+        try:
+            # Each stage writes its output file onto the job, which feeds the next stage
+            job.progress_percentage = 10.0
+            job.current_step = f"Transcribing audio from {source_lang}"
+            db.commit()
+            success = workers.transcribe_audio(
+                session=db,
+                job_id=job_id,
+                input_file_path=input_file_path,
+                language=None if source_lang == "auto" else source_lang,
+                model_size=model_size,
+                asr_backend=asr_backend,
+            )
+
+            if success:
+                db.refresh(job)
+                detected_lang = json.loads(job.job_metadata or "{}").get("detected_language", source_lang)
+                job.status = JobStatus.PROCESSING  # Stage workers mark the job completed
+                job.phase = JobPhase.TRANSLATING
+                job.progress_percentage = 50.0
+                job.current_step = f"Translating from {detected_lang} to {target_lang}"
+                db.commit()
+                success = workers.translate_from_transcription(
+                    session=db,
+                    job_id=job_id,
+                    transcription_file=job.output_file,
+                    source_lang=detected_lang,
+                    target_lang=target_lang,
+                )
+
+            if success:
+                db.refresh(job)
+                job.status = JobStatus.PROCESSING
+                job.phase = JobPhase.SYNTHESIZING
+                job.progress_percentage = 75.0
+                job.current_step = f"Synthesizing audio in {target_lang}"
+                db.commit()
+                success = workers.synthesize_audio(
+                    session=db,
+                    job_id=job_id,
+                    input_file_path=job.output_file,
+                    language=target_lang,
+                )
+
+            if success:
+                job.status = JobStatus.COMPLETED
+                job.phase = JobPhase.COMPLETED
+                job.current_step = "Audio translation completed"
+                job.progress_percentage = 100.0
+                db.commit()
+                return {"status": "success", "job_id": job_id}
+            else:
+                job.status = JobStatus.FAILED
+                job.phase = JobPhase.FAILED
+                job.current_step = "Audio translation failed"
+                job.error_message = job.error_message or "Audio translation failed"
+                job.progress_percentage = 0.0
+                db.commit()
+                return {"status": "error", "message": "Audio translation failed"}
+
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.phase = JobPhase.FAILED
+            job.current_step = f"Error: {str(e)}"
+            job.error_message = str(e)
+            job.progress_percentage = 0.0
+            db.commit()
+            raise
+
+    finally:
+        db.close()
+
+
 @app.task(bind=True, name="app.celery_tasks.check_stale_jobs")
 def check_stale_jobs(self):
     """Check for jobs that have been processing too long and fail them."""
@@ -388,6 +737,7 @@ def cleanup_completed_jobs(self):
     """Clean up old completed jobs (older than 7 days)."""
     from app.core.database import SessionLocal
     from app.job_model import Job, JobStatus
+    from app.storage import delete_file, is_same_file
     from datetime import datetime, timedelta
     import os
     
@@ -402,10 +752,14 @@ def cleanup_completed_jobs(self):
         
         deleted_count = 0
         for job in old_jobs:
-            # Delete associated files
-            if job.output_file:
+            # Delete associated files, but never the user's input (outputs may reference it)
+            try:
+                output_is_source = json.loads(job.job_metadata or "{}").get("output_is_source", False)
+            except ValueError:
+                output_is_source = False
+            is_input = output_is_source or (job.input_file and is_same_file(job.output_file or "", job.input_file))
+            if job.output_file and not is_input:
                 try:
-                    from app.storage import delete_file
                     delete_file(job.output_file)
                 except:
                     pass
@@ -16,6 +16,11 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def init_db():
+    """Create any missing tables. Run at application startup, never on import."""
+    Base.metadata.create_all(bind=engine)
+
+
 def get_db():
     """Dependency to get database session."""
     db = SessionLocal()
@@ -1,7 +1,10 @@
 """Security utilities: password hashing and JWT token management."""
 import os
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from fastapi import HTTPException
@@ -10,8 +13,26 @@ SECRET_KEY = os.environ.get("SECRET_KEY") or os.environ.get("JWT_SECRET", "your-
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 60 * 24 * 7))
 
-# Use pbkdf2_sha256 instead of bcrypt to avoid passlib/bcrypt version issues
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Password hashing cost and executor sizing
+PASSWORD_HASH_ROUNDS = int(os.environ.get("PASSWORD_HASH_ROUNDS", 29000))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 8))
+
+# Use pbkdf2_sha256 instead of bcrypt to avoid passlib/bcrypt version issues.
+# Pinning min/max rounds to the configured cost makes verify_and_update()
+# report stored hashes created with different parameters as needing a rehash.
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=PASSWORD_HASH_ROUNDS,
+)
+
+# Dedicated bounded pool, awaited by the async signup/login handlers, so a login
+# spike neither runs hashes on nor parks threads of the request threadpool
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash")
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
 
 
 def get_password_hash(password: str) -> str:
@@ -24,6 +45,38 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify password and return a replacement hash if the stored one uses outdated parameters."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _submit_hash_job(func, *args) -> Future:
+    """Submit a hashing call to the dedicated executor, rejecting work when the queue is full."""
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = _hash_executor.submit(func, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    return await asyncio.wrap_future(_submit_hash_job(get_password_hash, password))
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password (and compute any rehash) without blocking the event loop."""
+    return await asyncio.wrap_future(_submit_hash_job(verify_and_update_password, plain_password, hashed_password))
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
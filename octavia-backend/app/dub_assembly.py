@@ -0,0 +1,148 @@
+"""Timestamp-aligned dub track assembly.
+
+Each synthesized segment is placed at its source segment's start time in a
+single PCM buffer that is as long as the original audio. Speech that would
+run into the next segment is time-compressed with WSOLA (up to
+DUB_MAX_STRETCH) and trimmed with a short fade after that. Speech that is
+shorter than its slot is followed by silence. The finished track already
+lines up with the video, so muxing needs no further sync passes.
+"""
+import logging
+import os
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Largest speed-up applied to a segment before it is trimmed
+DUB_MAX_STRETCH = float(os.environ.get("DUB_MAX_STRETCH", 1.5))
+
+WSOLA_FRAME = 1024
+WSOLA_TOLERANCE = 256
+FADE_SECONDS = 0.02
+
+
+def resample(audio: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Linear resampling, enough for speech that is mixed into a dub track."""
+    if source_rate == target_rate or len(audio) == 0:
+        return audio
+    positions = np.arange(0, len(audio), source_rate / target_rate)
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+
+def time_stretch(audio: np.ndarray, rate: float) -> np.ndarray:
+    """
+    Change duration without changing pitch (WSOLA).
+
+    Args:
+        audio: Mono float32 samples
+        rate: Speed factor; 1.25 makes the audio 25% shorter
+
+    Returns:
+        Stretched mono float32 samples, about len(audio) / rate long
+    """
+    output_length = int(len(audio) / rate)
+    if abs(rate - 1.0) < 1e-3 or len(audio) < 2 * WSOLA_FRAME:
+        # Too short for overlap-add; resampling changes pitch slightly but keeps timing
+        return resample(audio, len(audio), output_length) if output_length else audio[:0]
+
+    hop_out = WSOLA_FRAME // 2
+    hop_in = hop_out * rate
+    window = np.hanning(WSOLA_FRAME).astype(np.float32)
+    margin = WSOLA_FRAME + WSOLA_TOLERANCE
+    padded = np.pad(audio.astype(np.float32), (margin, margin + 2 * WSOLA_FRAME))
+
+    frame_count = output_length // hop_out + 1
+    output = np.zeros(frame_count * hop_out + WSOLA_FRAME, dtype=np.float32)
+    norm = np.zeros_like(output)
+
+    previous = margin
+    for frame in range(frame_count):
+        nominal = margin + int(frame * hop_in)
+        if frame == 0:
+            position = nominal
+        else:
+            # Pick the candidate that best continues the previous frame
+            natural = padded[previous + hop_out:previous + hop_out + WSOLA_FRAME]
+            start = nominal - WSOLA_TOLERANCE
+            region = padded[start:start + WSOLA_FRAME + 2 * WSOLA_TOLERANCE]
+            candidates = np.lib.stride_tricks.sliding_window_view(region, WSOLA_FRAME)
+            position = start + int(np.argmax(candidates @ natural))
+
+        offset = frame * hop_out
+        output[offset:offset + WSOLA_FRAME] += padded[position:position + WSOLA_FRAME] * window
+        norm[offset:offset + WSOLA_FRAME] += window
+        previous = position
+
+    output /= np.maximum(norm, 1e-3)
+    return output[:output_length]
+
+
+def fit_to_slot(audio: np.ndarray, slot_samples: int, sample_rate: int) -> np.ndarray:
+    """Compress audio that overruns its slot, then trim with a fade if still too long."""
+    if slot_samples <= 0:
+        return audio[:0]
+    if len(audio) <= slot_samples:
+        return audio
+
+    rate = min(len(audio) / slot_samples, DUB_MAX_STRETCH)
+    audio = time_stretch(audio, rate)
+    if len(audio) > slot_samples:
+        audio = audio[:slot_samples].copy()
+        fade = min(int(FADE_SECONDS * sample_rate), len(audio))
+        audio[len(audio) - fade:] *= np.linspace(1.0, 0.0, fade, dtype=np.float32)
+    return audio
+
+
+def assemble_dub_track(
+    segments: List[dict],
+    segment_paths: List[Optional[str]],
+    output_path: str,
+    total_duration: Optional[float] = None,
+    sample_rate: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Build one dub track with every segment at its source start time.
+
+    A segment may run on into the silence before the next segment starts.
+    Only the part that overlaps the next segment is compressed or trimmed.
+
+    Args:
+        segments: Transcript segments with 'start' and 'end' in seconds
+        segment_paths: Synthesized WAV per segment (None for skipped segments)
+        output_path: Destination WAV path
+        total_duration: Track length in seconds, defaults to the last segment end
+        sample_rate: Output rate, defaults to the rate of the first segment WAV
+
+    Returns:
+        output_path, or None if no segment had audio
+    """
+    import soundfile as sf
+
+    clips = []
+    for segment, path in zip(segments, segment_paths):
+        if not path:
+            continue
+        audio, rate = sf.read(path, dtype='float32', always_2d=True)
+        sample_rate = sample_rate or rate
+        clips.append((float(segment.get("start", 0.0)), resample(audio.mean(axis=1), rate, sample_rate)))
+
+    if not clips:
+        return None
+
+    if total_duration is None:
+        total_duration = max(float(s.get("end", 0.0)) for s in segments)
+    track = np.zeros(int(total_duration * sample_rate), dtype=np.float32)
+
+    clips.sort(key=lambda clip: clip[0])
+    for index, (start, audio) in enumerate(clips):
+        offset = int(start * sample_rate)
+        next_offset = int(clips[index + 1][0] * sample_rate) if index + 1 < len(clips) else len(track)
+        fitted = fit_to_slot(audio, min(next_offset, len(track)) - offset, sample_rate)
+        if len(fitted) < len(audio):
+            logger.debug("Segment at %.2fs fitted from %d to %d samples", start, len(audio), len(fitted))
+        track[offset:offset + len(fitted)] = fitted
+
+    sf.write(output_path, np.clip(track, -1.0, 1.0), sample_rate, subtype='PCM_16')
+    return output_path
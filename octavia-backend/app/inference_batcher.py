@@ -0,0 +1,205 @@
+"""Cross-job micro-batching for Whisper inference.
+
+Short clips leave the CPU's vector units half idle when each job decodes on
+its own. The MicroBatcher collects 30-second mel windows submitted by many
+concurrent jobs, runs one batched decode once the batch is full or the
+oldest window has waited max_wait_ms, and hands each result back to the job
+that submitted it.
+
+Batching happens across threads of one process, so it pays off with a
+threaded Celery pool (WORKER_POOL=threads) or a sidecar process that owns
+the model; prefork children each hold one job and never fill a batch.
+Enable with WHISPER_BATCHING=true.
+
+There is one batcher per model-cache key. When model_cache evicts the model,
+its batcher is closed so it stops holding the model.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from . import model_cache
+
+logger = logging.getLogger(__name__)
+
+WHISPER_BATCHING = os.environ.get("WHISPER_BATCHING", "false").lower() in ("1", "true", "yes")
+WHISPER_BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", 8))
+WHISPER_BATCH_WAIT_MS = int(os.environ.get("WHISPER_BATCH_WAIT_MS", 50))
+
+# Whisper operates on fixed 30 second windows of 16 kHz audio
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30
+WINDOW_SAMPLES = SAMPLE_RATE * WINDOW_SECONDS
+
+
+class BatcherClosed(RuntimeError):
+    """Raised by submit() once the batcher is closed (e.g. its model was evicted)."""
+
+
+class MicroBatcher:
+    """Batch items submitted from many threads into single decode calls."""
+
+    def __init__(
+        self,
+        decode_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = WHISPER_BATCH_SIZE,
+        max_wait_ms: int = WHISPER_BATCH_WAIT_MS,
+        name: str = "micro-batcher",
+    ):
+        """
+        Args:
+            decode_fn: Called with a list of items, returns one result per item in order
+            max_batch_size: Largest batch passed to decode_fn
+            max_wait_ms: Longest time the first item of a batch waits for company
+            name: Thread name, for logs
+        """
+        self.decode_fn = decode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item for decoding and return a future for its result."""
+        if self._closed:
+            raise BatcherClosed("Batcher is closed")
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def close(self):
+        """Stop the batching thread after the queued items are decoded."""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        # Release the model captured by the decode function
+        self.decode_fn = None
+
+    def _collect_batch(self, first) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                # Re-queue the sentinel so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect_batch(first)
+            items = [item for item, _ in batch]
+            try:
+                results = self.decode_fn(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batched decode of {len(items)} items failed: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+
+
+def _whisper_decode_fn(model) -> Callable[[List[Any]], List[Any]]:
+    """Build a decode function that runs one batched Whisper decode per language group."""
+    import torch
+    import whisper
+
+    def decode(items: List[Dict]) -> List[Any]:
+        results: List[Any] = [None] * len(items)
+        groups: Dict[Optional[str], List[int]] = {}
+        for index, item in enumerate(items):
+            groups.setdefault(item["language"], []).append(index)
+
+        for language, indexes in groups.items():
+            mel = torch.stack([items[i]["mel"] for i in indexes])
+            options = whisper.DecodingOptions(language=language, fp16=False, without_timestamps=True)
+            for i, decoded in zip(indexes, whisper.decode(model, mel, options)):
+                results[i] = decoded
+        return results
+
+    return decode
+
+
+_batchers: Dict[str, MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_whisper_batcher(model_key: str, model) -> MicroBatcher:
+    """Return the shared batcher for a cached Whisper model, creating it on first use."""
+    with _batchers_lock:
+        if model_key not in _batchers:
+            _batchers[model_key] = MicroBatcher(
+                _whisper_decode_fn(model), name=f"whisper-batcher-{model_key}"
+            )
+        return _batchers[model_key]
+
+
+@model_cache.on_evict
+def close_evicted_batcher(model_key: str, model):
+    """Close the batcher of an evicted model so the model can be freed."""
+    with _batchers_lock:
+        batcher = _batchers.pop(model_key, None)
+    if batcher is not None:
+        batcher.close()
+        logger.info(f"Closed batcher of evicted model {model_key}")
+
+
+def transcribe_batched(model, model_key: str, audio, language: Optional[str] = None) -> dict:
+    """
+    Transcribe a 16 kHz mono float32 array through the shared batcher.
+
+    Each 30 second window becomes one segment. Returns the same
+    text/language/segments/duration structure as model.transcribe().
+
+    Raises:
+        BatcherClosed: If the model was evicted while this call was submitting
+    """
+    import whisper
+
+    batcher = get_whisper_batcher(model_key, model)
+    duration = len(audio) / SAMPLE_RATE
+
+    futures = []
+    for offset in range(0, max(len(audio), 1), WINDOW_SAMPLES):
+        window = whisper.pad_or_trim(audio[offset:offset + WINDOW_SAMPLES])
+        mel = whisper.log_mel_spectrogram(window, model.dims.n_mels).to(model.device)
+        futures.append((offset, batcher.submit({"mel": mel, "language": language})))
+
+    segments = []
+    detected_language = language
+    for segment_id, (offset, future) in enumerate(futures):
+        decoded = future.result()
+        if detected_language is None:
+            detected_language = decoded.language
+        start = offset / SAMPLE_RATE
+        segments.append({
+            "id": segment_id,
+            "start": start,
+            "end": min(start + WINDOW_SECONDS, duration),
+            "text": decoded.text,
+            "no_speech_prob": decoded.no_speech_prob,
+        })
+
+    return {
+        "text": " ".join(s["text"].strip() for s in segments if s["text"].strip()),
+        "language": detected_language,
+        "segments": segments,
+        "duration": duration,
+    }
@@ -0,0 +1,157 @@
+"""Per-stage timing and resource accounting for pipeline runs.
+
+Wrap each pipeline stage in a span:
+
+    stages = StageRecorder(job_id)
+    with stages.stage("asr", audio_seconds=duration):
+        ...
+    metadata["stages"] = stages.as_dict()
+
+A span records wall time, CPU time, peak RSS, bytes read and written, and
+the real-time factor (audio seconds divided by wall seconds). CPU time and
+I/O include child processes that finished during the span, such as
+ffmpeg. Peak RSS is the high-water mark of the process so far, so a stage
+that raises it is the one that needed the memory.
+
+Completed spans are also passed to every function in STAGE_OBSERVERS,
+which is how they are exported as metrics.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Called with (span) for every completed span
+STAGE_OBSERVERS: List[Callable[["StageSpan"], None]] = []
+
+
+@dataclass
+class StageSpan:
+    """Measurements of one pipeline stage."""
+
+    name: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    read_bytes: Optional[int] = None
+    write_bytes: Optional[int] = None
+    audio_seconds: Optional[float] = None
+
+    @property
+    def real_time_factor(self) -> Optional[float]:
+        """Audio seconds processed per wall second (above 1 is faster than real time)."""
+        if not self.audio_seconds or not self.wall_seconds:
+            return None
+        return self.audio_seconds / self.wall_seconds
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        del data["name"]
+        data["real_time_factor"] = self.real_time_factor
+        return {key: round(value, 4) if isinstance(value, float) else value for key, value in data.items()}
+
+
+def _snapshot() -> dict:
+    """Current process (and reaped children) resource counters."""
+    snapshot = {"wall": time.perf_counter(), "cpu": time.process_time()}
+    if resource is not None:
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        snapshot["cpu"] += children.ru_utime + children.ru_stime
+        # ru_maxrss is in KB on Linux; block counts are 512-byte units
+        snapshot["rss_mb"] = max(own.ru_maxrss, children.ru_maxrss) / 1024
+        snapshot["read"] = (own.ru_inblock + children.ru_inblock) * 512
+        snapshot["write"] = (own.ru_oublock + children.ru_oublock) * 512
+    return snapshot
+
+
+class StageRecorder:
+    """Collects the spans of one pipeline run."""
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.spans: List[StageSpan] = []
+
+    @contextmanager
+    def stage(self, name: str, audio_seconds: Optional[float] = None):
+        """
+        Measure the enclosed block as stage name.
+
+        The yielded span's audio_seconds can be set inside the block once the
+        audio length is known. The span is recorded even if the block raises.
+        """
+        span = StageSpan(name=name, audio_seconds=audio_seconds)
+        start = _snapshot()
+        try:
+            yield span
+        finally:
+            end = _snapshot()
+            span.wall_seconds = end["wall"] - start["wall"]
+            span.cpu_seconds = end["cpu"] - start["cpu"]
+            if "rss_mb" in end:
+                span.peak_rss_mb = end["rss_mb"]
+                span.read_bytes = end["read"] - start["read"]
+                span.write_bytes = end["write"] - start["write"]
+            self.spans.append(span)
+            self._notify(span)
+
+    def _notify(self, span: StageSpan):
+        for observer in STAGE_OBSERVERS:
+            try:
+                observer(span)
+            except Exception as e:
+                logger.warning(f"Stage observer failed for {span.name}: {str(e)}")
+
+    def as_dict(self) -> Dict[str, dict]:
+        """
+        Spans by stage name, in the order stages first ran.
+
+        A stage that ran more than once is summed (peak RSS is the maximum).
+        """
+        merged: Dict[str, StageSpan] = {}
+        for span in self.spans:
+            total = merged.setdefault(span.name, StageSpan(name=span.name))
+            merge_span(total, span)
+        return {name: span.as_dict() for name, span in merged.items()}
+
+    def summary(self) -> str:
+        """One-line summary for logs, e.g. 'extract=1.2s asr=30.5s (RTF 9.8)'."""
+        parts = []
+        for name, stats in self.as_dict().items():
+            part = f"{name}={stats['wall_seconds']:.1f}s"
+            if stats["real_time_factor"]:
+                part += f" (RTF {stats['real_time_factor']:.1f})"
+            parts.append(part)
+        return " ".join(parts)
+
+
+def merge_span(total: StageSpan, span: StageSpan):
+    """Add span's measurements to total in place."""
+    total.wall_seconds += span.wall_seconds
+    total.cpu_seconds += span.cpu_seconds
+    if span.peak_rss_mb is not None:
+        total.peak_rss_mb = max(total.peak_rss_mb or 0.0, span.peak_rss_mb)
+    for field in ("read_bytes", "write_bytes", "audio_seconds"):
+        value = getattr(span, field)
+        if value is not None:
+            setattr(total, field, (getattr(total, field) or 0) + value)
+
+
+def merge_stage_dicts(stage_dicts: List[Dict[str, dict]]) -> Dict[str, dict]:
+    """Combine as_dict() results of several runs (e.g. the pieces of a chunked job)."""
+    recorder = StageRecorder()
+    for stages in stage_dicts:
+        for name, stats in stages.items():
+            recorder.spans.append(StageSpan(
+                name=name,
+                **{key: value for key, value in stats.items() if key != "real_time_factor"},
+            ))
+    return recorder.as_dict()
@@ -0,0 +1,213 @@
+"""Structured logging for the API and the workers.
+
+configure_logging() replaces the root handlers with a QueueHandler. Request
+threads and tasks only put records on an in-memory queue. A QueueListener
+thread formats them and writes them to stderr, so slow log I/O never blocks
+a request.
+
+Every record gets the request_id (API) or job_id (workers) of the work that
+logged it, from context variables. With LOG_FORMAT=json, each record is one
+JSON object per line and carries any `extra=` fields. LOG_FORMAT=text gives
+readable lines for local development.
+
+High-volume loggers can be sampled below WARNING: LOG_SAMPLE_RATES is a list
+like `uvicorn.access=0.1,app.workers=0.5`, where each rate is the fraction
+of records kept for that logger and its children. Warnings and errors are
+always kept.
+
+Message arguments are merged only for records that pass the level and the
+sampling, so hot paths should log with %-style arguments
+(`logger.debug("chunk %d/%d", i, n)`) rather than f-strings.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()
+# Records kept per logger prefix (0-1) below WARNING, e.g. uvicorn.access=0.1
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+job_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("job_id", default=None)
+
+# Attributes every LogRecord has (plus uvicorn's ANSI copy of the message); anything else came from `extra=`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "color_message"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+_configured_pid: Optional[int] = None
+
+
+def _parse_rates(value: str) -> Dict[str, float]:
+    """Parse 'uvicorn.access=0.1,app.workers=0.5' into a dict."""
+    rates = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class ContextFilter(logging.Filter):
+    """Stamp records with the current request and job IDs (runs in the thread that logged)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.job_id = job_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fixed fraction of sub-WARNING records per configured logger prefix."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so app.workers.x matches app.workers before app
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self.counts = defaultdict(int)
+
+    def rate_for(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        # Deterministic: exactly rate of the records, evenly spaced
+        self.counts[record.name] += 1
+        count = self.counts[record.name]
+        return int(count * rate) != int((count - 1) * rate)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable lines with the correlation IDs appended when set."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        ids = [f"{key}={getattr(record, key)}" for key in ("request_id", "job_id") if getattr(record, key, None)]
+        return f"{line} [{' '.join(ids)}]" if ids else line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now (they may be mutated later) but do not format
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def make_formatter(fmt: str = LOG_FORMAT) -> logging.Formatter:
+    return JSONFormatter() if fmt == "json" else TextFormatter()
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, sample_rates: str = LOG_SAMPLE_RATES):
+    """
+    Route all logging through a queue to a background writer.
+
+    Safe to call more than once: while the writer runs it does nothing, except
+    in a new process (e.g. a forked Celery child, whose copy of the writer
+    thread is not running).
+    """
+    global _listener, _queue_handler, _configured_pid
+    if _listener is not None and _configured_pid == os.getpid():
+        return
+    if _configured_pid is None:
+        atexit.register(shutdown_logging)
+
+    output = logging.StreamHandler()
+    output.setFormatter(make_formatter(fmt))
+    log_queue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(_parse_rates(sample_rates)))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    # Send uvicorn's own loggers (including per-request access lines) through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        server_logger = logging.getLogger(name)
+        server_logger.handlers = []
+        server_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = handler
+    _configured_pid = os.getpid()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread; later records are written directly."""
+    global _listener, _queue_handler
+    if _listener is None or _configured_pid != os.getpid():
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for output in _listener.handlers:
+        root.addHandler(output)
+    _listener = None
+    _queue_handler = None
+
+
+def bind_job(job_id: Optional[str]) -> contextvars.Token:
+    """Set the job ID for records logged in the current context."""
+    return job_id_var.set(job_id)
+
+
+async def request_context_middleware(request, call_next):
+    """Tag the request's log records with its X-Request-ID (generated if absent) and echo it back."""
+    request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers[REQUEST_ID_HEADER] = request_id
+    return response
@@ -1,12 +1,15 @@
+import logging
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.database import Base, engine, get_db
+from app.core.database import get_db, init_db
 from app.core.security import (
-    get_password_hash, create_verification_token, decode_token, 
-    verify_password, create_access_token, is_verification_token
+    get_password_hash_async, create_verification_token, decode_token,
+    verify_and_update_password_async, create_access_token, is_verification_token
 )
 from app.models import User
 from app.schemas.auth import SignupPayload, LoginPayload, TokenResponse, UserOut
@@ -15,18 +18,38 @@ from app.routes.billing import router as billing_router
 from app.upload_routes import router as upload_router
 from app.sse_routes import router as sse_router
 from app.auth_routes import router as auth_router
+from app.metrics import metrics_middleware, router as metrics_router
+from app import logging_config, profiling
 
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Octavia Backend")
 
-# Initialize database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Initialize logging and database tables at startup so importing the app stays side-effect free
+    logging_config.configure_logging()
+    init_db()
+    yield
+    logging_config.shutdown_logging()
+
+
+app = FastAPI(title="Octavia Backend", lifespan=lifespan)
 
 # IMPORTANT: Include auth_router FIRST so /api/v1/auth/me is registered
 app.include_router(auth_router)
 app.include_router(billing_router)
 app.include_router(upload_router)
 app.include_router(sse_router)
+app.include_router(metrics_router)
+app.include_router(profiling.router)
+
+# Per-route latency histograms; added before CORS so CORS stays the outermost middleware
+app.middleware("http")(metrics_middleware)
+# Admin-only per-request profiling (X-Profile header); not installed at all unless enabled
+if profiling.ENABLE_PROFILING:
+    app.middleware("http")(profiling.profile_middleware)
+# Outermost of the HTTP middlewares so every log record of a request carries its ID
+app.middleware("http")(logging_config.request_context_middleware)
 
 frontend = os.environ.get("NEXT_PUBLIC_APP_URL", "http://localhost:3000")
 
@@ -54,15 +77,28 @@ def root():
     }
 
 
+def find_user_by_email(db_session: Session, email: str):
+    return db_session.query(User).filter(User.email == email).first()
+
+
+# signup and login are async so the password hash is awaited on its own bounded
+# executor without holding a request threadpool thread; their database work
+# runs in the threadpool like any sync handler's.
 @app.post("/signup")
-def signup(payload: SignupPayload, db_session: Session = Depends(get_db)):
-    existing = db_session.query(User).filter(User.email == payload.email).first()
+async def signup(payload: SignupPayload, db_session: Session = Depends(get_db)):
+    existing = await run_in_threadpool(find_user_by_email, db_session, payload.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
+    # Hash on the bounded password executor; sheds load with 503 when saturated
+    password_hash = await get_password_hash_async(payload.password)
+    return await run_in_threadpool(create_user, db_session, payload, password_hash)
+
+
+def create_user(db_session: Session, payload: SignupPayload, password_hash: str) -> dict:
     user = User(
         email=payload.email,
-        password_hash=get_password_hash(payload.password),
+        password_hash=password_hash,
         is_verified=False,
     )
     db_session.add(user)
@@ -81,7 +117,7 @@ def signup(payload: SignupPayload, db_session: Session = Depends(get_db)):
     if os.environ.get("AUTO_VERIFY_DEV", "true").lower() == "true":
         user.is_verified = True
         db_session.commit()
-        print(f"🔧 DEV MODE: Auto-verified user {user.email}")
+        logger.info("DEV MODE: auto-verified user %s", user.id)
 
     user_out = UserOut.model_validate(user)
     
@@ -113,31 +149,40 @@ def verify(token: str, db_session: Session = Depends(get_db)):
     return {"status": "verified"}
 
 
+def store_password_hash(db_session: Session, user: User, password_hash: str):
+    user.password_hash = password_hash
+    db_session.commit()
+
+
 @app.post("/login", response_model=TokenResponse)
-def login(payload: LoginPayload, response: Response, db_session: Session = Depends(get_db)):
-    print(f"🔐 Login attempt for: {payload.email}")  # Debug log
-    
-    user = db_session.query(User).filter(User.email == payload.email).first()
+async def login(payload: LoginPayload, response: Response, db_session: Session = Depends(get_db)):
+    user = await run_in_threadpool(find_user_by_email, db_session, payload.email)
     if not user:
-        print(f"❌ User not found: {payload.email}")  # Debug log
+        logger.info("Login failed: unknown email")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Invalid credentials"
         )
     
-    if not verify_password(payload.password, user.password_hash):
-        print(f"❌ Invalid password for: {payload.email}")  # Debug log
+    user_id = str(user.id)
+    valid, new_hash = await verify_and_update_password_async(payload.password, user.password_hash)
+    if not valid:
+        logger.info("Login failed: wrong password for user %s", user_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Invalid credentials"
         )
 
+    # Transparently upgrade hashes created with older cost parameters
+    if new_hash:
+        await run_in_threadpool(store_password_hash, db_session, user, new_hash)
+
     # For local dev: skip email verification check (remove or comment out for production)
     # if not user.is_verified:
     #     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email not verified")
 
-    token = create_access_token({"sub": str(user.id), "type": "access"})
-    print(f"✅ Login successful for: {payload.email}, user_id: {user.id}")  # Debug log
+    token = create_access_token({"sub": user_id, "type": "access"})
+    logger.info("Login succeeded for user %s", user_id)
 
     # Set token in an HttpOnly cookie so SSR requests can read it.
     secure_cookie = os.environ.get("OCTAVIA_SECURE_COOKIES", "false").lower() in ("1", "true", "yes")
@@ -155,8 +200,6 @@ def login(payload: LoginPayload, response: Response, db_session: Session = Depen
         max_age=60 * 60 * 24 * 7,  # 7 days
     )
 
-    print(f"🍪 Cookie set: {cookie_name}, SameSite={samesite_setting}")  # Debug log
-
     # Also return token in JSON for JS clients that still want to use it client-side
     return {"access_token": token}
 
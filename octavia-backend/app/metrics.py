@@ -0,0 +1,246 @@
+"""Prometheus metrics for the API and the Celery workers.
+
+The API serves GET /metrics. A worker serves its own metrics on
+WORKER_METRICS_PORT when that is set. Both can be scraped with curl, so no
+Prometheus server is needed to check them.
+
+Celery's prefork children and multi-process uvicorn each keep their own
+counters. If PROMETHEUS_MULTIPROC_DIR points to a shared, empty directory
+(one per host, cleared on deploy), every process writes its samples there
+and a scrape aggregates all of them. Without it, each process reports only
+its own metrics.
+
+Metrics:
+    http_request_duration_seconds   API latency per route template, method and status
+    sse_connections                 Open job progress streams
+    celery_queue_depth              Messages waiting per queue (read from the broker at scrape time)
+    celery_task_duration_seconds    Task run time per job type and outcome
+    model_cache_lookups_total       Model cache hits and misses per model
+    pipeline_stage_duration_seconds Pipeline stage wall time (see instrumentation.py)
+    pipeline_stage_cpu_seconds_total / pipeline_stage_audio_seconds_total
+    db_pool_connections             Checked-out, idle and overflow connections per engine
+"""
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+
+METRICS_QUEUE_DEPTH = os.environ.get("METRICS_QUEUE_DEPTH", "true").lower() in ("1", "true", "yes")
+# Broker reads are cached so frequent scrapes and job routing do not hammer the broker
+METRICS_QUEUE_DEPTH_TTL = float(os.environ.get("METRICS_QUEUE_DEPTH_TTL", 15))
+
+# Job work ranges from sub-second translations to long video runs
+JOB_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, float("inf"))
+
+# Job types of the Celery tasks, used as the task duration label
+TASK_JOB_TYPES = {
+    "app.celery_tasks.process_transcription": "transcribe",
+    "app.celery_tasks.process_translation": "translate",
+    "app.celery_tasks.process_synthesis": "synthesize",
+    "app.celery_tasks.process_video_translation": "video_translate",
+    "app.celery_tasks.process_video_piece": "video_translate_piece",
+    "app.celery_tasks.finalize_video_pieces": "video_translate_finalize",
+    "app.celery_tasks.process_audio_translation": "audio_translate",
+}
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "API request latency until the response starts",
+    ["method", "route", "status"],
+)
+SSE_CONNECTIONS = Gauge(
+    "sse_connections",
+    "Open job progress streams",
+    multiprocess_mode="livesum",
+)
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time",
+    ["job_type", "status"],
+    buckets=JOB_BUCKETS,
+)
+MODEL_CACHE_LOOKUPS = Counter(
+    "model_cache_lookups_total",
+    "Model cache lookups",
+    ["model", "result"],
+)
+STAGE_DURATION = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Pipeline stage wall time",
+    ["stage"],
+    buckets=JOB_BUCKETS,
+)
+STAGE_CPU_SECONDS = Counter(
+    "pipeline_stage_cpu_seconds_total",
+    "CPU time spent in pipeline stages (including child processes)",
+    ["stage"],
+)
+STAGE_AUDIO_SECONDS = Counter(
+    "pipeline_stage_audio_seconds_total",
+    "Audio processed by pipeline stages; divide by stage duration for the real-time factor",
+    ["stage"],
+)
+
+router = APIRouter(tags=["metrics"])
+
+_registry: Optional[CollectorRegistry] = None
+_task_started = {}
+_queue_depth_cache = {"time": 0.0, "depths": {}}
+_queue_depth_lock = threading.Lock()
+
+
+def record_stage(span: "instrumentation.StageSpan"):
+    """Export a completed pipeline stage span."""
+    STAGE_DURATION.labels(stage=span.name).observe(span.wall_seconds)
+    STAGE_CPU_SECONDS.labels(stage=span.name).inc(max(span.cpu_seconds, 0.0))
+    if span.audio_seconds:
+        STAGE_AUDIO_SECONDS.labels(stage=span.name).inc(span.audio_seconds)
+
+
+instrumentation.STAGE_OBSERVERS.append(record_stage)
+
+
+def record_model_lookup(model_key: str, hit: bool):
+    MODEL_CACHE_LOOKUPS.labels(model=model_key, result="hit" if hit else "miss").inc()
+
+
+def task_started(task_id: str):
+    _task_started[task_id] = time.monotonic()
+
+
+def task_finished(task_id: str, task_name: str, status: str):
+    started = _task_started.pop(task_id, None)
+    if started is None:
+        return
+    job_type = TASK_JOB_TYPES.get(task_name, task_name.rsplit(".", 1)[-1])
+    CELERY_TASK_DURATION.labels(job_type=job_type, status=status.lower()).observe(time.monotonic() - started)
+
+
+def queue_depths() -> dict:
+    """
+    Messages waiting in each priority and model queue (None where unknown).
+
+    The broker is read at most once per METRICS_QUEUE_DEPTH_TTL per process;
+    scrapes and job routing share the result.
+    """
+    from .task_routing import MODEL_AFFINITY_QUEUES, PRIORITY_QUEUES, queue_depth
+
+    with _queue_depth_lock:
+        if time.monotonic() - _queue_depth_cache["time"] > METRICS_QUEUE_DEPTH_TTL:
+            _queue_depth_cache["depths"] = {
+                queue: queue_depth(queue) for queue in list(PRIORITY_QUEUES) + sorted(MODEL_AFFINITY_QUEUES)
+            }
+            _queue_depth_cache["time"] = time.monotonic()
+        return _queue_depth_cache["depths"]
+
+
+class QueueDepthCollector:
+    """Reads broker queue depths when scraped (cached for METRICS_QUEUE_DEPTH_TTL)."""
+
+    def collect(self):
+        gauge = GaugeMetricFamily("celery_queue_depth", "Messages waiting in a Celery queue", labels=["queue"])
+        for queue, depth in queue_depths().items():
+            if depth is not None:
+                gauge.add_metric([queue], depth)
+        yield gauge
+
+
+class DBPoolCollector:
+    """Reports connection pool usage of the database engines."""
+
+    def collect(self):
+        from .core import database as core_database
+        from . import db as app_db
+
+        gauge = GaugeMetricFamily(
+            "db_pool_connections", "Database pool connections by state", labels=["engine", "state"]
+        )
+        for name, engine in (("core", core_database.engine), ("app", app_db.engine)):
+            pool = engine.pool
+            for state, reader in (("checked_out", "checkedout"), ("idle", "checkedin"),
+                                  ("overflow", "overflow"), ("size", "size")):
+                if hasattr(pool, reader):
+                    gauge.add_metric([name, state], max(getattr(pool, reader)(), 0))
+        yield gauge
+
+
+def get_registry() -> CollectorRegistry:
+    """Registry to scrape: all processes' samples in multiprocess mode, plus the live collectors."""
+    global _registry
+    if _registry is None:
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        if METRICS_QUEUE_DEPTH:
+            registry.register(QueueDepthCollector())
+        registry.register(DBPoolCollector())
+        _registry = registry
+    return _registry
+
+
+def route_label(request: Request) -> str:
+    """Route template (e.g. /api/v1/jobs/{job_id}/stream) so job IDs do not become labels."""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Time every API request by route template."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_DURATION.labels(
+            method=request.method, route=route_label(request), status=str(status)
+        ).observe(time.perf_counter() - start)
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(generate_latest(get_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+def start_worker_metrics_server(port: Optional[int] = None) -> bool:
+    """
+    Serve this worker's metrics over HTTP (called in the worker's main process).
+
+    Returns:
+        True if a server was started (WORKER_METRICS_PORT or port is set)
+    """
+    port = port or int(os.environ.get("WORKER_METRICS_PORT") or 0)
+    if not port:
+        return False
+    start_http_server(port, registry=get_registry())
+    logger.info(f"Worker metrics on :{port}/metrics")
+    return True
+
+
+def mark_process_dead(pid: int):
+    """Drop a finished process's live gauges from the multiprocess directory."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,110 @@
+"""Per-process cache for loaded ML models.
+
+Worker processes keep recently used models in memory so consecutive jobs
+for the same model skip the load. Combined with model-affinity routing
+(see task_routing.py) this keeps each worker's models warm.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of models held per worker process
+MODEL_CACHE_SIZE = int(os.environ.get("MODEL_CACHE_SIZE", 2))
+
+_models: "OrderedDict[str, Any]" = OrderedDict()
+_lock = threading.Lock()
+# One lock per model being loaded, so a slow load does not block lookups of other models
+_loading: Dict[str, threading.Lock] = {}
+# Called with (model_key, model) after a model leaves the cache
+_eviction_listeners: List[Callable[[str, Any], None]] = []
+
+
+def on_evict(listener: Callable[[str, Any], None]) -> Callable[[str, Any], None]:
+    """Register a listener that releases whatever else holds an evicted model (usable as a decorator)."""
+    _eviction_listeners.append(listener)
+    return listener
+
+
+def _notify_evicted(evicted: list):
+    for model_key, model in evicted:
+        for listener in _eviction_listeners:
+            try:
+                listener(model_key, model)
+            except Exception as e:
+                logger.warning(f"Eviction listener for {model_key} failed: {e}")
+
+
+def get_model(model_key: str, loader: Callable[[], Any]) -> Any:
+    """
+    Return the cached model for model_key, loading it with loader() on a miss.
+
+    Args:
+        model_key: Routing key of the model (e.g. 'asr.whisper.base', 'mt.en-es')
+        loader: Zero-argument callable that loads the model
+
+    Returns:
+        Loaded model object
+    """
+    with _lock:
+        if model_key in _models:
+            _models.move_to_end(model_key)
+            metrics.record_model_lookup(model_key, hit=True)
+            return _models[model_key]
+        load_lock = _loading.setdefault(model_key, threading.Lock())
+
+    evicted = []
+    with load_lock:
+        with _lock:
+            # Another thread may have loaded it while this one waited
+            if model_key in _models:
+                _models.move_to_end(model_key)
+                metrics.record_model_lookup(model_key, hit=True)
+                return _models[model_key]
+
+        metrics.record_model_lookup(model_key, hit=False)
+        logger.info(f"Model cache miss for {model_key}, loading")
+        try:
+            model = loader()
+        except BaseException:
+            with _lock:
+                _loading.pop(model_key, None)
+            raise
+        with _lock:
+            _loading.pop(model_key, None)
+            _models[model_key] = model
+            while len(_models) > MODEL_CACHE_SIZE:
+                evicted.append(_models.popitem(last=False))
+                logger.info(f"Evicted {evicted[-1][0]} from model cache")
+    _notify_evicted(evicted)
+    return model
+
+
+def put(model_key: str, model: Any):
+    """Place a model in the cache directly (e.g. a stub for benchmarks or tests)."""
+    with _lock:
+        _models[model_key] = model
+        _models.move_to_end(model_key)
+
+
+def is_cached(model_key: str) -> bool:
+    """Check whether a model is currently held by this process."""
+    return model_key in _models
+
+
+def cached_model_keys() -> list:
+    """List model keys held by this process, least recently used first."""
+    return list(_models.keys())
+
+
+def clear():
+    """Drop all cached models."""
+    with _lock:
+        evicted = list(_models.items())
+        _models.clear()
+    _notify_evicted(evicted)
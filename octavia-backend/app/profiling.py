@@ -0,0 +1,268 @@
+"""On-demand profiling of single jobs and single API requests.
+
+Both are off unless ENABLE_PROFILING is set on the process. When it is off,
+the task decorator returns the task unchanged and main.py does not install
+the middleware, so there is no overhead at all.
+
+Jobs:
+    A job is profiled when its job_metadata has "profile": true (an admin sets
+    it with POST /api/v1/jobs/{job_id}/profile before processing), or when its
+    job type is listed in the worker's PROFILE_JOB_TYPES. The task runs under
+    cProfile and writes <task>.prof (open with snakeviz, or flameprof for a
+    flamegraph) and <task>.txt (top functions by cumulative time) to
+    profiles/<job_id>/ next to the job's input and outputs. The directory is
+    recorded as "profile_dir" in the job metadata.
+
+Requests:
+    An admin sends `X-Profile: 1` with a request. Sync routes run in
+    Starlette's threadpool, where an event-loop cProfile cannot see them. So
+    the request is sampled instead: every PROFILE_SAMPLE_INTERVAL seconds,
+    until the response starts, the stacks of all busy threads are recorded.
+    The collapsed stacks (flamegraph.pl / speedscope format) are written to
+    PROFILE_DIR, and the path is returned in the X-Profile-Artifact header.
+"""
+import cProfile
+import functools
+import inspect
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from . import db, models
+from .storage import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+ENABLE_PROFILING = os.environ.get("ENABLE_PROFILING", "false").lower() in ("1", "true", "yes")
+# Job types profiled on this worker without a per-job flag, e.g. video_translate (or "all")
+PROFILE_JOB_TYPES = {t.strip() for t in os.environ.get("PROFILE_JOB_TYPES", "").split(",") if t.strip()}
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR") or UPLOAD_DIR / "profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", 0.005))
+PROFILE_HEADER = "X-Profile"
+
+# Leaf frames of threads that are waiting, not working (idle pool threads, the event loop)
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+router = APIRouter(prefix="/api/v1", tags=["profiling"])
+
+
+def _job_options(job_id: str) -> dict:
+    """The job's metadata, or {} if it has none."""
+    from .core.database import SessionLocal
+    from .job_model import Job
+
+    session = SessionLocal()
+    try:
+        job = session.query(Job).filter(Job.id == job_id).first()
+        return json.loads(job.job_metadata) if job and job.job_metadata else {}
+    finally:
+        session.close()
+
+
+def _record_profile_dir(job_id: str, directory: Path):
+    """Add profile_dir to the job's metadata (the task may have rewritten it meanwhile)."""
+    from .core.database import SessionLocal
+    from .job_model import Job
+
+    session = SessionLocal()
+    try:
+        job = session.query(Job).filter(Job.id == job_id).first()
+        if job:
+            options = json.loads(job.job_metadata) if job.job_metadata else {}
+            options["profile_dir"] = directory.as_posix()
+            job.job_metadata = json.dumps(options)
+            session.commit()
+    finally:
+        session.close()
+
+
+def job_profile_dir(job_id: str, input_file_path: Optional[str]) -> Path:
+    """profiles/<job_id> next to the job's input (where outputs are written), else under PROFILE_DIR."""
+    if input_file_path:
+        for parent in (Path(input_file_path).parent, UPLOAD_DIR / Path(input_file_path).parent):
+            if parent.is_dir():
+                return parent / "profiles" / job_id
+    return PROFILE_DIR / job_id
+
+
+def write_job_profile(profiler: cProfile.Profile, directory: Path, name: str) -> Path:
+    """Write <name>.prof and a <name>.txt summary of the top functions by cumulative time."""
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(directory / f"{name}.prof"))
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+    (directory / f"{name}.txt").write_text(summary.getvalue(), encoding="utf-8")
+    return directory / f"{name}.prof"
+
+
+def profiled(job_type: str):
+    """
+    Decorate a task so flagged jobs run under cProfile.
+
+    Returns the task unchanged when ENABLE_PROFILING is off. The task must take
+    job_id, and may take input_file_path (used to place the artifacts).
+    """
+    def decorator(fn):
+        if not ENABLE_PROFILING:
+            return fn
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs).arguments
+            job_id = arguments["job_id"]
+            wanted = job_type in PROFILE_JOB_TYPES or "all" in PROFILE_JOB_TYPES
+            if not wanted:
+                try:
+                    wanted = bool(_job_options(job_id).get("profile"))
+                except Exception as e:
+                    logger.warning(f"Job {job_id}: could not read profiling flag: {str(e)}")
+            if not wanted:
+                return fn(*args, **kwargs)
+
+            name = fn.__name__
+            if isinstance(arguments.get("piece"), dict):
+                name = f"{name}_{arguments['piece'].get('index', 0):04d}"
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.disable()
+                try:
+                    directory = job_profile_dir(job_id, arguments.get("input_file_path"))
+                    path = write_job_profile(profiler, directory, name)
+                    _record_profile_dir(job_id, directory)
+                    logger.info(f"Job {job_id}: profile written to {path}")
+                except Exception as e:
+                    logger.warning(f"Job {job_id}: could not save profile: {str(e)}")
+
+        return wrapper
+
+    return decorator
+
+
+class StackSampler:
+    """Samples the stacks of all busy threads from a background thread."""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                code = frame.f_code
+                if (Path(code.co_filename).name, code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{Path(frame.f_code.co_filename).name}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format: 'root;...;leaf count' per line."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def is_admin(request: Request) -> bool:
+    """True if the request's bearer token belongs to a user with role 'admin'."""
+    from .core import security
+
+    try:
+        token = security.extract_token_from_request(
+            authorization=request.headers.get("Authorization"), cookies=request.cookies
+        )
+    except HTTPException:
+        return False
+    payload = security.decode_token(token) if token else None
+    if not payload or not payload.get("sub"):
+        return False
+    session = db.SessionLocal()
+    try:
+        user = session.query(models.User).filter(models.User.id == str(payload["sub"])).first()
+        return bool(user and user.role == "admin")
+    finally:
+        session.close()
+
+
+async def profile_middleware(request: Request, call_next):
+    """Sample one request when an admin sends the X-Profile header (installed only with ENABLE_PROFILING)."""
+    if not request.headers.get(PROFILE_HEADER) or not is_admin(request):
+        return await call_next(request)
+
+    sampler = StackSampler()
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        sampler.stop()
+    elapsed = time.perf_counter() - start
+
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"request_{time.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}.collapsed"
+    path.write_text(sampler.collapsed(), encoding="utf-8")
+    logger.info(f"Profiled {request.method} {request.url.path} ({elapsed:.3f}s, {sampler.samples} samples): {path}")
+
+    response.headers["X-Profile-Artifact"] = path.as_posix()
+    response.headers["X-Profile-Seconds"] = f"{elapsed:.3f}"
+    response.headers["X-Profile-Samples"] = str(sampler.samples)
+    return response
+
+
+def require_admin(request: Request) -> str:
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin only")
+    return "admin"
+
+
+@router.post("/jobs/{job_id}/profile")
+def flag_job_for_profiling(
+    job_id: str,
+    _: str = Depends(require_admin),
+    db_session: Session = Depends(db.get_db),
+):
+    """Profile the job's next run (takes effect on workers with ENABLE_PROFILING)."""
+    from .job_model import Job
+
+    job = db_session.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    options = json.loads(job.job_metadata) if job.job_metadata else {}
+    options["profile"] = True
+    job.job_metadata = json.dumps(options)
+    db_session.commit()
+    return {"job_id": job_id, "profile": True}
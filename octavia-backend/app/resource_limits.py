@@ -0,0 +1,302 @@
+"""Per-resource admission control for worker processes.
+
+Celery's concurrency setting only counts tasks. It cannot tell that two
+`large` Whisper jobs plus an ffmpeg mux oversubscribe a node's cores and
+RAM. Each job type therefore declares what it needs: CPU threads and RAM,
+with the RAM sized by model_size. A job waits until its share fits in the
+node's budget, so a node runs as many jobs as fit, not a fixed number.
+ffmpeg processes are limited separately, by FFMPEG_SLOTS.
+
+The pools are created by init_pools() in the worker's main process
+(worker_init), before it forks, so every child shares them. Processes that
+never call it, such as the API, get process-local pools on first use.
+Holders are recorded by PID and process start time, so units held by a
+child that dies (for example, killed at the task hard time limit) are
+reclaimed by the next waiter, even if its PID has been reused.
+"""
+import functools
+import inspect
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _physical_memory_mb() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return 8192
+
+
+def _parse_sizes(value: str) -> Dict[str, int]:
+    """Parse 'large=8000,medium=4000' into a dict."""
+    sizes = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, mb = item.split("=", 1)
+            sizes[name.strip()] = int(mb)
+    return sizes
+
+
+WORKER_CPU_THREADS = int(os.environ.get("WORKER_CPU_THREADS") or os.cpu_count() or 1)
+WORKER_RAM_BUDGET_MB = int(os.environ.get("WORKER_RAM_BUDGET_MB") or _physical_memory_mb() * 0.8)
+FFMPEG_SLOTS = int(os.environ.get("FFMPEG_SLOTS") or 2)
+
+# Threads one inference job uses; torch, MKL, OpenMP and CTranslate2 are capped to match
+JOB_CPU_THREADS = int(os.environ.get("JOB_CPU_THREADS") or max(1, WORKER_CPU_THREADS // 2))
+
+# Approximate resident memory of a job per Whisper model size (model plus decoding buffers)
+MODEL_RAM_MB = {
+    "tiny": 1000,
+    "base": 1000,
+    "small": 2000,
+    "medium": 5000,
+    "large": 10000,
+    **_parse_sizes(os.environ.get("MODEL_RAM_MB", "")),
+}
+MT_RAM_MB = int(os.environ.get("MT_RAM_MB", 1500))
+TTS_RAM_MB = int(os.environ.get("TTS_RAM_MB", 500))
+
+# Holder table size per pool; bounds how many reservations can be open at once
+_MAX_HOLDERS = 128
+# Holder entry: pid, process start time, units
+_HOLDER_FIELDS = 3
+
+
+def process_start_time(pid: int) -> Optional[int]:
+    """
+    Start time of a process in clock ticks since boot, from /proc/<pid>/stat.
+
+    Returns:
+        The start time, 0 where /proc is not available, or None if the process is gone
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as stat:
+            # Fields after the parenthesized command name; starttime is field 22
+            return int(stat.read().rsplit(b")", 1)[1].split()[19])
+    except FileNotFoundError:
+        return None if os.path.isdir("/proc/self") else 0
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+_own_start = (0, 0)  # (pid, start time) of this process, refreshed after a fork
+
+
+def _own_start_time() -> int:
+    global _own_start
+    pid = os.getpid()
+    if _own_start[0] != pid:
+        _own_start = (pid, process_start_time(pid) or 0)
+    return _own_start[1]
+
+
+def _holder_alive(pid: int, started: int) -> bool:
+    """Whether the process that took a reservation is still running (and is not a reused PID)."""
+    if started:
+        return process_start_time(pid) == started
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class ResourcePool:
+    """
+    Counting semaphore over units of one resource, shared by forked processes.
+
+    Holders are recorded by PID and start time, so units held by a process
+    that died are returned to the pool instead of leaking, even when a new
+    process has been given the same PID.
+    """
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = max(1, int(capacity))
+        self._cond = multiprocessing.Condition()
+        # Flat (pid, start time, units) triples; pid 0 marks a free slot
+        self._holders = multiprocessing.Array('q', _HOLDER_FIELDS * _MAX_HOLDERS, lock=False)
+
+    def _in_use(self) -> int:
+        """Units held by live processes; reclaims entries of dead ones (caller holds the lock)."""
+        used = 0
+        for slot in range(0, len(self._holders), _HOLDER_FIELDS):
+            pid, started, units = self._holders[slot:slot + _HOLDER_FIELDS]
+            if not pid:
+                continue
+            if pid != os.getpid() and not _holder_alive(pid, started):
+                logger.warning(f"Reclaiming {units} {self.name} units from dead process {pid}")
+                self._holders[slot:slot + _HOLDER_FIELDS] = [0] * _HOLDER_FIELDS
+                continue
+            used += units
+        return used
+
+    @property
+    def in_use(self) -> int:
+        with self._cond:
+            return self._in_use()
+
+    def acquire(self, units: int, timeout: Optional[float] = None) -> int:
+        """
+        Wait until units fit in the pool and take them.
+
+        A request larger than the pool is clamped to the whole pool, so an
+        oversized job still runs, just alone.
+
+        Returns:
+            Units actually taken (pass to release())
+
+        Raises:
+            TimeoutError: If the units did not become free within timeout
+        """
+        units = min(max(int(units), 0), self.capacity)
+        if not units:
+            return 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._in_use() + units <= self.capacity:
+                    for slot in range(0, len(self._holders), _HOLDER_FIELDS):
+                        if not self._holders[slot]:
+                            self._holders[slot:slot + _HOLDER_FIELDS] = [os.getpid(), _own_start_time(), units]
+                            return units
+                    raise RuntimeError(f"Too many open {self.name} reservations")
+                if not waited:
+                    logger.info(f"Waiting for {units} {self.name} units ({self._in_use()}/{self.capacity} in use)")
+                    waited = True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"{units} {self.name} units not available within {timeout:.0f}s")
+                # Wake up periodically to reclaim units of holders that died
+                self._cond.wait(1.0 if remaining is None else min(remaining, 1.0))
+
+    def release(self, units: int):
+        if not units:
+            return
+        with self._cond:
+            pid = os.getpid()
+            for slot in range(0, len(self._holders), _HOLDER_FIELDS):
+                if self._holders[slot] == pid and self._holders[slot + 2] == units:
+                    self._holders[slot:slot + _HOLDER_FIELDS] = [0] * _HOLDER_FIELDS
+                    break
+            self._cond.notify_all()
+
+
+cpu_pool: Optional[ResourcePool] = None
+ram_pool: Optional[ResourcePool] = None
+ffmpeg_pool: Optional[ResourcePool] = None
+_init_lock = threading.Lock()
+
+
+def init_pools():
+    """
+    Create the node's pools if this process has none yet.
+
+    Call in the worker's main process before it forks children, so they all
+    share one budget.
+    """
+    global cpu_pool, ram_pool, ffmpeg_pool
+    with _init_lock:
+        if cpu_pool is None:
+            cpu_pool = ResourcePool("cpu-thread", WORKER_CPU_THREADS)
+            ram_pool = ResourcePool("ram-MB", WORKER_RAM_BUDGET_MB)
+            ffmpeg_pool = ResourcePool("ffmpeg", FFMPEG_SLOTS)
+
+
+def job_needs(job_type: str, model_size: Optional[str] = None) -> dict:
+    """
+    Resources a job declares before it runs.
+
+    Args:
+        job_type: Job type ('transcribe', 'translate', 'synthesize', 'video_translate', 'audio_translate')
+        model_size: Whisper model size for jobs that transcribe
+
+    Returns:
+        dict with 'cpu_threads' and 'ram_mb'
+    """
+    if job_type in ("transcribe", "video_translate", "audio_translate"):
+        return {
+            "cpu_threads": JOB_CPU_THREADS,
+            "ram_mb": MODEL_RAM_MB.get(model_size or "base", MODEL_RAM_MB["large"]),
+        }
+    if job_type == "translate":
+        return {"cpu_threads": JOB_CPU_THREADS, "ram_mb": MT_RAM_MB}
+    if job_type == "synthesize":
+        # Synthesis runs in the TTS engine processes; the task itself mostly waits on them
+        return {"cpu_threads": 1, "ram_mb": TTS_RAM_MB}
+    return {"cpu_threads": 0, "ram_mb": 0}
+
+
+@contextmanager
+def reserve(cpu_threads: int = 0, ram_mb: int = 0, timeout: Optional[float] = None):
+    """Hold CPU threads and RAM for the duration of the block."""
+    init_pools()
+    # Always CPU before RAM (and ffmpeg last), so waiters cannot deadlock each other
+    cpu = cpu_pool.acquire(cpu_threads, timeout)
+    try:
+        ram = ram_pool.acquire(ram_mb, timeout)
+        try:
+            yield
+        finally:
+            ram_pool.release(ram)
+    finally:
+        cpu_pool.release(cpu)
+
+
+@contextmanager
+def ffmpeg_slot(timeout: Optional[float] = None):
+    """Hold one of the node's FFMPEG_SLOTS while an ffmpeg process runs."""
+    init_pools()
+    slot = ffmpeg_pool.acquire(1, timeout)
+    try:
+        yield
+    finally:
+        ffmpeg_pool.release(slot)
+
+
+def limited(job_type: str):
+    """
+    Decorate a task so it runs only once its job type's resources are reserved.
+
+    The model size is read from the task's model_size argument, if it has one.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            with reserve(**job_needs(job_type, bound.arguments.get("model_size"))):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def configure_threads(threads: int = JOB_CPU_THREADS):
+    """
+    Cap math-library thread pools at the per-job thread count.
+
+    The environment variables must be set before torch or numpy are first
+    imported, so call this in the worker's main process (worker_init) and
+again in each child. torch is also
+    capped directly if it is already loaded.
+    """
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS"):
+        os.environ.setdefault(variable, str(threads))
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
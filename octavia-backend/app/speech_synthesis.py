@@ -0,0 +1,343 @@
+"""Segment-level speech synthesis on a pool of long-lived TTS engines.
+
+Instead of one blocking pyttsx3 call over the whole translated text, every
+transcript segment is synthesized on its own. Segments run in parallel
+across cores, progress is reported per segment, and a failed segment is
+retried on its own. Segments already in the TTS cache (see tts_cache.py)
+are not synthesized again.
+
+Engines live in supervised child processes (TTSEnginePool), one pool per
+worker process, started on first use (or at worker start for threaded and
+solo workers, see TTS_ENGINES_AT_START). A request that does
+not finish within TTS_SEGMENT_TIMEOUT gets its engine process killed and
+restarted. An engine idle longer than TTS_HEALTHCHECK_INTERVAL is pinged
+before it is reused. A wedged runAndWait() therefore costs one segment
+retry, not a worker slot held until the task hard limit.
+
+Celery prefork children are daemonic and may not start processes of their
+own. There the pool is a single in-process engine thread, without the
+timeout supervision; run TTS-heavy workers with WORKER_POOL=threads to get it.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from . import tts_cache
+
+logger = logging.getLogger(__name__)
+
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", min(4, os.cpu_count() or 1)))
+TTS_SEGMENT_RETRIES = int(os.environ.get("TTS_SEGMENT_RETRIES", 2))
+TTS_SEGMENT_TIMEOUT = float(os.environ.get("TTS_SEGMENT_TIMEOUT", 60))
+TTS_HEALTHCHECK_INTERVAL = float(os.environ.get("TTS_HEALTHCHECK_INTERVAL", 30))
+TTS_HEALTHCHECK_TIMEOUT = float(os.environ.get("TTS_HEALTHCHECK_TIMEOUT", 5))
+TTS_RATE = int(os.environ.get("TTS_RATE", 150))
+TTS_VOLUME = float(os.environ.get("TTS_VOLUME", 0.9))
+
+# Engine owned by an engine process, created once by _init_engine()
+_engine = None
+_default_voice = None
+
+# TTSEnginePool, or an in-process executor where engine processes cannot be started
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_engine():
+    """Start the pyttsx3 engine of an engine process."""
+    global _engine, _default_voice
+    import pyttsx3
+
+    _engine = pyttsx3.init()
+    _default_voice = _engine.getProperty('voice')
+    _engine.setProperty('rate', TTS_RATE)
+    _engine.setProperty('volume', TTS_VOLUME)
+
+
+def _synthesize_segment(text: str, output_path: str, voice_id: Optional[str] = None, speed: float = 1.0) -> str:
+    """Render one segment to a WAV file with this process's engine."""
+    # Voice and rate are set per segment since jobs with different settings share engines
+    _engine.setProperty('voice', voice_id if voice_id and voice_id != "default" else _default_voice)
+    _engine.setProperty('rate', int(TTS_RATE * speed))
+    _engine.save_to_file(text, output_path)
+    _engine.runAndWait()
+    if not Path(output_path).exists():
+        raise RuntimeError(f"TTS engine produced no audio for {output_path}")
+    return output_path
+
+
+def _engine_main(conn, initializer: Optional[Callable[[], None]]):
+    """Engine process loop: run requests from the pipe until told to stop."""
+    if initializer:
+        initializer()
+    while True:
+        message = conn.recv()
+        if message is None:
+            return
+        if message == "ping":
+            conn.send(("ok", "pong"))
+            continue
+        fn, args = message
+        try:
+            conn.send(("ok", fn(*args)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {str(e)}"))
+
+
+class EngineProcess:
+    """One TTS engine in its own process, reachable over a pipe."""
+
+    def __init__(self, initializer: Optional[Callable[[], None]] = _init_engine):
+        self.initializer = initializer
+        self.process = None
+        self.conn = None
+        self.last_used = 0.0
+        self.start()
+
+    def start(self):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_engine_main, args=(child_conn, self.initializer), name="tts-engine", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.last_used = time.monotonic()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def restart(self):
+        logger.warning(f"Restarting TTS engine process {self.process.pid}")
+        self.stop()
+        self.start()
+
+    def call(self, message, timeout: float):
+        """
+        Send a request and wait for its reply.
+
+        Raises:
+            TimeoutError: If no reply arrives within timeout
+            EOFError: If the engine process died
+            RuntimeError: If the request raised inside the engine
+        """
+        self.conn.send(message)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"TTS engine did not answer within {timeout:.0f}s")
+        status, value = self.conn.recv()
+        self.last_used = time.monotonic()
+        if status == "error":
+            raise RuntimeError(value)
+        return value
+
+    def healthy(self) -> bool:
+        """Check the process is alive; ping it if it has been idle a while."""
+        if not self.process.is_alive():
+            return False
+        if time.monotonic() - self.last_used < TTS_HEALTHCHECK_INTERVAL:
+            return True
+        try:
+            return self.call("ping", TTS_HEALTHCHECK_TIMEOUT) == "pong"
+        except (TimeoutError, EOFError, OSError, RuntimeError):
+            return False
+
+
+class TTSEnginePool:
+    """
+    Fixed set of supervised engine processes behind a request queue.
+
+    submit() mirrors Executor.submit: fn runs inside an engine process,
+    so it must be a module-level function.
+    """
+
+    def __init__(
+        self,
+        size: int = TTS_WORKERS,
+        timeout: float = TTS_SEGMENT_TIMEOUT,
+        initializer: Optional[Callable[[], None]] = _init_engine,
+    ):
+        self.timeout = timeout
+        self._engines: "queue.Queue[EngineProcess]" = queue.Queue()
+        for _ in range(size):
+            self._engines.put(EngineProcess(initializer))
+        self._size = size
+        # Dispatch threads only wait on pipes; the engines do the work
+        self._dispatch = ThreadPoolExecutor(max_workers=size, thread_name_prefix="tts-dispatch")
+
+    def submit(self, fn, *args) -> Future:
+        return self._dispatch.submit(self._run, fn, args)
+
+    def _run(self, fn, args):
+        engine = self._engines.get()
+        try:
+            if not engine.healthy():
+                engine.restart()
+            try:
+                return engine.call((fn, args), self.timeout)
+            except (TimeoutError, EOFError, OSError) as e:
+                # The engine is wedged or gone; replace it so the next request gets a fresh one
+                engine.restart()
+                raise RuntimeError(f"TTS engine failed: {str(e)}") from e
+        finally:
+            self._engines.put(engine)
+
+    def shutdown(self):
+        self._dispatch.shutdown(wait=True)
+        for _ in range(self._size):
+            self._engines.get().stop()
+
+
+def engines_can_spawn() -> bool:
+    """False in daemonic processes (Celery prefork children), which may not have children."""
+    return not multiprocessing.current_process().daemon
+
+
+def get_tts_pool():
+    """Return this process's engine pool, starting it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if engines_can_spawn():
+                _pool = TTSEnginePool()
+            else:
+                logger.warning("Daemonic worker process cannot start TTS engine processes, synthesizing in-process")
+                # pyttsx3 engines are not thread-safe: one engine on one thread
+                _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-engine", initializer=_init_engine)
+        return _pool
+
+
+def shutdown_tts_pool():
+    """Stop the engine pool and its processes."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def synthesize_segments(
+    texts: List[str],
+    work_dir: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    pool=None,
+    voice_id: Optional[str] = None,
+    language: str = "en",
+    speed: float = 1.0,
+) -> List[Optional[str]]:
+    """
+    Synthesize each text to its own audio file in parallel.
+
+    Args:
+        texts: Text per segment, in transcript order
+        work_dir: Directory for the segment audio files
+        progress_callback: Called with (segments done, total segments)
+        pool: Executor to use, defaults to the shared TTS pool
+        voice_id: Engine voice ID, or None/'default' for the engine default
+        language: Language code, part of the cache key
+        speed: Speaking rate multiplier applied to TTS_RATE
+
+    Returns:
+        Audio path per segment (WAV, or FLAC for cache hits), None for empty segments
+
+    Raises:
+        RuntimeError: If a segment still fails after TTS_SEGMENT_RETRIES retries
+    """
+    Path(work_dir).mkdir(parents=True, exist_ok=True)
+
+    paths: List[Optional[str]] = [None] * len(texts)
+    keys = {
+        index: tts_cache.cache_key(text, voice_id, language, speed)
+        for index, text in enumerate(texts) if text and text.strip()
+    }
+    total = len(keys)
+    done = 0
+
+    pending = {}
+    for index, key in keys.items():
+        paths[index] = tts_cache.fetch(key, str(Path(work_dir) / f"segment_{index:05d}.flac"))
+        if paths[index]:
+            done += 1
+        else:
+            pending[index] = str(Path(work_dir) / f"segment_{index:05d}.wav")
+    if done:
+        logger.info(f"TTS cache hit for {done}/{total} segments")
+        if progress_callback:
+            progress_callback(done, total)
+
+    attempts = {index: 0 for index in pending}
+    if pending:
+        pool = pool or get_tts_pool()
+
+    while pending:
+        futures = {
+            pool.submit(_synthesize_segment, texts[index].strip(), path, voice_id, speed): index
+            for index, path in pending.items()
+        }
+        failed = {}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                paths[index] = future.result()
+                tts_cache.store(keys[index], paths[index])
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+            except Exception as e:
+                attempts[index] += 1
+                if attempts[index] > TTS_SEGMENT_RETRIES:
+                    raise RuntimeError(f"Synthesis of segment {index} failed: {str(e)}") from e
+                logger.warning(f"Segment {index} synthesis failed (attempt {attempts[index]}), retrying: {str(e)}")
+                failed[index] = pending[index]
+        pending = failed
+
+    return paths
+
+
+def concatenate_wavs(paths: List[Optional[str]], output_path: str) -> Optional[str]:
+    """
+    Join segment WAV files into one mono track.
+
+    Args:
+        paths: WAV paths in playback order; None entries are skipped
+        output_path: Destination WAV path
+
+    Returns:
+        output_path, or None if there was nothing to join
+    """
+    import numpy as np
+    import soundfile as sf
+
+    chunks = []
+    sample_rate = None
+    for path in paths:
+        if not path:
+            continue
+        audio, rate = sf.read(path, dtype='float32', always_2d=True)
+        audio = audio.mean(axis=1)
+        if sample_rate is None:
+            sample_rate = rate
+        elif rate != sample_rate:
+            # Engines normally agree; resample linearly if a voice differs
+            positions = np.arange(0, len(audio), rate / sample_rate)
+            audio = np.interp(positions, np.arange(len(audio)), audio).astype('float32')
+        chunks.append(audio)
+
+    if not chunks:
+        return None
+
+    sf.write(output_path, np.concatenate(chunks), sample_rate, subtype='PCM_16')
+    return output_path
@@ -11,6 +11,7 @@ from app.db import get_db
 from app.job_model import Job, JobStatus
 from app.core import security
 from app.upload_routes import get_current_user
+from app.metrics import SSE_CONNECTIONS
 
 router = APIRouter(prefix="/api/v1", tags=["sse"])
 
@@ -22,58 +23,62 @@ async def job_progress_stream(job_id: str, user_id: str, db_session: Session):
     last_update = datetime.now()
     check_interval = 0.5  # Check every 500ms
     
-    while True:
-        try:
-            # Get current job status
-            job = db_session.query(Job).filter(
-                Job.id == job_id,
-                Job.user_id == user_id
-            ).first()
+    SSE_CONNECTIONS.inc()
+    try:
+        while True:
+            try:
+                # Get current job status
+                job = db_session.query(Job).filter(
+                    Job.id == job_id,
+                    Job.user_id == user_id
+                ).first()
             
-            if not job:
-                yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
-                break
+                if not job:
+                    yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
+                    break
             
-            # Prepare status data with progress tracking
-            status_data = {
-                "job_id": job.id,
-                "status": job.status,
-                "job_type": job.job_type,
-                "phase": job.phase if hasattr(job, 'phase') else None,
-                "progress_percentage": job.progress_percentage if hasattr(job, 'progress_percentage') else 0.0,
-                "current_step": job.current_step if hasattr(job, 'current_step') else None,
-                "created_at": job.created_at.isoformat() if job.created_at else None,
-                "started_at": job.started_at.isoformat() if hasattr(job, 'started_at') and job.started_at else None,
-                "completed_at": job.completed_at.isoformat() if job.completed_at else None,
-                "error_message": job.error_message,
-                "output_file": job.output_file,
-                "timestamp": datetime.now().isoformat(),
-            }
+                # Prepare status data with progress tracking
+                status_data = {
+                    "job_id": job.id,
+                    "status": job.status,
+                    "job_type": job.job_type,
+                    "phase": job.phase if hasattr(job, 'phase') else None,
+                    "progress_percentage": job.progress_percentage if hasattr(job, 'progress_percentage') else 0.0,
+                    "current_step": job.current_step if hasattr(job, 'current_step') else None,
+                    "created_at": job.created_at.isoformat() if job.created_at else None,
+                    "started_at": job.started_at.isoformat() if hasattr(job, 'started_at') and job.started_at else None,
+                    "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+                    "error_message": job.error_message,
+                    "output_file": job.output_file,
+                    "timestamp": datetime.now().isoformat(),
+                }
             
-            # Only send update if status/progress changed or on first message
-            progress_changed = (last_progress is not None and 
-                              status_data.get("progress_percentage") != last_progress)
+                # Only send update if status/progress changed or on first message
+                progress_changed = (last_progress is not None and 
+                                  status_data.get("progress_percentage") != last_progress)
             
-            if job.status != last_status or progress_changed or (datetime.now() - last_update).total_seconds() >= 1:
-                yield f"data: {json.dumps(status_data)}\n\n"
-                last_status = job.status
-                last_progress = status_data.get("progress_percentage")
-                last_update = datetime.now()
+                if job.status != last_status or progress_changed or (datetime.now() - last_update).total_seconds() >= 1:
+                    yield f"data: {json.dumps(status_data)}\n\n"
+                    last_status = job.status
+                    last_progress = status_data.get("progress_percentage")
+                    last_update = datetime.now()
             
-            # Stop streaming if job is done
-            if job.status in (JobStatus.COMPLETED, JobStatus.FAILED):
-                yield f"event: done\ndata: {json.dumps(status_data)}\n\n"
-                break
+                # Stop streaming if job is done
+                if job.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+                    yield f"event: done\ndata: {json.dumps(status_data)}\n\n"
+                    break
             
-            # Wait before next check
-            await asyncio.sleep(check_interval)
+                # Wait before next check
+                await asyncio.sleep(check_interval)
             
-        except Exception as e:
-            error_data = {"error": str(e)}
-            yield f"data: {json.dumps(error_data)}\n\n"
-            break
+            except Exception as e:
+                error_data = {"error": str(e)}
+                yield f"data: {json.dumps(error_data)}\n\n"
+                break
     
-    db_session.close()
+    finally:
+        SSE_CONNECTIONS.dec()
+        db_session.close()
 
 
 @router.get("/jobs/{job_id}/stream")
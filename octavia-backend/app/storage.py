@@ -1,9 +1,16 @@
 """File storage module for handling uploads (local/S3)."""
+import errno
+import logging
 import os
 import shutil
 from pathlib import Path
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
+# Linux ioctl for copy-on-write clones (btrfs, XFS with reflink, overlayfs on those)
+FICLONE = 0x40049409
+
 # Storage configuration
 STORAGE_TYPE = os.environ.get("STORAGE_TYPE", "local")  # 'local' or 's3'
 UPLOAD_DIR = Path(os.environ.get("UPLOAD_DIR", "uploads"))
@@ -38,6 +45,12 @@ def get_file_local(storage_path: str) -> Optional[bytes]:
     return None
 
 
+def get_file_path_local(storage_path: str) -> Optional[Path]:
+    """Resolve a storage path to a local file, or None if it does not exist."""
+    full_path = UPLOAD_DIR / storage_path
+    return full_path if full_path.is_file() else None
+
+
 def delete_file_local(storage_path: str) -> bool:
     """Delete file from local storage."""
     full_path = UPLOAD_DIR / storage_path
@@ -65,6 +78,15 @@ def get_file(storage_path: str) -> Optional[bytes]:
         return get_file_local(storage_path)
 
 
+def get_file_path(storage_path: str) -> Optional[Path]:
+    """Resolve a stored file to a local path so it can be streamed instead of read into memory."""
+    if STORAGE_TYPE == "s3":
+        # TODO: Implement S3 presigned URLs with boto3
+        raise NotImplementedError("S3 storage not yet implemented")
+    else:
+        return get_file_path_local(storage_path)
+
+
 def delete_file(storage_path: str) -> bool:
     """Delete file from storage."""
     if STORAGE_TYPE == "s3":
@@ -72,3 +94,68 @@ def delete_file(storage_path: str) -> bool:
         raise NotImplementedError("S3 storage not yet implemented")
     else:
         return delete_file_local(storage_path)
+
+
+def is_same_file(path_a: str, path_b: str) -> bool:
+    """
+    Check whether two stored paths name the same local file.
+
+    Paths may be storage-relative, relative to the working directory (e.g.
+    'uploads/...'), absolute, or use backslashes; each is compared in both
+    readings, so an ambiguous pair counts as the same file.
+    """
+    def readings(path: str) -> set:
+        path = Path(str(path).replace("\\", "/"))
+        return {path.resolve(), (UPLOAD_DIR / path).resolve()}
+
+    return bool(readings(path_a) & readings(path_b))
+
+
+def _reflink(source_path: str, target_path: str) -> bool:
+    """Clone a file copy-on-write; True if the filesystem supports it."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source_path, 'rb') as src, open(target_path, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        try:
+            os.unlink(target_path)
+        except OSError:
+            pass
+        return False
+
+
+def link_or_reference(source_path: str, target_path: str) -> str:
+    """
+    Make unchanged content available at target_path without copying bytes.
+    
+    Tries a hardlink, then a copy-on-write reflink. If neither works (e.g.
+    across filesystems), no file is written and source_path is returned so
+    the caller can point at the original instead.
+    
+    Returns:
+        Path holding the content: target_path or source_path
+    """
+    if os.path.abspath(source_path) == os.path.abspath(target_path):
+        return source_path
+    try:
+        os.unlink(target_path)
+    except FileNotFoundError:
+        pass
+    
+    try:
+        os.link(source_path, target_path)
+        return target_path
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES):
+            raise
+    
+    if _reflink(source_path, target_path):
+        return target_path
+    
+    logger.info(f"Cannot link {target_path} to {source_path}, referencing the original")
+    return source_path
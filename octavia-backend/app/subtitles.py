@@ -0,0 +1,70 @@
+"""SRT and WebVTT subtitle writers for translated, time-aligned segments."""
+import textwrap
+from pathlib import Path
+from typing import List, Optional
+
+# Common broadcast guideline: at most two lines of about 42 characters
+MAX_LINE_LENGTH = 42
+MAX_LINES = 2
+
+
+def format_timestamp(seconds: float, separator: str = ",") -> str:
+    """Format seconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (WebVTT)."""
+    milliseconds = int(round(max(seconds, 0.0) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+def _cues(segments: List[dict], duration: Optional[float] = None) -> list:
+    """Turn segments into (start, end, text) cues, skipping empty ones."""
+    cues = []
+    for segment in segments:
+        text = (segment.get("translated_text") or segment.get("text") or "").strip()
+        if not text:
+            continue
+        start = float(segment.get("start") or 0.0)
+        end = float(segment.get("end") or duration or start)
+        lines = textwrap.wrap(text, MAX_LINE_LENGTH)
+        if len(lines) > MAX_LINES:
+            # Keep the cue readable: rewrap into MAX_LINES longer lines
+            lines = textwrap.wrap(text, -(-len(text) // MAX_LINES))
+        cues.append((start, max(end, start), "\n".join(lines)))
+    return cues
+
+
+def to_srt(segments: List[dict], duration: Optional[float] = None) -> str:
+    """Render segments as SubRip (SRT)."""
+    blocks = [
+        f"{index}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n"
+        for index, (start, end, text) in enumerate(_cues(segments, duration), start=1)
+    ]
+    return "\n".join(blocks)
+
+
+def to_webvtt(segments: List[dict], duration: Optional[float] = None) -> str:
+    """Render segments as WebVTT."""
+    blocks = [
+        f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n"
+        for start, end, text in _cues(segments, duration)
+    ]
+    return "WEBVTT\n\n" + "\n".join(blocks)
+
+
+def write_subtitles(segments: List[dict], output_stem: str, duration: Optional[float] = None) -> dict:
+    """
+    Write SRT and WebVTT files next to each other.
+
+    Args:
+        segments: Segments with 'start', 'end' and 'translated_text' (or 'text')
+        output_stem: Output path without extension
+        duration: Media duration, used as the end of segments without timestamps
+
+    Returns:
+        dict with 'srt' and 'vtt' paths
+    """
+    paths = {"srt": f"{output_stem}.srt", "vtt": f"{output_stem}.vtt"}
+    Path(paths["srt"]).write_text(to_srt(segments, duration), encoding="utf-8")
+    Path(paths["vtt"]).write_text(to_webvtt(segments, duration), encoding="utf-8")
+    return paths
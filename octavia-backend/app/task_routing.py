@@ -0,0 +1,104 @@
+"""Model-affinity routing for Celery jobs.
+
+Jobs are routed to a queue named after the model they need, e.g.
+'asr.whisper.base' or 'mt.en-es'. Workers subscribe to the queues for the
+models they keep warm (WORKER_WARM_MODELS), so a job lands on a process that
+already holds its model instead of evicting another one.
+
+The priority queues (urgent/default/low) act as the fallback/overflow:
+every worker consumes them, so a job is sent there when no worker serves its
+model queue or that queue's backlog is too deep. Nothing is ever stranded on
+a model queue without consumers.
+"""
+import logging
+import os
+from typing import Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Model queues that have dedicated (warm) workers. Empty disables affinity routing.
+MODEL_AFFINITY_QUEUES = {
+    q.strip() for q in os.environ.get("MODEL_AFFINITY_QUEUES", "").split(",") if q.strip()
+}
+
+# Backlog above which a job overflows from its model queue to the priority queue
+MODEL_QUEUE_MAX_BACKLOG = int(os.environ.get("MODEL_QUEUE_MAX_BACKLOG", 10))
+
+PRIORITY_QUEUES = ("urgent", "default", "low")
+
+# Deployment-wide speech recognition engine (see asr_backends.py)
+DEFAULT_ASR_BACKEND = os.environ.get("ASR_BACKEND", "whisper")
+
+
+def asr_model_key(model_size: str = "base", backend: Optional[str] = None) -> str:
+    """Routing key for a speech recognition model."""
+    return f"asr.{backend or DEFAULT_ASR_BACKEND}.{model_size}"
+
+
+def mt_model_key(source_lang: str, target_lang: str) -> str:
+    """Routing key for a translation model."""
+    return f"mt.{source_lang}-{target_lang}"
+
+
+def model_key_for_job(job_type: str, metadata: dict) -> Optional[str]:
+    """
+    Determine which model a job needs.
+
+    ASR dominates load time and memory, so jobs that transcribe route by their
+    ASR engine and model size. Translation jobs route by language pair. Jobs that need no
+    routable model (synthesis) return None.
+    """
+    if job_type in ("transcribe", "video_translate", "audio_translate"):
+        return asr_model_key(metadata.get("model_size") or "base", metadata.get("asr_backend"))
+    if job_type == "translate":
+        return mt_model_key(metadata.get("source_language", "en"), metadata.get("target_language", "es"))
+    return None
+
+
+def queue_depth(queue_name: str) -> Optional[int]:
+    """Return the number of messages waiting in a broker queue, or None if unknown."""
+    from app.celery_tasks import app
+
+    try:
+        with app.connection_for_read() as conn:
+            return conn.default_channel.queue_declare(queue=queue_name, passive=True).message_count
+    except Exception as e:
+        logger.debug(f"Could not read depth of queue {queue_name}: {e}")
+        return None
+
+
+def select_queue(model_key: Optional[str], priority_queue: str = "default") -> str:
+    """
+    Pick the queue for a job.
+
+    Args:
+        model_key: Model routing key from model_key_for_job()
+        priority_queue: Fallback queue for the user's tier
+
+    Returns:
+        The model queue when warm workers serve it and its backlog is below
+        MODEL_QUEUE_MAX_BACKLOG, otherwise the priority queue.
+    """
+    if not model_key or model_key not in MODEL_AFFINITY_QUEUES:
+        return priority_queue
+
+    # Depths are cached for METRICS_QUEUE_DEPTH_TTL, so routing does not open a broker connection per job.
+    # An absent queue (some brokers drop empty queues) or unreadable depth counts as no backlog.
+    depth = metrics.queue_depths().get(model_key)
+    if depth is not None and depth >= MODEL_QUEUE_MAX_BACKLOG:
+        logger.info(f"Model queue {model_key} backlog {depth}, overflowing to {priority_queue}")
+        return priority_queue
+
+    return model_key
+
+
+def warm_model_keys() -> list:
+    """Model keys this worker should preload and subscribe to (WORKER_WARM_MODELS)."""
+    return [k.strip() for k in os.environ.get("WORKER_WARM_MODELS", "").split(",") if k.strip()]
+
+
+def worker_queues() -> list:
+    """Queues a worker consumes: its warm model queues first, then the priority queues."""
+    return warm_model_keys() + list(PRIORITY_QUEUES)
@@ -0,0 +1,153 @@
+"""Content-addressed cache of synthesized speech segments.
+
+Segments are keyed by a hash of (normalized text, voice, language, speed,
+engine version), so repeated phrases and re-runs after a failure are not
+synthesized again. Audio is stored as FLAC, which is lossless and about
+half the size of PCM WAV. When the cache is larger than TTS_CACHE_MAX_MB,
+the least recently used entries are evicted.
+
+Each process keeps a running total of the cache size, seeded by one scan,
+so storing a segment costs no directory walk. The tree is scanned again only
+to evict, or every TTS_CACHE_RESCAN_STORES stores to pick up entries other
+worker processes added.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Optional
+
+from .storage import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_ENABLED = os.environ.get("TTS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TTS_CACHE_DIR = Path(os.environ.get("TTS_CACHE_DIR", str(UPLOAD_DIR / "tts_cache")))
+TTS_CACHE_MAX_MB = int(os.environ.get("TTS_CACHE_MAX_MB", 1024))
+TTS_CACHE_RESCAN_STORES = int(os.environ.get("TTS_CACHE_RESCAN_STORES", 1000))
+
+_evict_lock = threading.Lock()
+# Running cache size in bytes (None until the first scan) and stores since that scan
+_cache_bytes: Optional[int] = None
+_stores_since_scan = 0
+
+
+def engine_version() -> str:
+    """Identify the synthesis engine so an engine upgrade invalidates old entries."""
+    try:
+        from importlib.metadata import version
+        return f"pyttsx3-{version('pyttsx3')}"
+    except Exception:
+        return "pyttsx3"
+
+
+def normalize_text(text: str) -> str:
+    """Normalize Unicode and whitespace so trivially different strings share an entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text: str, voice_id: Optional[str], language: str, speed: float, engine: Optional[str] = None) -> str:
+    """Content hash identifying one synthesized segment."""
+    payload = json.dumps(
+        [normalize_text(text), voice_id or "default", language, round(float(speed), 3), engine or engine_version()],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return TTS_CACHE_DIR / key[:2] / f"{key}.flac"
+
+
+def fetch(key: str, destination: str) -> Optional[str]:
+    """
+    Materialize a cached segment at destination.
+
+    The entry is hardlinked when possible (copied otherwise), so later
+    eviction cannot remove audio a running job still uses.
+
+    Returns:
+        destination, or None on a cache miss
+    """
+    if not TTS_CACHE_ENABLED:
+        return None
+    entry = _entry_path(key)
+    try:
+        try:
+            os.link(entry, destination)
+        except OSError:
+            shutil.copyfile(entry, destination)
+        os.utime(entry)  # Mark as recently used for eviction
+        return destination
+    except FileNotFoundError:
+        return None
+
+
+def store(key: str, audio_path: str):
+    """Add a synthesized WAV to the cache as FLAC and evict old entries if over budget."""
+    if not TTS_CACHE_ENABLED:
+        return
+    import soundfile as sf
+
+    entry = _entry_path(key)
+    if entry.exists():
+        return
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        audio, rate = sf.read(audio_path, dtype='int16')
+        temp_path = entry.with_name(f"{entry.stem}.{os.getpid()}.tmp")
+        sf.write(str(temp_path), audio, rate, format='FLAC')
+        os.replace(temp_path, entry)  # Atomic, so readers never see a partial entry
+        size = entry.stat().st_size
+    except Exception as e:
+        logger.warning(f"Could not cache TTS segment {key[:12]}: {str(e)}")
+        return
+    _account(size)
+
+
+def _account(added_bytes: int):
+    """Add a new entry to the running total; scan and evict only when over budget or due a rescan."""
+    global _cache_bytes, _stores_since_scan
+    with _evict_lock:
+        if _cache_bytes is None:
+            # Seed from disk; the scan already includes the entry just written
+            _cache_bytes = sum(size for _, size, _ in _scan())
+            _stores_since_scan = 0
+        else:
+            _cache_bytes += added_bytes
+            _stores_since_scan += 1
+        due = _cache_bytes > TTS_CACHE_MAX_MB * 1024 * 1024 or _stores_since_scan >= TTS_CACHE_RESCAN_STORES
+    if due:
+        evict()
+
+
+def _scan() -> list:
+    """(mtime, size, path) of every cache entry."""
+    entries = []
+    for path in TTS_CACHE_DIR.glob("*/*.flac"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def evict(max_bytes: Optional[int] = None):
+    """Delete least recently used entries until the cache fits in max_bytes, and reset the running total."""
+    global _cache_bytes, _stores_since_scan
+    max_bytes = TTS_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    with _evict_lock:
+        entries = _scan()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        _cache_bytes = total
+        _stores_since_scan = 0
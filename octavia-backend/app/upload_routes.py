@@ -2,6 +2,7 @@
 import uuid
 import json
 import logging
+import mimetypes
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Header
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
@@ -9,11 +10,12 @@ from datetime import datetime
 from typing import Optional
 from pathlib import Path
 
-from . import db, models, upload_schemas, workers
+from . import db, models, upload_schemas
 from .core import security
-from .storage import save_upload, delete_file, get_file
+from .storage import save_upload, delete_file, get_file_path
 from .job_model import Job, JobStatus
 from .credit_calculator import CreditCalculator
+from .task_routing import model_key_for_job, select_queue
 from .billing_routes import deduct_credits
 
 logger = logging.getLogger(__name__)
@@ -151,6 +153,7 @@ def create_synthesize_job(
         job_metadata=json.dumps({
             "voice_id": request.voice_id,
             "speed": request.speed,
+            "language": json.loads(translation_job.job_metadata or "{}").get("target_language", "en"),
             "from_job_id": request.job_id
         }),
     )
@@ -173,7 +176,7 @@ def create_transcribe_job(
         job_type="transcribe",
         input_file=request.storage_path,  # Store full path
         status=JobStatus.PENDING,
-        job_metadata=json.dumps({"language": request.language}),
+        job_metadata=json.dumps({"language": request.language, "asr_backend": request.asr_backend}),
     )
     db_session.add(job)
     db_session.commit()
@@ -198,6 +201,10 @@ def create_video_translate_job(
             "source_language": request.source_language,
             "target_language": request.target_language,
             "model_size": request.model_size,
+            "asr_backend": request.asr_backend,
+            "output_mode": request.output_mode,
+            "mux_subtitles": request.mux_subtitles,
+            "chunked": request.chunked,
         }),
     )
     db_session.add(job)
@@ -223,6 +230,7 @@ def create_audio_translate_job(
             "source_language": request.source_language,
             "target_language": request.target_language,
             "model_size": request.model_size,
+            "asr_backend": request.asr_backend,
         }),
     )
     db_session.add(job)
@@ -294,7 +302,7 @@ def process_job(
         resolved_path = None
         for cand in candidates:
             try_path = cand if isinstance(cand, Path) else Path(cand)
-            logger.debug(f"Job {job_id}: checking path candidate: {try_path}")
+            logger.debug("Job %s: checking path candidate: %s", job_id, try_path)
             if try_path.exists():
                 resolved_path = try_path
                 break
@@ -333,13 +341,17 @@ def process_job(
         db_session.commit()
         logger.info(f"Job {job_id}: Status set to PROCESSING, queuing task")
         
-        # STEP 4: Determine queue priority
+        # STEP 4: Determine queue
         # Premium/paid users get urgent queue, others get default
         user_subscription = getattr(user, 'subscription', 'free')
-        queue_name = "urgent" if user_subscription in ("premium", "paid") else "default"
+        priority_queue = "urgent" if user_subscription in ("premium", "paid") else "default"
+        task_metadata = json.loads(job.job_metadata) if job.job_metadata else {}
+        
+        # Prefer the queue of workers that already hold this job's model;
+        # the priority queue is the fallback/overflow
+        queue_name = select_queue(model_key_for_job(job.job_type, task_metadata), priority_queue)
         
         # STEP 5: Queue task based on job type
-        task_metadata = json.loads(job.job_metadata) if job.job_metadata else {}
         
         if job.job_type == "transcribe":
             logger.info(f"Queuing transcription job {job_id} to {queue_name} queue")
@@ -347,9 +359,10 @@ def process_job(
             if language == "auto":
                 language = None
             model_size = task_metadata.get("model_size", "base")
+            asr_backend = task_metadata.get("asr_backend")
             
             celery_task = process_transcription.apply_async(
-                args=[job_id, user_id, input_file_path, language, model_size],
+                args=[job_id, user_id, input_file_path, language, model_size, asr_backend],
                 queue=queue_name,
                 task_id=f"transcribe-{job_id}"
             )
@@ -370,9 +383,11 @@ def process_job(
         elif job.job_type == "synthesize":
             logger.info(f"Queuing synthesis job {job_id} to {queue_name} queue")
             language = task_metadata.get("language", "en")
+            voice_id = task_metadata.get("voice_id")
+            speed = task_metadata.get("speed") or 1.0
             
             celery_task = process_synthesis.apply_async(
-                args=[job_id, user_id, input_file_path, language],
+                args=[job_id, user_id, input_file_path, language, voice_id, speed],
                 queue=queue_name,
                 task_id=f"synthesize-{job_id}"
             )
@@ -383,9 +398,10 @@ def process_job(
             source_lang = task_metadata.get("source_language", "auto")
             target_lang = task_metadata.get("target_language", "es")
             model_size = task_metadata.get("model_size", "base")
+            asr_backend = task_metadata.get("asr_backend")
             
             celery_task = process_video_translation.apply_async(
-                args=[job_id, user_id, input_file_path, source_lang, target_lang, model_size],
+                args=[job_id, user_id, input_file_path, source_lang, target_lang, model_size, asr_backend],
                 queue=queue_name,
                 task_id=f"video_translate-{job_id}"
             )
@@ -396,9 +412,10 @@ def process_job(
             source_lang = task_metadata.get("source_language", "auto")
             target_lang = task_metadata.get("target_language", "es")
             model_size = task_metadata.get("model_size", "base")
+            asr_backend = task_metadata.get("asr_backend")
             
             celery_task = process_audio_translation.apply_async(
-                args=[job_id, user_id, input_file_path, source_lang, target_lang, model_size],
+                args=[job_id, user_id, input_file_path, source_lang, target_lang, model_size, asr_backend],
                 queue=queue_name,
                 task_id=f"audio_translate-{job_id}"
             )
@@ -480,19 +497,22 @@ async def download_job_output(
     if not job.output_file:
         raise HTTPException(status_code=404, detail="No output file for this job")
     
-    # Retrieve the file from storage
-    file_data = get_file(job.output_file)
-    if not file_data:
+    # Resolve the file in storage; it is streamed from disk in chunks, not read into memory
+    file_path = get_file_path(job.output_file)
+    if not file_path:
         raise HTTPException(status_code=404, detail="Output file not found in storage")
     
     # Extract filename from output_file path
     output_filename = Path(job.output_file).name
     
+    # A real media type lets players start faststart/fragmented MP4s before the download ends
+    media_type = mimetypes.guess_type(output_filename)[0] or "application/octet-stream"
+    
     # Return file for download
     return FileResponse(
-        content=file_data,
+        path=file_path,
         filename=output_filename,
-        media_type="application/octet-stream",
+        media_type=media_type,
     )
 
 
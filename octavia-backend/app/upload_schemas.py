@@ -1,6 +1,6 @@
 """Schemas for file upload and job tracking."""
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Literal, Optional
 from enum import Enum
 from datetime import datetime
 
@@ -13,6 +13,13 @@ class JobStatus(str, Enum):
     FAILED = "failed"
 
 
+# Names registered in asr_backends.ASR_BACKENDS
+ASRBackendName = Literal["whisper", "faster-whisper"]
+
+# dub: translated voice track; subtitles: SRT/WebVTT only, much cheaper
+OutputMode = Literal["dub", "subtitles"]
+
+
 class JobOut(BaseModel):
     """Job response schema."""
     id: str
@@ -43,6 +50,7 @@ class TranscribeRequest(BaseModel):
     file_id: str
     storage_path: str
     language: Optional[str] = "auto"  # auto-detect or specific language code
+    asr_backend: Optional[ASRBackendName] = None  # defaults to ASR_BACKEND
 
 
 class TranslateRequest(BaseModel):
@@ -59,6 +67,20 @@ class VideoTranslateRequest(BaseModel):
     source_language: str = "en"
     target_language: str = "es"
     model_size: Optional[str] = "base"  # base, small, medium, large
+    asr_backend: Optional[ASRBackendName] = None  # defaults to ASR_BACKEND
+    output_mode: Optional[OutputMode] = "dub"
+    mux_subtitles: bool = False  # subtitles mode: also return the video with a soft subtitle track
+    chunked: Optional[bool] = None  # split into parallel pieces; None = automatic for long inputs
+
+
+class AudioTranslateRequest(BaseModel):
+    """Request to translate an audio file."""
+    file_id: str
+    storage_path: str
+    source_language: str = "auto"
+    target_language: str = "es"
+    model_size: Optional[str] = "base"  # base, small, medium, large
+    asr_backend: Optional[ASRBackendName] = None  # defaults to ASR_BACKEND
 
 
 class SynthesizeRequest(BaseModel):
@@ -0,0 +1,132 @@
+"""Segment-parallel processing for long videos.
+
+Long inputs are cut into pieces of about CHUNK_SECONDS of source time. Each
+piece runs extract, ASR, MT and TTS as its own Celery task and produces a
+PCM dub track for its range. The tracks are joined sample-exact at their
+source offsets, and the joined track is muxed onto the untouched input video
+with a single AAC encode. Encoding every piece and concatenating the pieces
+would leave an encoder priming gap at each boundary.
+
+Speech at a boundary would be cut in half if every piece only heard its own
+audio. Each piece therefore transcribes a window that extends
+CHUNK_OVERLAP_SECONDS past both of its edges. Afterwards it keeps only the
+segments whose midpoint falls inside its own range. Every segment in an
+overlap is then produced by exactly one piece.
+
+Pieces report to a chord callback, so chunking needs a result backend
+shared by all worker processes (see celery_tasks.chords_supported).
+"""
+import logging
+import os
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Inputs at least this long are processed in parallel pieces
+CHUNKED_MIN_DURATION = float(os.environ.get("CHUNKED_MIN_DURATION", 3600))
+CHUNK_SECONDS = float(os.environ.get("CHUNK_SECONDS", 600))
+CHUNK_OVERLAP_SECONDS = float(os.environ.get("CHUNK_OVERLAP_SECONDS", 5))
+# Every piece's dub track is assembled at this rate so the tracks join sample-exact
+PIECE_SAMPLE_RATE = 22050
+JOIN_BLOCK_FRAMES = 65536
+
+
+def should_chunk(duration: Optional[float], requested: Optional[bool] = None) -> bool:
+    """Decide whether a job runs segment-parallel; an explicit request wins over duration."""
+    if requested is not None:
+        return bool(requested)
+    return bool(duration) and duration >= CHUNKED_MIN_DURATION
+
+
+def plan_pieces(duration: float, chunk_seconds: float = CHUNK_SECONDS) -> List[dict]:
+    """
+    Cut a source duration into pieces of about chunk_seconds.
+
+    The last piece absorbs a remainder shorter than half a chunk, so no piece
+    is a sliver.
+
+    Returns:
+        Pieces in order as dicts with 'index', 'count', 'start' and 'end' (seconds in the source)
+    """
+    count = max(1, round(duration / chunk_seconds))
+    return [
+        {
+            "index": index,
+            "count": count,
+            "start": index * chunk_seconds,
+            "end": duration if index == count - 1 else (index + 1) * chunk_seconds,
+        }
+        for index in range(count)
+    ]
+
+
+def transcription_window(piece: dict, overlap: float = CHUNK_OVERLAP_SECONDS) -> tuple:
+    """Audio range (start, duration) a piece transcribes, including the overlap on both sides."""
+    start = max(0.0, piece["start"] - overlap)
+    return start, piece["end"] + overlap - start
+
+
+def keep_own_segments(segments: List[dict], piece: dict) -> List[dict]:
+    """Keep segments whose midpoint lies in the piece's own range, dropping overlap duplicates."""
+    return [
+        segment for segment in segments
+        if piece["start"] <= (segment.get("start", 0.0) + segment.get("end", 0.0)) / 2 < piece["end"]
+    ]
+
+
+def shift_segments(segments: List[dict], offset: float) -> List[dict]:
+    """Return copies of segments with start/end moved by offset seconds."""
+    return [
+        {**segment, "start": segment.get("start", 0.0) + offset, "end": segment.get("end", 0.0) + offset}
+        for segment in segments
+    ]
+
+
+def join_piece_tracks(
+    tracks: List[tuple],
+    output_path: str,
+    total_duration: float,
+    sample_rate: int = PIECE_SAMPLE_RATE,
+) -> str:
+    """
+    Join per-piece dub tracks into one 16-bit PCM track, each at its source offset.
+
+    Tracks are streamed block by block. Rounding overlaps are dropped and gaps
+    filled with silence, so the result is exactly total_duration long.
+
+    Args:
+        tracks: (start seconds, WAV path) per piece
+        output_path: Destination WAV path
+        total_duration: Length of the source in seconds
+        sample_rate: Rate of every piece track and of the output
+
+    Returns:
+        output_path
+
+    Raises:
+        ValueError: If a piece track is not at sample_rate
+    """
+    import numpy as np
+    import soundfile as sf
+
+    total = int(round(total_duration * sample_rate))
+    written = 0
+    with sf.SoundFile(output_path, 'w', samplerate=sample_rate, channels=1, subtype='PCM_16') as out:
+        for start, path in sorted(tracks):
+            if sf.info(path).samplerate != sample_rate:
+                raise ValueError(f"Piece track {path} is not at {sample_rate} Hz")
+            offset = min(int(round(start * sample_rate)), total)
+            if offset > written:
+                out.write(np.zeros(offset - written, dtype=np.float32))
+                written = offset
+            skip = written - offset
+            for block in sf.blocks(path, blocksize=JOIN_BLOCK_FRAMES, dtype='float32', always_2d=True):
+                block = block.mean(axis=1)
+                drop = min(skip, len(block))
+                skip -= drop
+                block = block[drop:total - written + drop]
+                out.write(block)
+                written += len(block)
+        if written < total:
+            out.write(np.zeros(total - written, dtype=np.float32))
+    return output_path
@@ -3,12 +3,28 @@ Video processing module for Octavia.
 Handles video upload, audio extraction, and video reassembly.
 """
 import logging
+import os
 import ffmpeg
 from pathlib import Path
 from typing import Optional, Tuple, Dict
 
+from .resource_limits import ffmpeg_slot
+
 logger = logging.getLogger(__name__)
 
+# Dub track encoding: speech at 128k AAC-LC is transparent and half the default stereo size
+MUX_AUDIO_BITRATE = os.environ.get("MUX_AUDIO_BITRATE", "128k")
+MUX_AUDIO_SAMPLE_RATE = int(os.environ.get("MUX_AUDIO_SAMPLE_RATE", 48000))
+MUX_KEEP_ORIGINAL_AUDIO = os.environ.get("MUX_KEEP_ORIGINAL_AUDIO", "false").lower() in ("1", "true", "yes")
+# faststart: moov atom up front (one rewrite pass); fragmented: playable while still being written
+MUX_STREAMING = os.environ.get("MUX_STREAMING", "faststart")
+
+STREAMING_MOVFLAGS = {
+    'faststart': '+faststart',
+    'fragmented': '+frag_keyframe+empty_moov+default_base_moof',
+    'none': None,
+}
+
 
 class VideoProcessor:
     """Handles all video processing operations using FFmpeg."""
@@ -114,7 +130,9 @@ class VideoProcessor:
         video_path: str, 
         output_audio_path: Optional[str] = None,
         audio_format: str = 'wav',
-        sample_rate: int = 16000
+        sample_rate: int = 16000,
+        start: Optional[float] = None,
+        duration: Optional[float] = None
     ) -> Optional[str]:
         """
         Extract audio track from video file.
@@ -124,6 +142,8 @@ class VideoProcessor:
             output_audio_path: Path for output audio file (auto-generated if None)
             audio_format: Output audio format ('wav', 'mp3', 'flac')
             sample_rate: Audio sample rate in Hz (16000 for Whisper)
+            start: Optional offset in seconds to start extracting from
+            duration: Optional length in seconds to extract
             
         Returns:
             Path to extracted audio file or None if failed
@@ -139,8 +159,13 @@ class VideoProcessor:
             
             logger.info(f"Extracting audio from {video_path} to {output_audio_path}")
             
-            # Extract audio with ffmpeg
-            stream = ffmpeg.input(str(video_path))
+            # Extract audio with ffmpeg (input seeking is sample-accurate for decoded audio)
+            input_kwargs = {}
+            if start:
+                input_kwargs['ss'] = start
+            if duration:
+                input_kwargs['t'] = duration
+            stream = ffmpeg.input(str(video_path), **input_kwargs)
             stream = ffmpeg.output(
                 stream.audio,
                 str(output_audio_path),
@@ -153,8 +178,9 @@ class VideoProcessor:
             # Overwrite output file if it exists
             stream = ffmpeg.overwrite_output(stream)
             
-            # Run the command
-            ffmpeg.run(stream, capture_stdout=True, capture_stderr=True)
+            # Run the command (waits for a free ffmpeg slot on this node)
+            with ffmpeg_slot():
+                ffmpeg.run(stream, capture_stdout=True, capture_stderr=True)
             
             if not output_audio_path.exists():
                 logger.error(f"Audio extraction failed: output file not created")
@@ -176,10 +202,20 @@ class VideoProcessor:
         audio_path: str,
         output_path: Optional[str] = None,
         video_codec: str = 'copy',
-        audio_codec: str = 'aac'
+        audio_codec: str = 'aac',
+        audio_bitrate: Optional[str] = None,
+        keep_original_audio: Optional[bool] = None,
+        streaming: Optional[str] = None,
+        dub_language: Optional[str] = None,
+        original_language: Optional[str] = None
     ) -> Optional[str]:
         """
-        Merge new audio track with original video.
+        Merge new audio track with original video in a single ffmpeg pass.
+        
+        The first video stream is mapped as-is (no re-encode) and the dub
+        track is encoded once with tuned AAC settings. The original audio can
+        ride along as a second, non-default track. MP4-family outputs are
+        written for progressive playback (faststart or fragmented).
         
         Args:
             video_path: Path to original video file
@@ -187,6 +223,11 @@ class VideoProcessor:
             output_path: Path for output video (auto-generated if None)
             video_codec: Video codec ('copy' to avoid re-encoding)
             audio_codec: Audio codec ('aac' recommended)
+            audio_bitrate: Dub track bitrate, defaults to MUX_AUDIO_BITRATE
+            keep_original_audio: Keep source audio as a second track, defaults to MUX_KEEP_ORIGINAL_AUDIO
+            streaming: 'faststart', 'fragmented' or 'none', defaults to MUX_STREAMING
+            dub_language: Language tag for the dub track
+            original_language: Language tag for the original audio track
             
         Returns:
             Path to merged video file or None if failed
@@ -203,26 +244,22 @@ class VideoProcessor:
             
             logger.info(f"Merging audio {audio_path} with video {video_path}")
             
-            # Create ffmpeg streams
-            video_stream = ffmpeg.input(str(video_path)).video
-            audio_stream = ffmpeg.input(str(audio_path)).audio
-            
-            # Merge streams
-            stream = ffmpeg.output(
-                video_stream,
-                audio_stream,
-                str(output_path),
-                vcodec=video_codec,
-                acodec=audio_codec,
-                shortest=None,  # Use shortest stream duration
-                loglevel='error'
+            stream = self.build_merge_command(
+                video_path,
+                audio_path,
+                output_path,
+                video_codec=video_codec,
+                audio_codec=audio_codec,
+                audio_bitrate=audio_bitrate,
+                keep_original_audio=keep_original_audio,
+                streaming=streaming,
+                dub_language=dub_language,
+                original_language=original_language,
             )
             
-            # Overwrite output file if it exists
-            stream = ffmpeg.overwrite_output(stream)
-            
-            # Run the command
-            ffmpeg.run(stream, capture_stdout=True, capture_stderr=True)
+            # Run the command (waits for a free ffmpeg slot on this node)
+            with ffmpeg_slot():
+                ffmpeg.run(stream, capture_stdout=True, capture_stderr=True)
             
             if not output_path.exists():
                 logger.error(f"Video merge failed: output file not created")
@@ -238,6 +275,114 @@ class VideoProcessor:
             logger.error(f"Error merging video: {str(e)}")
             return None
     
+    def build_merge_command(
+        self,
+        video_path: Path,
+        audio_path: Path,
+        output_path: Path,
+        video_codec: str = 'copy',
+        audio_codec: str = 'aac',
+        audio_bitrate: Optional[str] = None,
+        keep_original_audio: Optional[bool] = None,
+        streaming: Optional[str] = None,
+        dub_language: Optional[str] = None,
+        original_language: Optional[str] = None
+    ):
+        """Build the single-pass ffmpeg mux used by merge_audio_video()."""
+        audio_bitrate = audio_bitrate or MUX_AUDIO_BITRATE
+        streaming = streaming or MUX_STREAMING
+        if keep_original_audio is None:
+            keep_original_audio = MUX_KEEP_ORIGINAL_AUDIO
+        if keep_original_audio:
+            metadata = self.get_video_metadata(str(video_path))
+            keep_original_audio = bool(metadata and metadata.get('has_audio'))
+        
+        source = ffmpeg.input(str(video_path))
+        dub = ffmpeg.input(str(audio_path))
+        streams = [source['v:0'], dub['a:0']]
+        
+        options = {
+            'c:v': video_codec,
+            'c:a:0': audio_codec,
+            'b:a:0': audio_bitrate,
+            'ar:a:0': MUX_AUDIO_SAMPLE_RATE,
+            'disposition:a:0': 'default',
+        }
+        if dub_language:
+            options['metadata:s:a:0'] = f"language={dub_language}"
+        if keep_original_audio:
+            # The original track is copied untouched and is not selected by default
+            streams.append(source['a:0'])
+            options['c:a:1'] = 'copy'
+            options['disposition:a:1'] = '0'
+            if original_language:
+                options['metadata:s:a:1'] = f"language={original_language}"
+        
+        if output_path.suffix.lower() in ('.mp4', '.m4v', '.mov'):
+            movflags = STREAMING_MOVFLAGS.get(streaming)
+            if movflags:
+                options['movflags'] = movflags
+        
+        stream = ffmpeg.output(*streams, str(output_path), loglevel='error', **options)
+        return ffmpeg.overwrite_output(stream)
+    
+    def mux_subtitles(
+        self,
+        video_path: str,
+        subtitle_path: str,
+        output_path: str,
+        language: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Add a soft subtitle stream without re-encoding audio or video.
+        
+        Args:
+            video_path: Path to original video file
+            subtitle_path: Path to SRT/WebVTT file
+            output_path: Path for output video
+            language: Language tag for the subtitle stream
+            
+        Returns:
+            Path to muxed video file or None if failed
+        """
+        try:
+            output_path = Path(output_path)
+            # MP4-family containers only carry mov_text; Matroska/WebM keep text subtitles as-is
+            suffix = output_path.suffix.lower()
+            subtitle_codec = {'.mp4': 'mov_text', '.m4v': 'mov_text', '.mov': 'mov_text', '.webm': 'webvtt'}.get(suffix, 'srt')
+            
+            output_kwargs = {}
+            if language:
+                output_kwargs['metadata:s:s:0'] = f"language={language}"
+            
+            stream = ffmpeg.output(
+                ffmpeg.input(str(video_path)),
+                ffmpeg.input(str(subtitle_path)),
+                str(output_path),
+                vcodec='copy',
+                acodec='copy',
+                scodec=subtitle_codec,
+                loglevel='error',
+                **output_kwargs
+            )
+            stream = ffmpeg.overwrite_output(stream)
+            with ffmpeg_slot():
+                ffmpeg.run(stream, capture_stdout=True, capture_stderr=True)
+            
+            if not output_path.exists():
+                logger.error(f"Subtitle mux failed: output file not created")
+                return None
+            
+            logger.info(f"Subtitles muxed successfully: {output_path}")
+            return str(output_path)
+            
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg error during subtitle mux: {e.stderr.decode()}")
+            return None
+        except Exception as e:
+            logger.error(f"Error muxing subtitles: {str(e)}")
+            return None
+    
     def get_video_duration(self, file_path: str) -> Optional[float]:
         """
         Get duration of video file in seconds.
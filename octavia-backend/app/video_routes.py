@@ -10,6 +10,7 @@ from pydantic import BaseModel
 
 from . import db, security
 from .job_model import Job, JobStatus
+from .upload_schemas import OutputMode
 from .video_processor import VideoProcessor
 
 logger = logging.getLogger(__name__)
@@ -37,6 +38,9 @@ class VideoTranslateRequest(BaseModel):
     source_language: str = "auto"
     target_language: str = "es"
     model_size: str = "base"  # Whisper model size
+    output_mode: OutputMode = "dub"
+    mux_subtitles: bool = False  # subtitles mode: also return the video with a soft subtitle track
+    chunked: Optional[bool] = None  # split into parallel pieces; None = automatic for long inputs
 
 
 class VideoTranslateResponse(BaseModel):
@@ -116,6 +120,9 @@ async def create_video_translation_job(
                 "source_language": request.source_language,
                 "target_language": request.target_language,
                 "model_size": request.model_size,
+                "output_mode": request.output_mode,
+                "mux_subtitles": request.mux_subtitles,
+                "chunked": request.chunked,
                 "video_duration": duration,
                 "video_metadata": metadata
             }),
@@ -4,12 +4,19 @@ Handles transcription, translation, and synthesis operations.
 """
 import json
 import logging
+import shutil
 from pathlib import Path
 from typing import Optional
-import whisper
 from sqlalchemy.orm import Session
 from .job_model import Job, JobStatus
-from .storage import get_file, save_upload
+from .storage import get_file, link_or_reference, save_upload
+from . import model_cache
+from .asr_backends import get_asr_backend, identify_language
+from .task_routing import mt_model_key
+from .speech_synthesis import concatenate_wavs, synthesize_segments
+from .dub_assembly import assemble_dub_track
+from .subtitles import write_subtitles
+from .instrumentation import StageRecorder, merge_stage_dicts
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +29,65 @@ except ImportError:
     logger.warning("soundfile not installed - audio loading will require ffmpeg")
 
 
+def load_whisper_model(model_size: str = "base"):
+    """
+    Load an openai-whisper model through the cached 'whisper' ASR backend.
+    
+    Args:
+        model_size: Whisper model size ('tiny', 'base', 'small', 'medium', 'large')
+    
+    Returns:
+        Loaded Whisper model
+    """
+    return get_asr_backend(model_size, "whisper").model
+
+
+def load_translation_pipeline(source_lang: str, target_lang: str):
+    """
+    Load a Helsinki NLP translation pipeline for a language pair (cached per process).
+    
+    Args:
+        source_lang: Source language code
+        target_lang: Target language code
+    
+    Returns:
+        HuggingFace translation pipeline
+    """
+    def _load():
+        from transformers import pipeline
+        return pipeline("translation", model=f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}")
+
+    return model_cache.get_model(mt_model_key(source_lang, target_lang), _load)
+
+
+def preload_model(model_key: str) -> bool:
+    """
+    Load a model by its routing key so the first job on this worker finds it warm.
+    
+    Args:
+        model_key: Routing key, e.g. 'asr.whisper.base' or 'mt.en-es'
+    
+    Returns:
+        True if the model was loaded, False if the key is unknown or loading failed
+    """
+    try:
+        kind, _, name = model_key.partition(".")
+        if kind == "asr":
+            backend, _, model_size = name.rpartition(".")
+            get_asr_backend(model_size, backend or None)
+        elif kind == "mt":
+            source_lang, target_lang = name.split("-", 1)
+            load_translation_pipeline(source_lang, target_lang)
+        else:
+            logger.warning(f"Unknown model key {model_key}, not preloading")
+            return False
+        logger.info(f"Preloaded model {model_key}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to preload model {model_key}: {str(e)}")
+        return False
+
+
 def load_audio_without_ffmpeg(audio_path: str, sr: int = 16000):
     """
     Load audio file without requiring ffmpeg binary.
@@ -42,22 +108,79 @@ def load_audio_without_ffmpeg(audio_path: str, sr: int = 16000):
         # Convert to mono if stereo
         if len(audio.shape) > 1:
             audio = audio.mean(axis=1)
-        # Resample if needed (simple approach - just use as-is for now)
+        # Resample to the rate the caller expects (Whisper assumes 16 kHz)
+        if file_sr != sr:
+            from .dub_assembly import resample
+            audio = resample(audio, file_sr, sr)
         return audio.astype('float32')
     except Exception as e:
         logger.warning(f"Failed to load audio with soundfile: {e}")
         return None
 
 
+def load_audio_with_ffmpeg(audio_path: str, sr: int = 16000):
+    """
+    Decode any file ffmpeg can read (MP3, M4A, video containers) to mono float32.
+    
+    Args:
+        audio_path: Path to audio or video file
+        sr: Sample rate (default 16000 Hz for Whisper)
+    
+    Returns:
+        numpy array of audio samples, or None if ffmpeg is missing or decoding failed
+    """
+    import ffmpeg
+    import numpy as np
+    from .resource_limits import ffmpeg_slot
+    
+    try:
+        stream = ffmpeg.input(audio_path).output("-", format="s16le", acodec="pcm_s16le", ac=1, ar=sr, loglevel="error")
+        with ffmpeg_slot():
+            out, _ = ffmpeg.run(stream, capture_stdout=True, capture_stderr=True)
+    except (ffmpeg.Error, OSError) as e:
+        logger.warning(f"Failed to decode audio with ffmpeg: {e}")
+        return None
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def detect_source_language(session: Session, job: Job, backend, audio) -> str:
+    """
+    Identify the source language on a short prefix and cache it on the job.
+    
+    A retried job reuses the cached result instead of running detection again.
+    
+    Args:
+        session: SQLAlchemy database session
+        job: Job being processed
+        backend: Loaded ASR backend
+        audio: 16 kHz mono float32 array
+    
+    Returns:
+        ISO 639-1 language code
+    """
+    metadata = json.loads(job.job_metadata) if job.job_metadata else {}
+    if metadata.get("language_id"):
+        return metadata["language_id"]["language"]
+    
+    language, probability = identify_language(backend, audio)
+    logger.info(f"Job {job.id}: Identified language '{language}' (p={probability:.2f})")
+    
+    metadata["language_id"] = {"language": language, "probability": probability}
+    job.job_metadata = json.dumps(metadata)
+    session.commit()
+    return language
+
+
 def transcribe_audio(
     session: Session,
     job_id: str,
     input_file_path: str,
     language: Optional[str] = None,
-    model_size: str = "base"
+    model_size: str = "base",
+    asr_backend: Optional[str] = None
 ) -> bool:
     """
-    Transcribe audio file using OpenAI Whisper.
+    Transcribe audio file with the configured ASR backend (Whisper by default).
     
     Args:
         session: SQLAlchemy database session
@@ -65,6 +188,7 @@ def transcribe_audio(
         input_file_path: Path to audio file to transcribe
         language: Optional ISO 639-1 language code (e.g., 'en', 'es', 'fr')
         model_size: Whisper model size ('tiny', 'base', 'small', 'medium', 'large')
+        asr_backend: ASR backend name ('whisper', 'faster-whisper'), defaults to ASR_BACKEND
     
     Returns:
         bool: True if transcription succeeded, False otherwise
@@ -90,9 +214,9 @@ def transcribe_audio(
             session.commit()
             return False
         
-        # Load Whisper model and transcribe
-        logger.info(f"Job {job_id}: Loading Whisper model '{model_size}'...")
-        model = whisper.load_model(model_size)
+        # Load ASR backend and transcribe
+        logger.info(f"Job {job_id}: Loading ASR model '{model_size}'...")
+        backend = get_asr_backend(model_size, asr_backend)
         
         logger.info(f"Job {job_id}: Transcribing audio file ({file_path.stat().st_size} bytes)...")
         
@@ -100,10 +224,17 @@ def transcribe_audio(
         audio = load_audio_without_ffmpeg(str(file_path))
         if audio is not None:
             logger.info(f"Job {job_id}: Using soundfile for audio loading (no ffmpeg required)")
-            result = model.transcribe(audio, language=language, verbose=False)
         else:
-            logger.info(f"Job {job_id}: Falling back to standard Whisper audio loading (requires ffmpeg)")
-            result = model.transcribe(str(file_path), language=language, verbose=False)
+            logger.info(f"Job {job_id}: Decoding audio with ffmpeg")
+            audio = load_audio_with_ffmpeg(str(file_path))
+        if audio is not None:
+            # Language ID on sampled windows, whichever loader decoded the audio
+            if language is None:
+                language = detect_source_language(session, job, backend, audio)
+            result = backend.transcribe(audio, language=language)
+        else:
+            logger.info(f"Job {job_id}: Falling back to the ASR backend's own audio loading")
+            result = backend.transcribe(str(file_path), language=language)
         
         # Extract transcription and metadata
         transcription_text = result.get("text", "")
@@ -131,13 +262,17 @@ def transcribe_audio(
         # Update job with results
         job.status = JobStatus.COMPLETED
         job.output_file = output_file_path
-        job.job_metadata = json.dumps({
+        # Merge, so request options and the cached language_id survive
+        metadata = json.loads(job.job_metadata) if job.job_metadata else {}
+        metadata.update({
             "model_size": model_size,
+            "asr_backend": backend.name,
             "language": language_detected,
             "detected_language": language_detected,
             "segments_count": len(result.get("segments", [])),
             "audio_duration": result.get("duration", 0)
         })
+        job.job_metadata = json.dumps(metadata)
         session.commit()
         
         logger.info(f"Job {job_id}: Status updated to COMPLETED")
@@ -173,15 +308,10 @@ def translate_text(session: Session, job_id: str, text: str, source_lang: str =
         Translated text, or None if translation failed
     """
     try:
-        from transformers import pipeline
-        
         logger.info(f"Job {job_id}: Loading translation model {source_lang}->{target_lang}")
         
-        # Helsinki NLP model naming: Helsinki-NLP/Tatoeba-MT-models/tatoeba-mt-{src}-{tgt}
-        # Common models available on HuggingFace
-        model_name = f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}"
-        
-        translator = pipeline("translation", model=model_name)
+        # Helsinki NLP model naming: Helsinki-NLP/opus-mt-{src}-{tgt}
+        translator = load_translation_pipeline(source_lang, target_lang)
         logger.info(f"Job {job_id}: Translating {len(text)} characters from {source_lang} to {target_lang}")
         
         # Translate in chunks to avoid memory issues (max 512 tokens)
@@ -190,7 +320,7 @@ def translate_text(session: Session, job_id: str, text: str, source_lang: str =
         
         translated_chunks = []
         for i, chunk in enumerate(chunks):
-            logger.debug(f"Job {job_id}: Translating chunk {i+1}/{len(chunks)}")
+            logger.debug("Job %s: Translating chunk %d/%d", job_id, i + 1, len(chunks))
             result = translator(chunk, max_length=1024)
             translated_chunks.append(result[0]['translation_text'])
         
@@ -203,6 +333,59 @@ def translate_text(session: Session, job_id: str, text: str, source_lang: str =
         return None
 
 
+def has_timestamps(segments: list) -> bool:
+    """Check whether segments carry usable start/end times."""
+    return bool(segments) and any(segment.get("end", 0) for segment in segments)
+
+
+def translate_segments(
+    session: Session,
+    job_id: str,
+    segments: list,
+    source_lang: str = "en",
+    target_lang: str = "es"
+) -> Optional[list]:
+    """
+    Translate transcript segments in one batched call, keeping their timestamps.
+    
+    Args:
+        session: SQLAlchemy database session
+        job_id: Job ID for logging
+        segments: Transcript segments with 'start', 'end' and 'text'
+        source_lang: Source language code
+        target_lang: Target language code
+    
+    Returns:
+        Segments with 'translated_text' added, or None if translation failed
+    """
+    try:
+        translator = load_translation_pipeline(source_lang, target_lang)
+        texts = [segment.get("text", "").strip() for segment in segments]
+        indexes = [i for i, text in enumerate(texts) if text]
+        logger.info(f"Job {job_id}: Translating {len(indexes)} segments from {source_lang} to {target_lang}")
+        
+        translated = list(texts)
+        if indexes:
+            results = translator([texts[i] for i in indexes], max_length=512)
+            for i, result in zip(indexes, results):
+                translated[i] = result['translation_text']
+        
+        return [
+            {
+                "id": segment.get("id", i),
+                "start": segment.get("start", 0.0),
+                "end": segment.get("end", 0.0),
+                "text": texts[i],
+                "translated_text": translated[i],
+            }
+            for i, segment in enumerate(segments)
+        ]
+    
+    except Exception as e:
+        logger.error(f"Job {job_id}: Segment translation failed: {str(e)}", exc_info=True)
+        return None
+
+
 def translate_from_transcription(
     session: Session,
     job_id: str,
@@ -279,8 +462,16 @@ def translate_from_transcription(
             session.commit()
             return True
         
-        # Perform translation
-        translated_text = translate_text(session, job_id, original_text, source_lang, target_lang)
+        # Perform translation, per segment when timestamps are available
+        segments = transcription_data.get("segments") or []
+        translated_segments = []
+        if segments:
+            translated_segments = translate_segments(session, job_id, segments, source_lang, target_lang)
+            translated_text = None
+            if translated_segments is not None:
+                translated_text = " ".join(s["translated_text"] for s in translated_segments if s["translated_text"])
+        else:
+            translated_text = translate_text(session, job_id, original_text, source_lang, target_lang)
         
         if translated_text is None:
             raise Exception("Translation returned None")
@@ -296,7 +487,8 @@ def translate_from_transcription(
             "target_language": target_lang,
             "original_length": len(original_text),
             "translated_length": len(translated_text),
-            "model": f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}"
+            "model": f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}",
+            "segments": translated_segments
         }
         
         with open(output_file_path, 'w', encoding='utf-8') as f:
@@ -509,23 +701,28 @@ def synthesize_audio(
     session: Session,
     job_id: str,
     input_file_path: str,
-    language: str = "en"
+    language: str = "en",
+    voice_id: Optional[str] = None,
+    speed: float = 1.0
 ) -> bool:
     """
-    Synthesize speech from translated text using pyttsx3.
+    Synthesize speech from translated text using pyttsx3, one segment at a time.
+    
+    Segments from the translation file are rendered in parallel on the TTS
+    pool and joined into one WAV track.
     
     Args:
         session: SQLAlchemy database session
         job_id: Job ID to update with results
         input_file_path: Path to translation JSON file containing text to synthesize
         language: Language code for synthesis
+        voice_id: Engine voice ID, or None/'default' for the engine default
+        speed: Speaking rate multiplier
     
     Returns:
         bool: True if synthesis succeeded, False otherwise
     """
     try:
-        import pyttsx3
-        
         # Get the job record
         job = session.query(Job).filter(Job.id == job_id).first()
         if not job:
@@ -583,20 +780,31 @@ def synthesize_audio(
         
         logger.info(f"Job {job_id}: Synthesizing {len(text_to_synthesize)} characters of text")
         
-        # Initialize TTS engine
-        engine = pyttsx3.init()
-        
-        # Set language/voice properties
-        engine.setProperty('rate', 150)  # Speed
-        engine.setProperty('volume', 0.9)  # Volume
+        # Synthesize per segment; translations without segments become one segment
+        segments = translation_data.get("segments") or [{"translated_text": text_to_synthesize}]
+        texts = [segment.get("translated_text") or segment.get("text", "") for segment in segments]
         
-        # Save to output file
         output_file_name = f"{translation_path.stem}_audio.wav"
         output_file_path = translation_path.parent / output_file_name
+        segment_dir = translation_path.parent / f"{translation_path.stem}_segments"
         
-        # Generate audio
-        engine.save_to_file(text_to_synthesize, str(output_file_path))
-        engine.runAndWait()
+        def report_progress(done: int, total: int):
+            job.current_step = f"Synthesized {done}/{total} segments"
+            session.commit()
+        
+        segment_paths = synthesize_segments(
+            texts,
+            str(segment_dir),
+            progress_callback=report_progress,
+            voice_id=voice_id,
+            language=language,
+            speed=speed,
+        )
+        if has_timestamps(segments):
+            assemble_dub_track(segments, segment_paths, str(output_file_path))
+        else:
+            concatenate_wavs(segment_paths, str(output_file_path))
+        shutil.rmtree(segment_dir, ignore_errors=True)
         
         # Verify file was created
         if not output_file_path.exists():
@@ -612,6 +820,9 @@ def synthesize_audio(
             "language": language,
             "text_length": len(text_to_synthesize),
             "audio_size_bytes": file_size,
+            "segments_count": len(segments),
+            "voice_id": voice_id or "default",
+            "speed": speed,
             "synthesis_engine": "pyttsx3",
             "source_languages": {
                 "original": translation_data.get("source_language", "en"),
@@ -641,6 +852,9 @@ def video_translate_pipeline(
     target_language: str = "es",
     model_size: str = "base",
     enable_dubbing: bool = True,
+    asr_backend: Optional[str] = None,
+    output_mode: str = "dub",
+    mux_subtitles: bool = False,
 ) -> bool:
     """
     End-to-end video translation pipeline.
@@ -652,6 +866,9 @@ def video_translate_pipeline(
     4. Synthesize new audio from translated text
     5. Merge new audio back into video
     
+    With output_mode='subtitles' steps 4-5 are replaced by writing SRT/WebVTT
+    files (optionally muxed as a soft subtitle stream without re-encoding).
+    
     Args:
         session: Database session
         job_id: Job ID for tracking
@@ -660,6 +877,9 @@ def video_translate_pipeline(
         target_language: Target language code
         model_size: Whisper model size ('tiny', 'base', 'small', 'medium', 'large')
         enable_dubbing: Whether to dub the video (vs just generating subtitles)
+        asr_backend: ASR backend name, defaults to ASR_BACKEND
+        output_mode: 'dub' for a dubbed video, 'subtitles' for subtitle files only
+        mux_subtitles: In subtitles mode, also produce a video with a soft subtitle stream
         
     Returns:
         True if successful, False otherwise
@@ -674,7 +894,11 @@ def video_translate_pipeline(
         logger.error(f"Job {job_id}: Job not found")
         return False
     
+    stages = StageRecorder(job_id)
     try:
+        if output_mode not in ("dub", "subtitles"):
+            raise ValueError(f"Unknown output mode '{output_mode}'")
+        
         job.status = JobStatus.PROCESSING
         session.commit()
         
@@ -687,6 +911,7 @@ def video_translate_pipeline(
         logger.info(f"  Source language: {source_language}")
         logger.info(f"  Target language: {target_language}")
         logger.info(f"  Enable dubbing: {enable_dubbing}")
+        logger.info(f"  Output mode: {output_mode}")
         
         # Step 1: Extract audio from video
         logger.info(f"Job {job_id}: Step 1/5 - Extracting audio from video")
@@ -696,42 +921,57 @@ def video_translate_pipeline(
         temp_dir.mkdir(exist_ok=True, parents=True)
         
         audio_extract_path = temp_dir / "extracted_audio.wav"
-        extracted_audio = processor.extract_audio(
-            str(video_path),
-            str(audio_extract_path),
-            audio_format='wav',
-            sample_rate=16000
-        )
-        
-        if not extracted_audio:
-            raise Exception("Failed to extract audio from video")
+        with stages.stage("extract") as span:
+            extracted_audio = processor.extract_audio(
+                str(video_path),
+                str(audio_extract_path),
+                audio_format='wav',
+                sample_rate=16000
+            )
+            
+            if not extracted_audio:
+                raise Exception("Failed to extract audio from video")
+            
+            # Load audio without ffmpeg (use extracted WAV)
+            audio_data = load_audio_without_ffmpeg(extracted_audio, sr=16000)
+            if audio_data is None:
+                raise Exception("Failed to load extracted audio")
+            audio_seconds = len(audio_data) / 16000
+            span.audio_seconds = audio_seconds
         
         logger.info(f"Job {job_id}: Audio extracted successfully ({Path(extracted_audio).stat().st_size} bytes)")
         
         # Step 2: Transcribe audio
         logger.info(f"Job {job_id}: Step 2/5 - Transcribing audio to text")
         
-        # Load audio without ffmpeg (use extracted WAV)
-        audio_data = load_audio_without_ffmpeg(extracted_audio, sr=16000)
-        if audio_data is None:
-            raise Exception("Failed to load extracted audio")
-        
-        # Transcribe using Whisper
-        model = whisper.load_model(model_size)
-        transcribe_result = model.transcribe(
-            audio_data,
-            language=None if source_language == "auto" else source_language,
-            verbose=False,
-            temperature=0.0
-        )
+        # Transcribe with the selected ASR backend
+        with stages.stage("model_load"):
+            backend = get_asr_backend(model_size, asr_backend)
+        if source_language == "auto":
+            with stages.stage("language_id"):
+                source_language = detect_source_language(session, job, backend, audio_data)
+        
+        with stages.stage("asr", audio_seconds=audio_seconds):
+            transcribe_result = backend.transcribe(
+                audio_data,
+                language=source_language,
+                temperature=0.0
+            )
         
         original_text = transcribe_result.get("text", "").strip()
         
         if not original_text:
             logger.warning(f"Job {job_id}: No text found in video audio")
-            # Create placeholder output
-            output_video_path = video_path.parent / f"{video_path.stem}_translated{video_path.suffix}"
-            shutil.copy(str(video_path), str(output_video_path))
+            if output_mode == "subtitles":
+                # Empty subtitle files; the source video is never duplicated in this mode
+                subtitle_paths = write_subtitles([], str(video_path.parent / f"{video_path.stem}_{target_language}"))
+                output_video_path = Path(subtitle_paths["vtt"])
+            else:
+                # Nothing to dub: the output is the unchanged source
+                output_video_path = Path(link_or_reference(
+                    str(video_path),
+                    str(video_path.parent / f"{video_path.stem}_translated{video_path.suffix}"),
+                ))
             
             job.status = JobStatus.COMPLETED
             job.output_file = output_video_path.as_posix()
@@ -740,7 +980,8 @@ def video_translate_pipeline(
                 "target_language": target_language,
                 "original_text": "",
                 "translated_text": "",
-                "status": "no_audio"
+                "status": "no_audio",
+                "stages": stages.as_dict(),
             })
             session.commit()
             return True
@@ -750,31 +991,64 @@ def video_translate_pipeline(
         # Step 3: Translate text
         logger.info(f"Job {job_id}: Step 3/5 - Translating text")
         
-        try:
-            from transformers import pipeline as hf_pipeline
-            
-            # Use Helsinki NLP for translation
-            translation_model = f"Helsinki-NLP/opus-mt-{source_language if source_language != 'auto' else 'en'}-{target_language}"
-            translator = hf_pipeline("translation", model=translation_model)
-            
-            # Split long text into chunks (512 tokens max)
-            text_chunks = [original_text[i:i+500] for i in range(0, len(original_text), 500)]
-            translated_chunks = []
-            
-            for chunk in text_chunks:
-                if chunk.strip():
-                    result = translator(chunk, max_length=512)
-                    translated_text = result[0].get("translation_text", chunk)
-                    translated_chunks.append(translated_text)
-            
-            translated_text = " ".join(translated_chunks)
-            
-        except Exception as e:
-            logger.warning(f"Job {job_id}: Translation failed, using original text: {str(e)}")
+        with stages.stage("mt", audio_seconds=audio_seconds):
+            translated_segments = translate_segments(
+                session, job_id, transcribe_result.get("segments", []), source_language, target_language
+            )
+        if translated_segments:
+            translated_text = " ".join(s["translated_text"] for s in translated_segments if s["translated_text"])
+        else:
+            logger.warning(f"Job {job_id}: Translation failed, using original text")
+            translated_segments = [{"text": original_text, "translated_text": original_text}]
             translated_text = original_text
         
         logger.info(f"Job {job_id}: Translation complete ({len(translated_text)} characters)")
         
+        # Subtitles-only fast path: no synthesis, no audio mux, no copy of the source video
+        if output_mode == "subtitles":
+            logger.info(f"Job {job_id}: Step 4/4 - Writing subtitles")
+            with stages.stage("subtitles"):
+                subtitle_paths = write_subtitles(
+                    translated_segments,
+                    str(video_path.parent / f"{video_path.stem}_{target_language}"),
+                    duration=audio_seconds,
+                )
+            output_path = Path(subtitle_paths["vtt"])
+            
+            if mux_subtitles:
+                with stages.stage("mux"):
+                    muxed_video = processor.mux_subtitles(
+                        str(video_path),
+                        subtitle_paths["srt"],
+                        str(video_path.parent / f"{video_path.stem}_subtitled{video_path.suffix}"),
+                        language=target_language,
+                    )
+                if muxed_video:
+                    output_path = Path(muxed_video)
+                else:
+                    logger.warning(f"Job {job_id}: Subtitle mux failed, returning subtitle files only")
+            
+            job.status = JobStatus.COMPLETED
+            job.output_file = output_path.as_posix()
+            job.job_metadata = json.dumps({
+                "source_language": source_language,
+                "target_language": target_language,
+                "original_text": original_text[:1000],
+                "translated_text": translated_text[:1000],
+                "output_mode": "subtitles",
+                "subtitle_files": subtitle_paths,
+                "dubbed": False,
+                "output_size_bytes": output_path.stat().st_size,
+                "pipeline_status": "success",
+                "stages": stages.as_dict(),
+            })
+            session.commit()
+            
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            logger.info(f"Job {job_id}: Stage timings: {stages.summary()}")
+            logger.info(f"Job {job_id}: Subtitle job completed successfully ({output_path})")
+            return True
+        
         # Step 4: Synthesize new audio (if dubbing enabled)
         synthesized_audio_path = None
         
@@ -784,15 +1058,25 @@ def video_translate_pipeline(
             synthesized_audio_path = temp_dir / "synthesized_audio.wav"
             
             try:
-                import pyttsx3
-                
-                engine = pyttsx3.init()
-                engine.setProperty('rate', 150)
-                engine.setProperty('volume', 0.9)
-                engine.save_to_file(translated_text, str(synthesized_audio_path))
-                engine.runAndWait()
+                with stages.stage("tts", audio_seconds=audio_seconds):
+                    segment_paths = synthesize_segments(
+                        [s["translated_text"] for s in translated_segments],
+                        str(temp_dir / "segments"),
+                        language=target_language,
+                    )
+                with stages.stage("assemble", audio_seconds=audio_seconds):
+                    if has_timestamps(translated_segments):
+                        # Place each segment at its source timestamp over the full audio length
+                        dub_track = assemble_dub_track(
+                            translated_segments,
+                            segment_paths,
+                            str(synthesized_audio_path),
+                            total_duration=audio_seconds,
+                        )
+                    else:
+                        dub_track = concatenate_wavs(segment_paths, str(synthesized_audio_path))
                 
-                if synthesized_audio_path.exists():
+                if dub_track:
                     logger.info(f"Job {job_id}: Audio synthesis complete ({synthesized_audio_path.stat().st_size} bytes)")
                 else:
                     logger.warning(f"Job {job_id}: Synthesis failed, skipping dubbing")
@@ -808,23 +1092,29 @@ def video_translate_pipeline(
         logger.info(f"Job {job_id}: Step 5/5 - Merging audio with video")
         
         output_video_path = video_path.parent / f"{video_path.stem}_translated{video_path.suffix}"
+        merged_video = None
         
         if synthesized_audio_path and synthesized_audio_path.exists():
             # Merge dubbed audio with original video
-            merged_video = processor.merge_audio_video(
-                str(video_path),
-                str(synthesized_audio_path),
-                str(output_video_path),
-                video_codec='copy',
-                audio_codec='aac'
-            )
+            with stages.stage("mux", audio_seconds=audio_seconds):
+                merged_video = processor.merge_audio_video(
+                    str(video_path),
+                    str(synthesized_audio_path),
+                    str(output_video_path),
+                    video_codec='copy',
+                    audio_codec='aac',
+                    dub_language=target_language,
+                    original_language=source_language,
+                )
             
             if not merged_video:
                 logger.warning(f"Job {job_id}: Video merge failed, using original video")
-                shutil.copy(str(video_path), str(output_video_path))
         else:
-            logger.info(f"Job {job_id}: No dubbed audio available, copying original video")
-            shutil.copy(str(video_path), str(output_video_path))
+            logger.info(f"Job {job_id}: No dubbed audio available, using original video")
+        
+        if not merged_video:
+            # Unchanged content is linked or referenced, never copied
+            output_video_path = Path(link_or_reference(str(video_path), str(output_video_path)))
         
         if not output_video_path.exists():
             raise Exception("Output video file was not created")
@@ -840,13 +1130,16 @@ def video_translate_pipeline(
             "target_language": target_language,
             "original_text": original_text[:1000],  # Store preview
             "translated_text": translated_text[:1000],  # Store preview
-            "dubbed": synthesized_audio_path is not None,
+            "dubbed": merged_video is not None,
+            "output_is_source": output_video_path.resolve() == Path(video_path).resolve(),
             "output_size_bytes": output_size,
-            "pipeline_status": "success"
+            "pipeline_status": "success",
+            "stages": stages.as_dict(),
         })
         session.commit()
         
         logger.info(f"Job {job_id}: Video translation job completed successfully")
+        logger.info(f"Job {job_id}: Stage timings: {stages.summary()}")
         
         # Cleanup temp directory
         try:
@@ -863,6 +1156,10 @@ def video_translate_pipeline(
         if job:
             job.status = JobStatus.FAILED
             job.error_message = f"Video translation error: {str(e)}"
+            # Keep the timings of the stages that ran, including the one that failed
+            metadata = json.loads(job.job_metadata) if job.job_metadata else {}
+            metadata["stages"] = stages.as_dict()
+            job.job_metadata = json.dumps(metadata)
             session.commit()
         
         # Cleanup temp files on failure
@@ -874,3 +1171,284 @@ def video_translate_pipeline(
             pass
         
         return False
+
+
+def chunked_work_dir(input_file_path: str) -> Path:
+    """Directory for the pieces of a chunked job, next to the input so every worker can reach it."""
+    video_path = Path(input_file_path)
+    return video_path.parent / f"{video_path.stem}_chunks"
+
+
+def prepare_chunked_video(
+    session: Session,
+    job_id: str,
+    input_file_path: str,
+    duration: float,
+    source_language: str = "auto",
+    model_size: str = "base",
+    asr_backend: Optional[str] = None,
+) -> tuple:
+    """
+    Plan the pieces of a long video for segment-parallel processing.
+    
+    The source language is identified once here, so every piece translates
+    with the same model pair.
+    
+    Args:
+        session: Database session
+        job_id: Job ID for tracking
+        input_file_path: Path to input video file
+        duration: Video duration in seconds
+        source_language: Source language code or 'auto'
+        model_size: Whisper model size
+        asr_backend: ASR backend name, defaults to ASR_BACKEND
+    
+    Returns:
+        (pieces, source language) where pieces come from plan_pieces()
+    """
+    from .video_chunking import CHUNK_SECONDS, plan_pieces
+    from .video_processor import VideoProcessor
+    
+    job = session.query(Job).filter(Job.id == job_id).first()
+    work_dir = chunked_work_dir(input_file_path)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    
+    if source_language == "auto":
+        prefix_audio = VideoProcessor().extract_audio(
+            input_file_path,
+            str(work_dir / "language_id.wav"),
+            duration=CHUNK_SECONDS,
+        )
+        audio = load_audio_without_ffmpeg(prefix_audio) if prefix_audio else None
+        if audio is None:
+            raise Exception("Failed to extract audio for language identification")
+        source_language = detect_source_language(session, job, get_asr_backend(model_size, asr_backend), audio)
+    
+    pieces = plan_pieces(duration)
+    
+    metadata = json.loads(job.job_metadata) if job.job_metadata else {}
+    metadata["chunks"] = {"count": len(pieces)}
+    job.job_metadata = json.dumps(metadata)
+    session.commit()
+    
+    logger.info(f"Job {job_id}: Processing {len(pieces)} pieces in parallel ({source_language})")
+    return pieces, source_language
+
+
+def translate_video_piece(
+    session: Session,
+    job_id: str,
+    piece: dict,
+    input_file_path: str,
+    source_language: str,
+    target_language: str,
+    model_size: str = "base",
+    asr_backend: Optional[str] = None,
+    output_mode: str = "dub",
+) -> dict:
+    """
+    Run extract, ASR, MT and (in dub mode) TTS and dub assembly for one piece of a chunked job.
+    
+    Args:
+        session: Database session
+        job_id: Job ID for tracking
+        piece: Piece from plan_pieces()
+        input_file_path: Path to the original video (audio is read from it with overlap)
+        source_language: Source language code (already identified)
+        target_language: Target language code
+        model_size: Whisper model size
+        asr_backend: ASR backend name, defaults to ASR_BACKEND
+        output_mode: 'dub' or 'subtitles'
+    
+    Returns:
+        dict with 'index', 'start', 'end', 'path' (PCM dub track of the piece, or None
+        in subtitles mode), 'segments' (translated, in source time) and
+        'stages' (stage timings)
+    """
+    import numpy as np
+    from .video_chunking import PIECE_SAMPLE_RATE, keep_own_segments, shift_segments, transcription_window
+    from .video_processor import VideoProcessor
+    
+    processor = VideoProcessor()
+    stages = StageRecorder(job_id)
+    index = piece["index"]
+    piece_dir = chunked_work_dir(input_file_path) / f"piece_{index:04d}"
+    piece_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Transcribe the piece plus overlap, then keep only the segments centered in the piece
+    window_start, window_duration = transcription_window(piece)
+    piece_duration = piece["end"] - piece["start"]
+    with stages.stage("extract", audio_seconds=window_duration):
+        extracted = processor.extract_audio(
+            input_file_path,
+            str(piece_dir / "audio.wav"),
+            start=window_start,
+            duration=window_duration,
+        )
+        audio = load_audio_without_ffmpeg(extracted) if extracted else None
+    if audio is None:
+        raise Exception(f"Failed to extract audio for piece {index}")
+    
+    with stages.stage("model_load"):
+        backend = get_asr_backend(model_size, asr_backend)
+    with stages.stage("asr", audio_seconds=window_duration):
+        result = backend.transcribe(audio, language=source_language, temperature=0.0)
+    segments = keep_own_segments(shift_segments(result.get("segments", []), window_start), piece)
+    
+    with stages.stage("mt", audio_seconds=piece_duration):
+        translated_segments = translate_segments(session, job_id, segments, source_language, target_language) or []
+    logger.info(f"Job {job_id}: Piece {index} transcribed and translated ({len(translated_segments)} segments)")
+    
+    piece_output = None
+    if output_mode == "dub":
+        # Every piece gets a dub track, silent if it has no speech, at the shared piece rate
+        local_segments = shift_segments(translated_segments, -piece["start"])
+        with stages.stage("tts", audio_seconds=piece_duration):
+            segment_paths = synthesize_segments(
+                [s["translated_text"] for s in local_segments],
+                str(piece_dir / "segments"),
+                language=target_language,
+            )
+        dub_path = str(piece_dir / "dub.wav")
+        with stages.stage("assemble", audio_seconds=piece_duration):
+            if not assemble_dub_track(local_segments, segment_paths, dub_path,
+                                      total_duration=piece_duration, sample_rate=PIECE_SAMPLE_RATE):
+                import soundfile as sf
+                sf.write(dub_path, np.zeros(int(piece_duration * PIECE_SAMPLE_RATE), dtype=np.float32),
+                         PIECE_SAMPLE_RATE, subtype='PCM_16')
+        piece_output = dub_path
+    
+    record_piece_done(session, job_id, piece["count"])
+    
+    return {
+        "index": index,
+        "start": piece["start"],
+        "end": piece["end"],
+        "path": piece_output,
+        "segments": translated_segments,
+        "stages": stages.as_dict(),
+    }
+
+
+def record_piece_done(session: Session, job_id: str, count: int):
+    """
+    Advance a chunked job's progress by one piece.
+
+    The increment is a single UPDATE, so pieces finishing at the same time
+    cannot overwrite each other. The row stays locked until commit, so the
+    step text written next matches the count just reached.
+    """
+    step = 80.0 / count
+    session.query(Job).filter(Job.id == job_id).update(
+        {Job.progress_percentage: Job.progress_percentage + step}, synchronize_session=False
+    )
+    progress = session.query(Job.progress_percentage).filter(Job.id == job_id).scalar()
+    if progress is not None:
+        completed = min(count, round((progress - 10.0) / step))
+        session.query(Job).filter(Job.id == job_id).update(
+            {Job.current_step: f"Processed piece {completed}/{count}"}, synchronize_session=False
+        )
+    session.commit()
+
+
+def finalize_chunked_video(
+    session: Session,
+    job_id: str,
+    piece_results: list,
+    input_file_path: str,
+    source_language: str,
+    target_language: str,
+    output_mode: str = "dub",
+    mux_subtitles: bool = False,
+) -> bool:
+    """
+    Join the processed pieces of a chunked job into its output.
+    
+    The pieces' PCM dub tracks are joined into one track, which is muxed onto
+    the input video in one pass (video copied, audio encoded once). In
+    subtitles mode the pieces' segments become one SRT/WebVTT pair.
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    from .video_chunking import join_piece_tracks
+    from .video_processor import VideoProcessor
+    
+    job = session.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        logger.error(f"Job {job_id}: Job not found")
+        return False
+    
+    video_path = Path(input_file_path)
+    work_dir = chunked_work_dir(input_file_path)
+    stages = StageRecorder(job_id)
+    
+    try:
+        piece_results = sorted(piece_results, key=lambda r: r["index"])
+        segments = [segment for result in piece_results for segment in result["segments"]]
+        
+        if output_mode == "subtitles":
+            with stages.stage("subtitles"):
+                subtitle_paths = write_subtitles(segments, str(video_path.parent / f"{video_path.stem}_{target_language}"))
+            output_path = Path(subtitle_paths["vtt"])
+            if mux_subtitles:
+                with stages.stage("mux"):
+                    muxed_video = VideoProcessor().mux_subtitles(
+                        str(video_path),
+                        subtitle_paths["srt"],
+                        str(video_path.parent / f"{video_path.stem}_subtitled{video_path.suffix}"),
+                        language=target_language,
+                    )
+                if muxed_video:
+                    output_path = Path(muxed_video)
+        else:
+            processor = VideoProcessor()
+            with stages.stage("concat"):
+                dub_path = join_piece_tracks(
+                    [(result["start"], result["path"]) for result in piece_results],
+                    str(work_dir / "dub.wav"),
+                    piece_results[-1]["end"],
+                )
+            with stages.stage("mux"):
+                merged_video = processor.merge_audio_video(
+                    str(video_path),
+                    dub_path,
+                    str(video_path.parent / f"{video_path.stem}_translated{video_path.suffix}"),
+                    dub_language=target_language,
+                    original_language=source_language,
+                )
+            if not merged_video:
+                raise Exception("Failed to mux the joined dub track")
+            output_path = Path(merged_video)
+        
+        # Piece stages are summed across pieces: total worker time, not elapsed time
+        stage_totals = merge_stage_dicts([result.get("stages", {}) for result in piece_results] + [stages.as_dict()])
+        
+        translated_text = " ".join(s["translated_text"] for s in segments if s.get("translated_text"))
+        job.status = JobStatus.COMPLETED
+        job.output_file = output_path.as_posix()
+        job.job_metadata = json.dumps({
+            "source_language": source_language,
+            "target_language": target_language,
+            "original_text": " ".join(s.get("text", "") for s in segments)[:1000],
+            "translated_text": translated_text[:1000],
+            "output_mode": output_mode,
+            "dubbed": output_mode == "dub",
+            "chunks": {"count": len(piece_results)},
+            "output_size_bytes": output_path.stat().st_size,
+            "pipeline_status": "success",
+            "stages": stage_totals,
+        })
+        session.commit()
+        logger.info(f"Job {job_id}: Chunked video translation complete ({output_path})")
+        return True
+    
+    except Exception as e:
+        logger.error(f"Job {job_id}: Joining pieces failed: {str(e)}", exc_info=True)
+        job.status = JobStatus.FAILED
+        job.error_message = f"Video translation error: {str(e)}"
+        session.commit()
+        return False
+    
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
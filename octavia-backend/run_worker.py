@@ -8,14 +8,26 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app.celery_tasks import app as celery_app
+from app.task_routing import worker_queues
 
 if __name__ == "__main__":
+    # Warm model queues (WORKER_WARM_MODELS, e.g. "asr.whisper.base,mt.en-es")
+    # come first; the priority queues are always consumed as the overflow
+    queues = ",".join(worker_queues())
+
+    # prefork (default) runs one job per child process. Use WORKER_POOL=threads
+    # on ASR/TTS workers: cross-job Whisper batching (WHISPER_BATCHING) only
+    # batches jobs running as threads of one process, and supervised TTS engine
+    # processes cannot be started from (daemonic) prefork children.
+    pool = os.environ.get("WORKER_POOL", "prefork")
+
     # Start worker with concurrency settings
     celery_app.worker_main([
         "worker",
         "--loglevel=info",
-        "--concurrency=4",  # Number of worker processes
-        "--queues=urgent,default,low",  # Listen to all queues
+        f"--pool={pool}",
+        "--concurrency=4",  # Number of worker processes (threads with WORKER_POOL=threads)
+        f"--queues={queues}",
         "--time-limit=1800",  # 30 minute hard limit per task
         "--soft-time-limit=1500",  # 25 minute soft limit
         "--max-tasks-per-child=1000",  # Restart worker after 1000 tasks
@@ -0,0 +1,60 @@
+"""Micro-benchmark for password hashing throughput at the configured cost.
+
+Usage:
+    python scripts/benchmark_password_hash.py [--iterations 50] [--rounds 29000]
+
+Reports single-thread hashes/sec and aggregate hashes/sec through the
+dedicated password executor (PASSWORD_HASH_WORKERS threads).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=None, help="Override PASSWORD_HASH_ROUNDS")
+    args = parser.parse_args()
+
+    if args.rounds:
+        os.environ["PASSWORD_HASH_ROUNDS"] = str(args.rounds)
+
+    from app.core import security
+
+    password = "benchmark-password"
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        security.get_password_hash(password)
+    serial_elapsed = time.perf_counter() - start
+
+    async def run_concurrent():
+        # Stay within the executor's pending limit so no call is rejected
+        limit = asyncio.Semaphore(security.PASSWORD_HASH_MAX_PENDING)
+
+        async def one():
+            async with limit:
+                await security.get_password_hash_async(password)
+
+        await asyncio.gather(*(one() for _ in range(args.iterations)))
+
+    start = time.perf_counter()
+    asyncio.run(run_concurrent())
+    pooled_elapsed = time.perf_counter() - start
+
+    print(f"rounds:            {security.PASSWORD_HASH_ROUNDS}")
+    print(f"executor workers:  {security.PASSWORD_HASH_WORKERS}")
+    print(f"iterations:        {args.iterations}")
+    print(f"serial:            {args.iterations / serial_elapsed:.1f} hashes/sec "
+          f"({serial_elapsed / args.iterations * 1000:.1f} ms/hash)")
+    print(f"executor:          {args.iterations / pooled_elapsed:.1f} hashes/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""End-to-end pipeline benchmark on synthetic media.
+
+Usage:
+    python scripts/benchmark_pipeline.py [--durations 10,60] [--sample-rates 16000,44100]
+        [--channels 1,2] [--repeats 5] [--seed 0] [--real-models] [--model-size base]
+        [--output bench.json] [--baseline previous.json] [--threshold 0.2]
+
+For every combination of duration, sample rate and channel layout, the
+script generates speech-like audio (and a video when ffmpeg is installed).
+It then runs each pipeline stage separately: load, asr, mt, tts, assemble
+and subtitles, plus extract and mux with ffmpeg. With ffmpeg, it also runs
+the whole video_translate_pipeline against a throwaway SQLite database.
+
+Models are deterministic stubs by default, placed in the model cache, so
+the run measures the pipeline's own (non-ML) overhead. Pass --real-models
+to load Whisper, opus-mt and pyttsx3 instead.
+
+The JSON report has latency percentiles (ms) and throughput (audio seconds
+per wall second) per case and stage. Given --baseline, stages whose p50
+grew by more than --threshold are listed as regressions, and the script
+exits with 1.
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "scripts"))
+
+from generate_test_audio import speech_like_blocks, write_video, write_wav  # noqa: E402
+
+STUB_WORDS = "the quick brown fox jumps over a lazy dog while seven wizards quietly judge boxing".split()
+
+
+class StubASRBackend:
+    """Deterministic ASR stand-in: one segment per 3 s window, text derived from the window index."""
+
+    name = "stub"
+
+    def __init__(self, model_size: str = "base"):
+        self.model_size = model_size
+
+    def transcribe(self, audio, language=None, **options) -> dict:
+        duration = len(audio) / 16000
+        segments = []
+        for index, start in enumerate(np.arange(0.0, duration, 3.0)):
+            rng = random.Random(index)
+            text = " ".join(rng.choice(STUB_WORDS) for _ in range(6))
+            segments.append({"id": index, "start": float(start), "end": float(min(start + 2.5, duration)), "text": text})
+        return {
+            "text": " ".join(s["text"] for s in segments),
+            "language": language or "en",
+            "segments": segments,
+            "duration": duration,
+        }
+
+    def detect_language(self, audio):
+        return "en", 1.0
+
+
+def stub_translator(texts, max_length=512):
+    """Deterministic MT stand-in returning text of similar length."""
+    return [{"translation_text": " ".join(reversed(text.split()))} for text in texts]
+
+
+def stub_synthesize_segment(text, output_path, voice_id=None, speed=1.0):
+    """Deterministic TTS stand-in: 60 ms of tone per character at 22.05 kHz."""
+    import soundfile as sf
+
+    n = int(22050 * 0.06 * len(text) / speed)
+    t = np.arange(n) / 22050
+    sf.write(output_path, (0.3 * np.sin(2 * np.pi * 180 * t)).astype(np.float32), 22050, subtype='PCM_16')
+    return output_path
+
+
+def install_stubs(model_size: str):
+    """Place stub models in the model cache and route TTS to an in-process stub."""
+    from app import model_cache, speech_synthesis, tts_cache
+    from app.task_routing import asr_model_key, mt_model_key
+
+    model_cache.MODEL_CACHE_SIZE = 16
+    for backend in ("whisper", "faster-whisper"):
+        model_cache.put(asr_model_key(model_size, backend), StubASRBackend(model_size))
+    model_cache.put(mt_model_key("en", "es"), stub_translator)
+    speech_synthesis._synthesize_segment = stub_synthesize_segment
+    speech_synthesis._pool = ThreadPoolExecutor(max_workers=speech_synthesis.TTS_WORKERS)
+    tts_cache.TTS_CACHE_ENABLED = False
+
+
+def seed_everything(seed: int):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.manual_seed(seed)
+
+
+def has_ffmpeg() -> bool:
+    try:
+        return subprocess.run(["ffmpeg", "-version"], capture_output=True).returncode == 0
+    except OSError:
+        return False
+
+
+def percentiles(samples_ms: list) -> dict:
+    values = np.asarray(samples_ms)
+    return {
+        "runs": len(values),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p90_ms": round(float(np.percentile(values, 90)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+    }
+
+
+def run_stage(repeats: int, audio_seconds: float, fn) -> dict:
+    """Time fn() repeats times; throughput is audio seconds per wall second at the median."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    result = percentiles(timings)
+    result["throughput_x_realtime"] = round(audio_seconds / (result["p50_ms"] / 1000), 2) if result["p50_ms"] else None
+    return result
+
+
+def benchmark_case(work_dir: Path, duration: float, sample_rate: int, channels: int, args, ffmpeg_available: bool) -> dict:
+    from app import workers
+    from app.asr_backends import get_asr_backend
+    from app.dub_assembly import assemble_dub_track
+    from app.speech_synthesis import synthesize_segments
+    from app.subtitles import write_subtitles
+
+    seed_everything(args.seed)
+    case_dir = work_dir / f"{int(duration)}s_{sample_rate}hz_{channels}ch"
+    case_dir.mkdir(parents=True, exist_ok=True)
+    wav_path = case_dir / "input.wav"
+    write_wav(wav_path, speech_like_blocks(duration, sample_rate, channels, args.seed), sample_rate)
+
+    stages = {}
+    state = {}
+
+    def load():
+        state["audio"] = workers.load_audio_without_ffmpeg(str(wav_path), sr=16000)
+
+    def asr():
+        state["transcript"] = get_asr_backend(args.model_size).transcribe(state["audio"], language="en", temperature=0.0)
+
+    def mt():
+        state["segments"] = workers.translate_segments(None, "benchmark", state["transcript"]["segments"], "en", "es")
+
+    def tts():
+        state["paths"] = synthesize_segments(
+            [s["translated_text"] for s in state["segments"]], str(case_dir / "segments"), language="es"
+        )
+
+    def assemble():
+        assemble_dub_track(state["segments"], state["paths"], str(case_dir / "dub.wav"), total_duration=duration)
+
+    def subtitles():
+        write_subtitles(state["segments"], str(case_dir / "subtitles"), duration=duration)
+
+    for name, fn in (("load", load), ("asr", asr), ("mt", mt), ("tts", tts), ("assemble", assemble), ("subtitles", subtitles)):
+        stages[name] = run_stage(args.repeats, duration, fn)
+
+    result = {
+        "case": case_dir.name,
+        "media": {"duration": duration, "sample_rate": sample_rate, "channels": channels},
+        "stages": stages,
+    }
+
+    if ffmpeg_available:
+        from app.video_processor import VideoProcessor
+
+        processor = VideoProcessor()
+        video_path = case_dir / "input.mp4"
+        write_video(video_path, wav_path)
+
+        stages["extract"] = run_stage(args.repeats, duration, lambda: processor.extract_audio(
+            str(video_path), str(case_dir / "extracted.wav"), sample_rate=16000
+        ))
+        stages["mux"] = run_stage(args.repeats, duration, lambda: processor.merge_audio_video(
+            str(video_path), str(case_dir / "dub.wav"), str(case_dir / "muxed.mp4"), dub_language="es"
+        ))
+        stages["pipeline"], result["pipeline_stages"] = run_pipeline(video_path, duration, args)
+    else:
+        result["skipped"] = ["extract", "mux", "pipeline"]
+
+    return result
+
+
+def run_pipeline(video_path: Path, duration: float, args) -> tuple:
+    """Run video_translate_pipeline repeatedly; also returns its own per-stage p50 timings."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.db import Base
+    from app.job_model import Job
+    from app.workers import video_translate_pipeline
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[Job.__table__])
+    session = sessionmaker(bind=engine)()
+
+    timings, stage_walls = [], {}
+    for _ in range(args.repeats):
+        job = Job(user_id="benchmark", job_type="video_translate", input_file=str(video_path))
+        session.add(job)
+        session.commit()
+
+        start = time.perf_counter()
+        if not video_translate_pipeline(session, job.id, str(video_path), "en", "es", args.model_size):
+            raise RuntimeError(f"Pipeline failed: {job.error_message}")
+        timings.append((time.perf_counter() - start) * 1000)
+
+        for name, stats in json.loads(job.job_metadata).get("stages", {}).items():
+            stage_walls.setdefault(name, []).append(stats["wall_seconds"] * 1000)
+
+    session.close()
+    result = percentiles(timings)
+    result["throughput_x_realtime"] = round(duration / (result["p50_ms"] / 1000), 2)
+    return result, {name: round(float(np.percentile(values, 50)), 3) for name, values in stage_walls.items()}
+
+
+def find_regressions(report: dict, baseline: dict, threshold: float) -> list:
+    """Stages whose p50 grew by more than threshold relative to the baseline."""
+    previous = {
+        (case["case"], stage): stats["p50_ms"]
+        for case in baseline.get("cases", []) for stage, stats in case["stages"].items()
+    }
+    regressions = []
+    for case in report["cases"]:
+        for stage, stats in case["stages"].items():
+            before = previous.get((case["case"], stage))
+            if before and stats["p50_ms"] > before * (1 + threshold):
+                regressions.append({
+                    "case": case["case"],
+                    "stage": stage,
+                    "baseline_p50_ms": before,
+                    "p50_ms": stats["p50_ms"],
+                    "change": round(stats["p50_ms"] / before - 1, 3),
+                })
+    return regressions
+
+
+def parse_list(value: str, cast):
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--durations", default="10,60", help="Media durations in seconds")
+    parser.add_argument("--sample-rates", default="16000,44100")
+    parser.add_argument("--channels", default="1,2")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--real-models", action="store_true", help="Use real ASR/MT/TTS models instead of stubs")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 growth before flagging, e.g. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if not args.real_models:
+        install_stubs(args.model_size)
+    ffmpeg_available = has_ffmpeg()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "seed": args.seed,
+            "repeats": args.repeats,
+            "model_size": args.model_size,
+            "models": "real" if args.real_models else "stub",
+            "ffmpeg": ffmpeg_available,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "cases": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="octavia_bench_") as work_dir:
+        for duration in parse_list(args.durations, float):
+            for sample_rate in parse_list(args.sample_rates, int):
+                for channels in parse_list(args.channels, int):
+                    report["cases"].append(
+                        benchmark_case(Path(work_dir), duration, sample_rate, channels, args, ffmpeg_available)
+                    )
+
+    if args.baseline:
+        report["regressions"] = find_regressions(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+        print(f"Wrote {args.output}")
+    else:
+        print(output)
+
+    if report.get("regressions"):
+        for regression in report["regressions"]:
+            print(f"REGRESSION {regression['case']} {regression['stage']}: "
+                  f"{regression['baseline_p50_ms']:.1f} -> {regression['p50_ms']:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,220 @@
-"""Generate a short test WAV file (mono, 16kHz) for integration tests.
-Usage: python scripts/generate_test_audio.py [output_path]
+"""Generate synthetic test audio (and video) for integration tests and benchmarks.
+
+Usage:
+    python scripts/generate_test_audio.py [output_path]
+    python scripts/generate_test_audio.py out.wav --speech --duration 60 --sample-rate 44100 --channels 2 --seed 7
+    python scripts/generate_test_audio.py out.mp4 --speech --duration 60
+
+Without --speech a 440 Hz tone is written (the integration test fixture).
+--speech writes speech-like audio: phrases of syllables over a harmonic
+source with a moving pitch, fricative noise bursts and pauses. Output is
+generated and written in fixed-size float32 blocks, so memory does not grow
+with the duration, and depends only on the seed.
+A .mp4/.mkv/.mov output gets a test-pattern video track (requires ffmpeg).
 """
+import argparse
 import sys
 import wave
-import math
-import struct
+from pathlib import Path
 
-def generate_wav(path, duration=2.0, freq=440.0, sr=16000):
-    n_samples = int(sr * duration)
-    amplitude = 0.5 * 32767
-    with wave.open(path, 'w') as wf:
-        wf.setnchannels(1)
+import numpy as np
+
+
+# Frames generated and written per block
+BLOCK_FRAMES = 65536
+# Fricative noise is switched on or off per run of this many samples
+FRICATIVE_RUN = 2048
+
+
+def _collect(blocks, channels: int) -> np.ndarray:
+    blocks = list(blocks)
+    return np.concatenate(blocks) if blocks else np.zeros((0, channels), dtype=np.float32)
+
+
+def tone_blocks(duration: float = 2.0, freq: float = 440.0, sr: int = 16000, channels: int = 1,
+                block_frames: int = BLOCK_FRAMES):
+    """Sine tone in [-0.5, 0.5] as float32 blocks of shape (frames, channels)."""
+    n = int(sr * duration)
+    step = 2 * np.pi * freq / sr
+    offsets = np.arange(block_frames, dtype=np.float32) * np.float32(step)
+    for start in range(0, n, block_frames):
+        count = min(block_frames, n - start)
+        # Phase at the block start, wrapped so float32 keeps its precision
+        phase = np.float32((start * step) % (2 * np.pi))
+        block = np.float32(0.5) * np.sin(offsets[:count] + phase)
+        yield np.repeat(block[:, None], channels, axis=1)
+
+
+def tone(duration: float = 2.0, freq: float = 440.0, sr: int = 16000) -> np.ndarray:
+    """Mono sine tone as float32 in [-0.5, 0.5]."""
+    return _collect(tone_blocks(duration, freq, sr), 1)[:, 0]
+
+
+def _speech_layout(n: int, sr: int, rng: np.random.Generator):
+    """Syllables as (start, length, gain) and phrases as (start, end, base pitch)."""
+    syllables, phrases = [], []
+    position = 0
+    # Phrases of 1-4 s of speech followed by a 0.2-0.8 s pause
+    while position < n:
+        phrase = int(sr * rng.uniform(1.0, 4.0))
+        end = min(n, position + phrase)
+        # Syllables of 0.15-0.35 s, each with a raised-cosine envelope
+        syllable_start = position
+        while syllable_start < end:
+            length = min(int(sr * rng.uniform(0.15, 0.35)), end - syllable_start)
+            syllables.append((syllable_start, length, rng.uniform(0.5, 1.0)))
+            syllable_start += length
+        # Declining pitch over the phrase, per-speaker base pitch
+        phrases.append((position, end, rng.uniform(100.0, 220.0)))
+        position = end + int(sr * rng.uniform(0.2, 0.8))
+    return syllables, phrases
+
+
+def _overlapping(spans, starts: np.ndarray, lo: int, hi: int):
+    """Spans (sorted, non-overlapping, start first) from the last one starting at or before lo up to hi."""
+    first = max(int(np.searchsorted(starts, lo, side="right")) - 1, 0)
+    for span in spans[first:]:
+        if span[0] >= hi:
+            break
+        yield span
+
+
+def _speech_signal_blocks(duration: float, sr: int, seed: int, block_frames: int):
+    """Unnormalized mono speech-like signal, block by block."""
+    rng = np.random.default_rng(seed)
+    n = int(sr * duration)
+    syllables, phrases = _speech_layout(n, sr, rng)
+    syllable_starts = np.array([s[0] for s in syllables])
+    phrase_starts = np.array([p[0] for p in phrases])
+    # Fricative noise in about a fifth of the runs
+    fricative = rng.random(n // FRICATIVE_RUN + 1) < 0.2
+    noise_rng = np.random.default_rng([seed, 1])
+    phase = 0.0
+
+    for lo in range(0, n, block_frames):
+        hi = min(n, lo + block_frames)
+        envelope = np.zeros(hi - lo, dtype=np.float32)
+        for start, length, gain in _overlapping(syllables, syllable_starts, lo, hi):
+            a, b = max(start, lo), min(start + length, hi)
+            if a >= b:
+                continue
+            envelope[a - lo:b - lo] = np.hanning(length)[a - start:b - start] * gain
+        f0 = np.full(hi - lo, 120.0)
+        for start, end, base in _overlapping(phrases, phrase_starts, lo, hi):
+            a, b = max(start, lo), min(end, hi)
+            if a >= b:
+                continue
+            f0[a - lo:b - lo] = base * np.linspace(1.15, 0.85, end - start)[a - start:b - start]
+
+        # Harmonic-rich glottal source (sawtooth) following the pitch contour
+        cycles = phase + np.cumsum(f0 / sr)
+        phase = cycles[-1] % 1.0
+        voiced = (2.0 * (cycles % 1.0) - 1.0).astype(np.float32)
+        noise = noise_rng.standard_normal(hi - lo).astype(np.float32)
+        bursts = fricative[np.arange(lo, hi) // FRICATIVE_RUN]
+        yield envelope * (0.6 * voiced + 0.3 * noise * bursts) + 0.003 * noise
+
+
+def speech_like_blocks(duration: float, sr: int = 16000, channels: int = 1, seed: int = 0,
+                       block_frames: int = BLOCK_FRAMES):
+    """
+    Deterministic speech-like signal as float32 blocks of shape (frames, channels).
+
+    Peak normalization needs the loudest sample up front, so the mono signal is
+    rendered twice; memory stays at one block whatever the duration.
+    """
+    peak = max((np.abs(block).max() for block in _speech_signal_blocks(duration, sr, seed, block_frames)), default=0.0)
+    scale = np.float32(0.5 / max(peak, 1e-6))
+    # Further channels: delayed, attenuated copies with their own noise floor
+    floor_rngs = [np.random.default_rng([seed, 2, channel]) for channel in range(1, channels)]
+    history = [np.zeros(int(sr * 0.0003 * channel), dtype=np.float32) for channel in range(1, channels)]
+
+    for signal in _speech_signal_blocks(duration, sr, seed, block_frames):
+        signal = signal * scale
+        layers = [signal]
+        for channel, tail in enumerate(history):
+            joined = np.concatenate([tail, signal])
+            history[channel] = joined[len(signal):]
+            layers.append((0.8 * joined[:len(signal)] + 0.002 * floor_rngs[channel].standard_normal(len(signal))).astype(np.float32))
+        yield np.stack(layers, axis=1)
+
+
+def speech_like(duration: float, sr: int = 16000, channels: int = 1, seed: int = 0) -> np.ndarray:
+    """
+    Deterministic speech-like signal.
+
+    Returns:
+        float32 array of shape (samples, channels)
+    """
+    return _collect(speech_like_blocks(duration, sr, channels, seed), channels)
+
+
+def write_wav(path: str, audio, sr: int = 16000):
+    """
+    Write float audio as 16-bit PCM.
+
+    audio is an array of shape (samples,) or (samples, channels), or an
+    iterable of such blocks, which are converted and written one at a time.
+    """
+    blocks = [audio] if isinstance(audio, np.ndarray) else audio
+    with wave.open(str(path), 'w') as wf:
         wf.setsampwidth(2)  # 16-bit
         wf.setframerate(sr)
-        for i in range(n_samples):
-            t = i / sr
-            val = int(amplitude * math.sin(2 * math.pi * freq * t))
-            wf.writeframes(struct.pack('<h', val))
+        channels = None
+        for block in blocks:
+            block = block.reshape(len(block), -1)
+            if channels is None:
+                channels = block.shape[1]
+                wf.setnchannels(channels)
+            wf.writeframes((np.clip(block, -1.0, 1.0) * 32767).astype('<i2').tobytes())
+        if channels is None:
+            wf.setnchannels(1)
 
-if __name__ == '__main__':
-    out = sys.argv[1] if len(sys.argv) > 1 else 'test_audio.wav'
+
+def generate_wav(path, duration=2.0, freq=440.0, sr=16000):
+    write_wav(path, tone_blocks(duration, freq, sr), sr)
+
+
+def write_video(path: str, audio_path: str, size: str = "640x360", rate: int = 25):
+    """Mux a test-pattern video track with audio_path (keyframe every 2 s)."""
+    import ffmpeg
+
+    video = ffmpeg.input(f"testsrc2=size={size}:rate={rate}", f="lavfi")
+    audio = ffmpeg.input(str(audio_path))
+    stream = ffmpeg.output(
+        video, audio, str(path),
+        vcodec="libx264", preset="ultrafast", g=rate * 2, pix_fmt="yuv420p",
+        acodec="aac", shortest=None, loglevel="error",
+    )
+    ffmpeg.run(ffmpeg.overwrite_output(stream), capture_stdout=True, capture_stderr=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output", nargs="?", default="test_audio.wav")
+    parser.add_argument("--speech", action="store_true", help="Speech-like content instead of a tone")
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    out = Path(args.output)
     print(f"Generating {out} ...")
-    generate_wav(out)
+    if args.speech:
+        audio = speech_like_blocks(args.duration, args.sample_rate, args.channels, args.seed)
+    else:
+        audio = tone_blocks(args.duration, sr=args.sample_rate, channels=args.channels)
+
+    if out.suffix.lower() in (".mp4", ".mkv", ".mov"):
+        wav_path = out.with_suffix(".wav")
+        write_wav(wav_path, audio, args.sample_rate)
+        write_video(out, wav_path)
+        wav_path.unlink()
+    else:
+        write_wav(out, audio, args.sample_rate)
     print("Done")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
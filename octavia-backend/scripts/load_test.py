@@ -0,0 +1,327 @@
+"""Async HTTP load test for the job API and SSE fan-out.
+
+Usage:
+    python scripts/load_test.py --spawn-server [--users 20] [--iterations 3]
+    python scripts/load_test.py --base-url http://127.0.0.1:8001 --database-url sqlite:///./dev.db
+
+Each virtual user signs up, then repeats one scenario:
+
+    upload -> create transcription job -> process -> poll status
+                                                    + N SSE subscribers on /stream
+
+Status pollers and stream subscribers run concurrently. Processing a job
+costs credits, so the script grants them to its users directly in the
+database (--database-url; automatic with --spawn-server). Those users are
+created for the run.
+
+--spawn-server starts uvicorn on a free port with a throwaway SQLite
+database and the in-memory broker, the same setup as run_worker_dev.py. The
+in-memory broker lives inside the API process, so jobs are queued but never
+picked up. Streams then measure fan-out and hold for --stream-seconds. To
+drive jobs to completion, point --base-url at a server with Redis and a
+running worker.
+
+The JSON report has, per endpoint: requests, errors, error rate, RPS, and
+p50/p95/p99 latency. For SSE it has time to first event and events
+received. The script exits with 1 when --max-error-rate or a --max-p95
+limit (e.g. --max-p95 status=200) is exceeded, so it can gate CI.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR / "scripts"))
+
+from generate_test_audio import speech_like_blocks, write_wav  # noqa: E402
+
+
+class Recorder:
+    """Latencies and outcomes per endpoint."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = defaultdict(list)
+        self.first_event = []
+        self.events = []
+        self.started = time.perf_counter()
+
+    def record(self, endpoint: str, seconds: float, ok: bool, detail: str = ""):
+        self.latencies[endpoint].append(seconds * 1000)
+        if not ok:
+            self.errors[endpoint] += 1
+            if len(self.error_samples[endpoint]) < 3:
+                self.error_samples[endpoint].append(detail[:200])
+
+    def report(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = np.asarray(values)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "error_rate": round(self.errors[endpoint] / len(values), 4),
+                "rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(float(np.percentile(values, 50)), 2),
+                "p95_ms": round(float(np.percentile(values, 95)), 2),
+                "p99_ms": round(float(np.percentile(values, 99)), 2),
+                "max_ms": round(float(values.max()), 2),
+            }
+            if self.error_samples[endpoint]:
+                endpoints[endpoint]["error_samples"] = self.error_samples[endpoint]
+        report = {"elapsed_seconds": round(elapsed, 2), "endpoints": endpoints}
+        if self.first_event:
+            first = np.asarray(self.first_event)
+            report["sse"] = {
+                "subscriptions": len(self.events),
+                "first_event_p50_ms": round(float(np.percentile(first, 50)), 2),
+                "first_event_p95_ms": round(float(np.percentile(first, 95)), 2),
+                "events_received": int(sum(self.events)),
+            }
+        return report
+
+
+async def timed(recorder: Recorder, endpoint: str, request, expected=(200,)):
+    """Run one request coroutine and record it under endpoint."""
+    start = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError as e:
+        recorder.record(endpoint, time.perf_counter() - start, False, f"{type(e).__name__}: {e}")
+        return None
+    ok = response.status_code in expected
+    recorder.record(endpoint, time.perf_counter() - start, ok, f"{response.status_code}: {response.text}")
+    return response if ok else None
+
+
+async def subscribe(client: httpx.AsyncClient, recorder: Recorder, job_id: str, token: str, seconds: float):
+    """Hold one SSE subscription until the job finishes or seconds elapse."""
+    start = time.perf_counter()
+    events = 0
+    try:
+        async with client.stream("GET", f"/api/v1/jobs/{job_id}/stream", params={"token": token},
+                                 timeout=httpx.Timeout(seconds + 10)) as response:
+            recorder.record("stream_connect", time.perf_counter() - start, response.status_code == 200,
+                            str(response.status_code))
+            if response.status_code != 200:
+                return
+            async with asyncio.timeout(seconds):
+                async for line in response.aiter_lines():
+                    if line.startswith("data:"):
+                        if events == 0:
+                            recorder.first_event.append((time.perf_counter() - start) * 1000)
+                        events += 1
+                    elif line.startswith("event: done"):
+                        break
+    except TimeoutError:
+        pass
+    except httpx.HTTPError as e:
+        recorder.record("stream_connect", time.perf_counter() - start, False, f"{type(e).__name__}: {e}")
+    recorder.events.append(events)
+
+
+async def poll_status(client: httpx.AsyncClient, recorder: Recorder, job_id: str, headers: dict, args):
+    for _ in range(args.polls):
+        response = await timed(recorder, "status", client.get(f"/api/v1/jobs/{job_id}/status", headers=headers))
+        if response is not None and response.json().get("status") in ("completed", "failed"):
+            return
+        await asyncio.sleep(args.poll_interval)
+
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, media: bytes, args, users: list):
+    email = f"loadtest-{uuid.uuid4().hex[:12]}@example.com"
+    response = await timed(recorder, "signup", client.post("/signup", json={"email": email, "password": "LoadTest123!"}))
+    if response is None:
+        return
+    body = response.json()
+    token = body["access_token"]
+    users.append(body["user"]["id"])
+    headers = {"Authorization": f"Bearer {token}"}
+    await args.credits_granted.wait()
+
+    for _ in range(args.iterations):
+        response = await timed(recorder, "upload", client.post(
+            "/api/v1/upload",
+            params={"file_type": "audio"},
+            files={"file": ("loadtest.wav", media, "audio/wav")},
+            headers=headers,
+        ))
+        if response is None:
+            continue
+        upload = response.json()
+
+        response = await timed(recorder, "create", client.post(
+            "/api/v1/jobs/transcribe",
+            json={"file_id": upload["file_id"], "storage_path": upload["storage_path"], "language": "en"},
+            headers=headers,
+        ))
+        if response is None:
+            continue
+        job_id = response.json()["id"]
+
+        await timed(recorder, "process", client.post(f"/api/v1/jobs/{job_id}/process", headers=headers),
+                    expected=(200, 202))
+
+        await asyncio.gather(
+            poll_status(client, recorder, job_id, headers, args),
+            *(subscribe(client, recorder, job_id, token, args.stream_seconds) for _ in range(args.subscribers)),
+        )
+
+
+def grant_credits(database_url: str, user_ids: list, credits: int):
+    """Give the run's users credits directly in the database (local test setups only)."""
+    from sqlalchemy import bindparam, create_engine, text
+
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE users SET credits = :credits WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"credits": credits, "ids": user_ids},
+        )
+    engine.dispose()
+
+
+async def run(args, base_url: str) -> dict:
+    recorder = Recorder()
+    media_path = Path(tempfile.mkstemp(suffix=".wav")[1])
+    write_wav(media_path, speech_like_blocks(args.media_seconds, 16000, 1, seed=0), 16000)
+    media = media_path.read_bytes()
+    media_path.unlink()
+
+    users = []
+    args.credits_granted = asyncio.Event()
+    limits = httpx.Limits(max_connections=args.users * (args.subscribers + 2), max_keepalive_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        tasks = [asyncio.create_task(virtual_user(client, recorder, media, args, users)) for _ in range(args.users)]
+
+        # Grant credits once every user has signed up (or failed to)
+        while len(users) + recorder.errors["signup"] < args.users and not all(t.done() for t in tasks):
+            await asyncio.sleep(0.05)
+        if args.database_url and users:
+            await asyncio.to_thread(grant_credits, args.database_url, users, args.credits)
+        args.credits_granted.set()
+
+        await asyncio.gather(*tasks)
+    return recorder.report()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(work_dir: Path) -> tuple:
+    """Start the API with a throwaway SQLite database and the in-memory broker."""
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{(work_dir / 'loadtest.db').as_posix()}",
+        CELERY_BROKER_URL="memory://",
+        CELERY_RESULT_BACKEND="cache+memory://",
+        AUTO_VERIFY_DEV="true",
+        PYTHONPATH=os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get("PYTHONPATH")])),
+    )
+    # Run from work_dir so uploads/ (resolved against the working directory) is thrown away too
+    subprocess.run(
+        [sys.executable, "-c", "import app.job_model, create_tables; create_tables.create_all()"],
+        cwd=work_dir, env=env, check=True,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=work_dir, env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return server, base_url, env["DATABASE_URL"]
+        except httpx.HTTPError:
+            pass
+        if server.poll() is not None:
+            raise RuntimeError("API server exited during startup")
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("API server did not start within 60s")
+
+
+def check_limits(report: dict, args) -> list:
+    """Threshold violations, e.g. 'status p95 250.0ms > 200ms'."""
+    violations = []
+    for endpoint, stats in report["endpoints"].items():
+        if stats["error_rate"] > args.max_error_rate:
+            violations.append(f"{endpoint} error rate {stats['error_rate']:.2%} > {args.max_error_rate:.2%}")
+    for limit in args.max_p95:
+        endpoint, ms = limit.split("=", 1)
+        stats = report["endpoints"].get(endpoint)
+        if stats and stats["p95_ms"] > float(ms):
+            violations.append(f"{endpoint} p95 {stats['p95_ms']}ms > {ms}ms")
+    return violations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--spawn-server", action="store_true", help="Start a throwaway API server for the run")
+    parser.add_argument("--database-url", help="Database of the server under test, used to grant credits")
+    parser.add_argument("--credits", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=3, help="Scenarios per user")
+    parser.add_argument("--subscribers", type=int, default=3, help="SSE subscribers per job")
+    parser.add_argument("--stream-seconds", type=float, default=5.0, help="Longest time a subscriber stays connected")
+    parser.add_argument("--polls", type=int, default=10, help="Status polls per job")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--media-seconds", type=float, default=5.0, help="Length of the uploaded audio")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--max-p95", action="append", default=[], metavar="ENDPOINT=MS")
+    args = parser.parse_args()
+
+    server = None
+    with tempfile.TemporaryDirectory(prefix="octavia_load_") as work_dir:
+        base_url = args.base_url
+        if args.spawn_server:
+            server, base_url, args.database_url = spawn_server(Path(work_dir))
+        try:
+            report = asyncio.run(run(args, base_url))
+        finally:
+            if server:
+                server.terminate()
+                server.wait(timeout=10)
+
+    report["config"] = {
+        "base_url": base_url, "users": args.users, "iterations": args.iterations,
+        "subscribers": args.subscribers, "spawned_server": args.spawn_server,
+    }
+    violations = check_limits(report, args)
+    report["violations"] = violations
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+        print(f"Wrote {args.output}")
+    else:
+        print(output)
+    for violation in violations:
+        print(f"LIMIT EXCEEDED {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Tests for the pluggable ASR backend registry and the faster-whisper result mapping."""
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import get_args
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import asr_backends, model_cache, task_routing
+from app.upload_schemas import ASRBackendName, TranscribeRequest
+
+
+class FakeBackend(asr_backends.ASRBackend):
+    name = "fake"
+    loads = 0
+
+    def __init__(self, model_size="base"):
+        super().__init__(model_size)
+        FakeBackend.loads += 1
+
+    def transcribe(self, audio, language=None, **options):
+        return {"text": "hello", "language": language or "en", "segments": [], "duration": 1.0}
+
+    def detect_language(self, audio):
+        return "en", 1.0
+
+
+@pytest.fixture(autouse=True)
+def fake_registry(monkeypatch):
+    monkeypatch.setitem(asr_backends.ASR_BACKENDS, "fake", FakeBackend)
+    FakeBackend.loads = 0
+    model_cache.clear()
+    yield
+    model_cache.clear()
+
+
+def test_unknown_backend_rejected():
+    """An unregistered backend name fails loudly instead of silently falling back."""
+    with pytest.raises(ValueError):
+        asr_backends.get_asr_backend("base", "does-not-exist")
+
+
+def test_backend_is_cached_under_its_routing_key():
+    """Backends load once per process and share the model cache with routing keys."""
+    first = asr_backends.get_asr_backend("small", "fake")
+    second = asr_backends.get_asr_backend("small", "fake")
+
+    assert first is second
+    assert FakeBackend.loads == 1
+    assert model_cache.is_cached("asr.fake.small")
+
+
+def test_job_metadata_selects_backend():
+    """A job's asr_backend picks its model queue."""
+    assert task_routing.model_key_for_job(
+        "transcribe", {"model_size": "base", "asr_backend": "faster-whisper"}
+    ) == "asr.faster-whisper.base"
+
+
+def test_faster_whisper_result_matches_whisper_structure():
+    """faster-whisper segments are converted to the transcript structure used downstream."""
+    segment = SimpleNamespace(
+        id=0, seek=0, start=0.0, end=2.5, text=" Hello world", tokens=(1, 2),
+        temperature=0.0, avg_logprob=-0.2, compression_ratio=1.1, no_speech_prob=0.01,
+    )
+    fake_model = SimpleNamespace(
+        transcribe=lambda audio, language=None, **options: (
+            iter([segment]), SimpleNamespace(language="en", duration=2.5)
+        )
+    )
+    backend = asr_backends.FasterWhisperBackend.__new__(asr_backends.FasterWhisperBackend)
+    backend.model_size = "base"
+    backend.model = fake_model
+
+    result = backend.transcribe("audio.wav")
+
+    assert result["text"] == " Hello world"
+    assert result["language"] == "en"
+    assert result["duration"] == 2.5
+    assert result["segments"][0]["end"] == 2.5
+    assert result["segments"][0]["tokens"] == [1, 2]
+
+
+class VotingBackend(asr_backends.ASRBackend):
+    """Answers language ID from a per-window script."""
+    name = "voting"
+
+    def __init__(self, answers):
+        super().__init__("base")
+        self.answers = list(answers)
+        self.window_lengths = []
+
+    def transcribe(self, audio, language=None, **options):
+        raise AssertionError("language ID must not transcribe")
+
+    def detect_language(self, audio):
+        self.window_lengths.append(len(audio))
+        return self.answers.pop(0)
+
+
+def test_language_id_samples_windows_and_votes(monkeypatch):
+    """Long files are sampled in a few windows and the summed probability wins."""
+    monkeypatch.setattr(asr_backends, "LANGUAGE_ID_SECONDS", 1)
+    monkeypatch.setattr(asr_backends, "LANGUAGE_ID_WINDOWS", 3)
+    backend = VotingBackend([("fr", 0.9), ("en", 0.4), ("fr", 0.7)])
+    audio = [0.0] * (asr_backends.SAMPLE_RATE * 10)
+
+    language, probability = asr_backends.identify_language(backend, audio)
+
+    assert language == "fr"
+    assert probability == pytest.approx((0.9 + 0.7) / 3)
+    assert backend.window_lengths == [asr_backends.SAMPLE_RATE] * 3
+
+
+def test_language_id_uses_single_window_for_short_clips(monkeypatch):
+    """Clips shorter than one window are detected once."""
+    monkeypatch.setattr(asr_backends, "LANGUAGE_ID_SECONDS", 30)
+    backend = VotingBackend([("de", 0.8)])
+
+    assert asr_backends.identify_language(backend, [0.0] * 1000) == ("de", 0.8)
+    assert backend.window_lengths == [1000]
+
+
+def test_request_schemas_accept_only_registered_backends():
+    """Requests name a registered backend or get a validation error (422) instead of a failed job."""
+    assert set(get_args(ASRBackendName)) == {asr_backends.WhisperBackend.name, asr_backends.FasterWhisperBackend.name}
+    assert TranscribeRequest(file_id="f", storage_path="p", asr_backend="faster-whisper").asr_backend == "faster-whisper"
+    with pytest.raises(ValidationError):
+        TranscribeRequest(file_id="f", storage_path="p", asr_backend="wisper")
+
+
+def test_transcription_merges_metadata_and_samples_language_of_ffmpeg_audio(monkeypatch, tmp_path):
+    """Audio soundfile cannot read is decoded with ffmpeg and still gets sampled language ID."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app import workers
+    from app.db import Base
+    from app.job_model import Job
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    input_file = tmp_path / "talk.mp3"
+    input_file.write_bytes(b"not a wav")
+    job = Job(user_id="u", job_type="transcribe", input_file=str(input_file),
+              job_metadata=json.dumps({"language": "auto", "asr_backend": "voting"}))
+    session.add(job)
+    session.commit()
+
+    backend = VotingBackend([("fr", 0.9)])
+    backend.transcribe = lambda audio, language=None, **options: {
+        "text": "bonjour", "language": language, "segments": [], "duration": len(audio) / asr_backends.SAMPLE_RATE,
+    }
+    monkeypatch.setattr(workers, "get_asr_backend", lambda model_size, name=None: backend)
+    monkeypatch.setattr(workers, "load_audio_without_ffmpeg", lambda path: None)
+    monkeypatch.setattr(workers, "load_audio_with_ffmpeg", lambda path: np.zeros(asr_backends.SAMPLE_RATE * 2, np.float32))
+
+    assert workers.transcribe_audio(session, job.id, str(input_file))
+
+    metadata = json.loads(session.get(Job, job.id).job_metadata)
+    assert backend.window_lengths == [asr_backends.SAMPLE_RATE * 2]
+    assert metadata["language_id"] == {"language": "fr", "probability": 0.9}
+    assert metadata["detected_language"] == "fr"
+    assert metadata["asr_backend"] == "voting"
+    session.close()
@@ -14,12 +14,14 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.core.database import init_db
 from app import db, models
 
 
 @pytest.fixture(scope="session")
 def client():
     """Create a test client for the FastAPI app."""
+    init_db()  # Tables are created at app startup, not on import
     return TestClient(app)
 
 
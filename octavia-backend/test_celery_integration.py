@@ -9,6 +9,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.main import app
+from app.core.database import init_db
 from app.db import get_db, SessionLocal
 from app.core.database import Base
 from app.job_model import Job, JobStatus
@@ -32,6 +33,8 @@ def override_get_db():
 
 app.dependency_overrides[get_db] = override_get_db
 app.dependency_overrides[get_current_user] = lambda: "test-user-123"
+# Tables are created at app startup, not on import
+init_db()
 client = TestClient(app)
 
 
@@ -0,0 +1,66 @@
+"""Tests for timestamp-aligned dub assembly and WSOLA time-stretching."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import dub_assembly
+
+RATE = 16000
+
+
+def tone(seconds, frequency=220.0, amplitude=0.5):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def dominant_frequency(audio):
+    spectrum = np.abs(np.fft.rfft(audio))
+    return np.argmax(spectrum) * RATE / len(audio)
+
+
+def test_time_stretch_changes_length_not_pitch():
+    stretched = dub_assembly.time_stretch(tone(2.0), 1.25)
+
+    assert len(stretched) == int(2.0 * RATE / 1.25)
+    assert abs(dominant_frequency(stretched[2000:10000]) - 220.0) < 5.0
+
+
+def test_segments_placed_at_start_times(tmp_path):
+    paths = []
+    for index in range(2):
+        path = tmp_path / f"segment_{index}.wav"
+        sf.write(path, tone(0.5), RATE)
+        paths.append(str(path))
+    segments = [{"start": 1.0, "end": 1.5}, {"start": 3.0, "end": 3.5}]
+
+    output = dub_assembly.assemble_dub_track(segments, paths, str(tmp_path / "dub.wav"), total_duration=5.0)
+    track, rate = sf.read(output, dtype='float32')
+
+    assert rate == RATE
+    assert len(track) == 5 * RATE
+    assert np.abs(track[:RATE]).max() == 0
+    assert np.abs(track[RATE:RATE + 8000]).max() > 0.4
+    assert np.abs(track[int(1.6 * RATE):3 * RATE]).max() == 0
+    assert np.abs(track[3 * RATE:3 * RATE + 8000]).max() > 0.4
+
+
+def test_overrunning_segment_is_compressed_then_trimmed(tmp_path):
+    long_path, next_path = tmp_path / "long.wav", tmp_path / "next.wav"
+    sf.write(long_path, tone(2.0), RATE)
+    sf.write(next_path, tone(0.5, frequency=440.0), RATE)
+    segments = [{"start": 0.0, "end": 1.0}, {"start": 1.0, "end": 1.5}]
+
+    output = dub_assembly.assemble_dub_track(segments, [str(long_path), str(next_path)], str(tmp_path / "dub.wav"))
+    track, _ = sf.read(output, dtype='float32')
+
+    assert len(track) == int(1.5 * RATE)
+    # The second segment starts on time and is not overwritten by the first
+    assert abs(dominant_frequency(track[RATE + 400:RATE + 7600]) - 440.0) < 10.0
+
+
+def test_no_audio_returns_none(tmp_path):
+    assert dub_assembly.assemble_dub_track([{"start": 0, "end": 1}], [None], str(tmp_path / "dub.wav")) is None
@@ -7,6 +7,7 @@ from datetime import datetime
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.core.database import init_db
 from app.db import SessionLocal
 from app.job_model import Job, JobStatus, JobPhase
 from app import models
@@ -31,6 +32,8 @@ def setup_module():
     db.close()
 
 
+# Tables are created at app startup, not on import
+init_db()
 client = TestClient(app)
 TEST_USER_ID = "test-user-frontend"
 TEST_TOKEN_PAYLOAD = {"sub": TEST_USER_ID}
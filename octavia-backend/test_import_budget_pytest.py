@@ -0,0 +1,66 @@
+"""Import-time budget for the API process (python -X importtime).
+
+Keeps `uvicorn app.main:app` cold start small: importing the app must not
+pull in ML libraries or touch the database.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+
+# Modules that only worker processes may load
+FORBIDDEN_MODULES = ("whisper", "torch", "transformers", "pyttsx3", "numpy", "faster_whisper", "ctranslate2")
+
+# Cumulative import time budget for app.main, in seconds
+IMPORT_BUDGET_SECONDS = float(os.environ.get("IMPORT_BUDGET_SECONDS", "5.0"))
+
+
+def _import_app(tmp_path):
+    """Import app.main in a fresh interpreter and return parsed importtime rows."""
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{(tmp_path / 'import_budget.db').as_posix()}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        rows.append((name.strip(), int(cumulative_us)))
+    return rows
+
+
+def test_api_import_excludes_ml_libraries(tmp_path):
+    """The API import graph stays free of model libraries."""
+    rows = _import_app(tmp_path)
+    loaded = {name.split(".")[0] for name, _ in rows}
+
+    leaked = sorted(loaded.intersection(FORBIDDEN_MODULES))
+    assert not leaked, f"API import pulled in worker-only modules: {leaked}"
+
+
+def test_api_import_within_budget(tmp_path):
+    """Importing app.main stays under the cold-start budget."""
+    rows = _import_app(tmp_path)
+    total_us = next(cumulative for name, cumulative in rows if name == "app.main")
+
+    assert total_us / 1_000_000 < IMPORT_BUDGET_SECONDS, (
+        f"app.main import took {total_us / 1_000_000:.2f}s (budget {IMPORT_BUDGET_SECONDS}s)"
+    )
+
+
+def test_api_import_does_not_create_schema(tmp_path):
+    """Schema creation happens at startup, not as an import side effect."""
+    _import_app(tmp_path)
+
+    assert not (tmp_path / "import_budget.db").exists()
@@ -0,0 +1,110 @@
+"""Tests for the cross-job micro-batcher used for Whisper inference."""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import inference_batcher, model_cache
+from app.inference_batcher import BatcherClosed, MicroBatcher
+
+
+def test_concurrent_submissions_share_a_batch():
+    """Items submitted together are decoded in one call and routed back in order."""
+    calls = []
+
+    def decode(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(decode, max_batch_size=4, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(i) for i in range(4)]
+        assert [f.result(timeout=5) for f in futures] == [0, 10, 20, 30]
+        assert calls == [[0, 1, 2, 3]]
+    finally:
+        batcher.close()
+
+
+def test_batch_size_limit_splits_batches():
+    """No decode call receives more than max_batch_size items."""
+    sizes = []
+
+    def decode(items):
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(decode, max_batch_size=3, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(i) for i in range(7)]
+        assert [f.result(timeout=5) for f in futures] == list(range(7))
+        assert max(sizes) <= 3
+        assert sum(sizes) == 7
+    finally:
+        batcher.close()
+
+
+def test_latency_limit_flushes_partial_batch():
+    """A lone item is decoded once max_wait_ms elapses."""
+    batcher = MicroBatcher(lambda items: items, max_batch_size=8, max_wait_ms=20)
+    try:
+        start = time.monotonic()
+        assert batcher.submit("x").result(timeout=5) == "x"
+        assert time.monotonic() - start < 2
+    finally:
+        batcher.close()
+
+
+def test_results_return_to_submitting_threads():
+    """Each concurrent job receives the result for its own window."""
+    batcher = MicroBatcher(lambda items: [f"decoded-{item}" for item in items], max_batch_size=16, max_wait_ms=50)
+    results = {}
+
+    def job(job_id):
+        results[job_id] = batcher.submit(job_id).result(timeout=5)
+
+    threads = [threading.Thread(target=job, args=(n,)) for n in range(10)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == {n: f"decoded-{n}" for n in range(10)}
+    finally:
+        batcher.close()
+
+
+def test_decode_error_propagates_to_every_item():
+    """A failed batched decode fails each waiting future."""
+    def decode(items):
+        raise ValueError("decode failed")
+
+    batcher = MicroBatcher(decode, max_batch_size=2, max_wait_ms=100)
+    try:
+        futures = [batcher.submit(i) for i in range(2)]
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+    finally:
+        batcher.close()
+
+
+def test_evicting_model_closes_its_batcher(monkeypatch):
+    """A batcher does not keep a model alive after the model cache evicts it."""
+    monkeypatch.setattr(model_cache, "MODEL_CACHE_SIZE", 1)
+    monkeypatch.setattr(inference_batcher, "_whisper_decode_fn", lambda model: lambda items: [model] * len(items))
+    model_cache.clear()
+    model = model_cache.get_model("asr.whisper.tiny", lambda: "tiny-model")
+    batcher = inference_batcher.get_whisper_batcher("asr.whisper.tiny", model)
+    assert batcher.submit("window").result(timeout=5) == "tiny-model"
+
+    model_cache.get_model("asr.whisper.base", lambda: "base-model")
+
+    assert "asr.whisper.tiny" not in inference_batcher._batchers
+    assert batcher.decode_fn is None
+    with pytest.raises(BatcherClosed):
+        batcher.submit("window")
+    model_cache.clear()
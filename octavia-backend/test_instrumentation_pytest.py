@@ -0,0 +1,72 @@
+"""Tests for per-stage timing and resource spans."""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import instrumentation
+from app.instrumentation import StageRecorder, merge_stage_dicts
+
+
+def test_stage_records_wall_cpu_and_real_time_factor():
+    stages = StageRecorder("job")
+
+    with stages.stage("asr", audio_seconds=10.0):
+        time.sleep(0.1)
+    with stages.stage("mt"):
+        sum(i * i for i in range(200_000))
+
+    result = stages.as_dict()
+    assert list(result) == ["asr", "mt"]
+    assert result["asr"]["wall_seconds"] >= 0.1
+    assert 0 < result["asr"]["real_time_factor"] <= 100
+    assert result["mt"]["cpu_seconds"] > 0
+    assert result["mt"]["real_time_factor"] is None
+    assert "asr=" in stages.summary() and "RTF" in stages.summary()
+
+
+@pytest.mark.skipif(instrumentation.resource is None, reason="resource module unavailable")
+def test_child_process_cpu_and_peak_rss_are_included():
+    stages = StageRecorder()
+
+    with stages.stage("extract"):
+        subprocess.run([sys.executable, "-c", "sum(i for i in range(3_000_000))"], check=True)
+
+    span = stages.spans[0]
+    assert span.cpu_seconds > 0.05
+    assert span.peak_rss_mb > 0
+    assert span.read_bytes is not None and span.write_bytes is not None
+
+
+def test_span_recorded_and_observed_when_stage_raises(monkeypatch):
+    observed = []
+    monkeypatch.setattr(instrumentation, "STAGE_OBSERVERS", [observed.append])
+    stages = StageRecorder()
+
+    with pytest.raises(RuntimeError):
+        with stages.stage("tts"):
+            raise RuntimeError("engine crashed")
+
+    assert [span.name for span in observed] == ["tts"]
+    assert "tts" in stages.as_dict()
+
+
+def test_repeated_and_piece_stages_are_summed():
+    pieces = [
+        {"asr": {"wall_seconds": 2.0, "cpu_seconds": 4.0, "peak_rss_mb": 900.0,
+                 "read_bytes": 10, "write_bytes": 0, "audio_seconds": 60.0, "real_time_factor": 30.0}},
+        {"asr": {"wall_seconds": 3.0, "cpu_seconds": 5.0, "peak_rss_mb": 1200.0,
+                 "read_bytes": 5, "write_bytes": 1, "audio_seconds": 60.0, "real_time_factor": 20.0}},
+    ]
+
+    asr = merge_stage_dicts(pieces)["asr"]
+
+    assert asr["wall_seconds"] == 5.0
+    assert asr["cpu_seconds"] == 9.0
+    assert asr["peak_rss_mb"] == 1200.0
+    assert asr["read_bytes"] == 15
+    assert asr["real_time_factor"] == 24.0
@@ -0,0 +1,78 @@
+"""Tests for structured, sampled, queued logging."""
+import json
+import logging
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import logging_config
+
+
+def make_record(name="app.test", level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_json_formatter_includes_context_and_extras():
+    token = logging_config.bind_job("job-1")
+    try:
+        record = make_record(stage="asr")
+        logging_config.ContextFilter().filter(record)
+    finally:
+        logging_config.job_id_var.reset(token)
+
+    entry = json.loads(logging_config.JSONFormatter().format(record))
+
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
+    assert entry["job_id"] == "job-1"
+    assert entry["stage"] == "asr"
+    assert "request_id" not in entry
+
+
+def test_sampling_keeps_fraction_per_logger_prefix_and_all_warnings():
+    sampler = logging_config.SamplingFilter(logging_config._parse_rates("uvicorn.access=0.1,app=0.5"))
+
+    kept_access = sum(sampler.filter(make_record("uvicorn.access")) for _ in range(100))
+    kept_app = sum(sampler.filter(make_record("app.workers")) for _ in range(100))
+    kept_warnings = sum(sampler.filter(make_record("uvicorn.access", logging.WARNING)) for _ in range(10))
+
+    assert kept_access == 10
+    assert kept_app == 50
+    assert kept_warnings == 10
+    assert sampler.filter(make_record("celery"))
+
+
+def test_queued_records_written_by_listener_with_request_id(monkeypatch, capsys):
+    monkeypatch.setattr(logging_config, "_listener", None)
+    monkeypatch.setattr(logging_config, "_configured_pid", None)
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    app = FastAPI()
+    app.middleware("http")(logging_config.request_context_middleware)
+
+    @app.get("/ping")
+    def ping():
+        logging.getLogger("app.test").info("ping for %s", "client")
+        return {"ok": True}
+
+    try:
+        logging_config.configure_logging(level="INFO", fmt="json", sample_rates="")
+        response = TestClient(app).get("/ping", headers={"X-Request-ID": "req-42"})
+        logging_config.shutdown_logging()
+    finally:
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+    assert response.headers["X-Request-ID"] == "req-42"
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines() if line.startswith("{")]
+    entry = next(line for line in lines if line["logger"] == "app.test")
+    assert entry["message"] == "ping for client"
+    assert entry["request_id"] == "req-42"
@@ -0,0 +1,73 @@
+"""Tests for the Prometheus metrics endpoint, scraped locally."""
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import metrics, model_cache
+from app.instrumentation import StageRecorder
+from app.main import app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Avoid reaching out to a broker while scraping
+    monkeypatch.setattr(metrics, "_queue_depth_cache", {"time": float("inf"), "depths": {"default": 3, "urgent": None}})
+    with TestClient(app) as client:
+        yield client
+
+
+def sample(text, name, **labels):
+    """Value of one sample in the text exposition format, or None."""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{{wanted}}}" if labels else f"{name} "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_request_latency_recorded_per_route_template(client):
+    client.get("/")
+    client.get("/api/v1/jobs/some-job-id/status")
+
+    body = client.get("/metrics").text
+
+    assert sample(body, "http_request_duration_seconds_count", method="GET", route="/", status="200") >= 1
+    assert 'route="/api/v1/jobs/{job_id}/status"' in body
+    assert "some-job-id" not in body
+
+
+def test_queue_depth_and_db_pool_reported(client):
+    body = client.get("/metrics").text
+
+    assert sample(body, "celery_queue_depth", queue="default") == 3.0
+    assert 'celery_queue_depth{queue="urgent"}' not in body
+    assert "db_pool_connections{" in body
+
+
+def test_model_cache_hits_and_stage_spans_exported(client):
+    model_cache.clear()
+    model_cache.get_model("asr.test.tiny", lambda: object())
+    model_cache.get_model("asr.test.tiny", lambda: object())
+    with StageRecorder().stage("metrics_test", audio_seconds=5.0):
+        pass
+
+    body = client.get("/metrics").text
+    model_cache.clear()
+
+    assert sample(body, "model_cache_lookups_total", model="asr.test.tiny", result="hit") == 1.0
+    assert sample(body, "model_cache_lookups_total", model="asr.test.tiny", result="miss") == 1.0
+    assert sample(body, "pipeline_stage_duration_seconds_count", stage="metrics_test") == 1.0
+    assert sample(body, "pipeline_stage_audio_seconds_total", stage="metrics_test") == 5.0
+
+
+def test_task_duration_labelled_by_job_type(client):
+    metrics.task_started("task-1")
+    metrics.task_finished("task-1", "app.celery_tasks.process_transcription", "SUCCESS")
+
+    body = client.get("/metrics").text
+
+    assert sample(body, "celery_task_duration_seconds_count", job_type="transcribe", status="success") >= 1
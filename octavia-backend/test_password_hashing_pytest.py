@@ -0,0 +1,115 @@
+"""Tests for off-loop password hashing, rehash-on-login and executor backpressure."""
+import asyncio
+import sys
+import threading
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core import security
+from app.core.database import SessionLocal, init_db
+from app.main import app
+from app.models import User
+
+
+def test_async_hash_roundtrip():
+    """Hashes produced on the executor verify with the configured context."""
+    hashed = asyncio.run(security.get_password_hash_async("TestPass123!"))
+
+    assert security.verify_password("TestPass123!", hashed)
+    valid, new_hash = asyncio.run(security.verify_and_update_password_async("TestPass123!", hashed))
+    assert valid is True
+    assert new_hash is None
+
+
+def test_wrong_password_rejected():
+    """Invalid passwords fail verification and never produce a rehash."""
+    hashed = security.get_password_hash("TestPass123!")
+
+    valid, new_hash = asyncio.run(security.verify_and_update_password_async("wrong", hashed))
+    assert valid is False
+    assert new_hash is None
+
+
+def test_rehash_when_rounds_change():
+    """A hash created with different rounds is upgraded to the configured cost."""
+    legacy_context = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__default_rounds=1000)
+    legacy_hash = legacy_context.hash("TestPass123!")
+
+    valid, new_hash = asyncio.run(security.verify_and_update_password_async("TestPass123!", legacy_hash))
+    assert valid is True
+    assert new_hash is not None
+    assert f"${security.PASSWORD_HASH_ROUNDS}$" in new_hash
+    assert security.verify_password("TestPass123!", new_hash)
+
+
+def test_backpressure_when_executor_full(monkeypatch):
+    """Requests beyond the pending limit are rejected with 503 instead of queueing."""
+    monkeypatch.setattr(security, "_hash_slots", threading.BoundedSemaphore(1))
+    security._hash_slots.acquire()
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(security.get_password_hash_async("TestPass123!"))
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "1"
+
+
+def test_login_persists_upgraded_hash():
+    """Logging in with a low-round hash stores a hash at the configured cost."""
+    init_db()
+    email = f"rehash-{uuid.uuid4().hex[:8]}@example.com"
+    legacy_context = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__default_rounds=1000)
+
+    db = SessionLocal()
+    try:
+        db.add(User(email=email, password_hash=legacy_context.hash("TestPass123!"), is_verified=True))
+        db.commit()
+    finally:
+        db.close()
+
+    response = TestClient(app).post("/login", json={"email": email, "password": "TestPass123!"})
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).first()
+        assert f"${security.PASSWORD_HASH_ROUNDS}$" in user.password_hash
+        assert security.verify_password("TestPass123!", user.password_hash)
+        db.delete(user)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_login_rejected_with_503_when_executor_full(monkeypatch):
+    """The login handler sheds load instead of waiting for a hashing slot."""
+    init_db()
+    email = f"busy-{uuid.uuid4().hex[:8]}@example.com"
+    db = SessionLocal()
+    try:
+        db.add(User(email=email, password_hash=security.get_password_hash("TestPass123!"), is_verified=True))
+        db.commit()
+    finally:
+        db.close()
+    monkeypatch.setattr(security, "_hash_slots", threading.BoundedSemaphore(1))
+    security._hash_slots.acquire()
+
+    try:
+        response = TestClient(app).post("/login", json={"email": email, "password": "TestPass123!"})
+    finally:
+        db = SessionLocal()
+        try:
+            db.query(User).filter(User.email == email).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
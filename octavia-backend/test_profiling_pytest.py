@@ -0,0 +1,87 @@
+"""Tests for on-demand job and request profiling."""
+import pstats
+import sys
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import profiling
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_task_returned_unchanged_when_disabled(monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLE_PROFILING", False)
+
+    def task(job_id, input_file_path):
+        return job_id
+
+    assert profiling.profiled("transcribe")(task) is task
+
+
+def test_flagged_job_writes_profile_next_to_input(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "ENABLE_PROFILING", True)
+    monkeypatch.setattr(profiling, "PROFILE_JOB_TYPES", set())
+    monkeypatch.setattr(profiling, "_job_options", lambda job_id: {"profile": job_id == "job-1"})
+    recorded = {}
+    monkeypatch.setattr(profiling, "_record_profile_dir", lambda job_id, directory: recorded.update({job_id: directory}))
+    (tmp_path / "input.wav").write_bytes(b"")
+
+    @profiling.profiled("transcribe")
+    def process_transcription(job_id, input_file_path, model_size="base"):
+        busy(0.05)
+        return "done"
+
+    assert process_transcription("job-1", str(tmp_path / "input.wav")) == "done"
+    assert process_transcription("job-2", str(tmp_path / "input.wav")) == "done"
+
+    directory = tmp_path / "profiles" / "job-1"
+    assert recorded == {"job-1": directory}
+    stats = pstats.Stats(str(directory / "process_transcription.prof"))
+    assert any(name == "busy" for _, _, name in stats.stats)
+    assert "busy" in (directory / "process_transcription.txt").read_text()
+    assert not (tmp_path / "profiles" / "job-2").exists()
+
+
+def make_app(monkeypatch, tmp_path, admin):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    monkeypatch.setattr(profiling, "is_admin", lambda request: admin)
+    app = FastAPI()
+    app.middleware("http")(profiling.profile_middleware)
+
+    @app.get("/slow")
+    def slow():
+        busy(0.1)
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_admin_request_sampled_with_header(monkeypatch, tmp_path):
+    client = make_app(monkeypatch, tmp_path, admin=True)
+
+    response = client.get("/slow", headers={"X-Profile": "1"})
+
+    assert response.json() == {"ok": True}
+    artifact = Path(response.headers["X-Profile-Artifact"])
+    assert artifact.parent == tmp_path
+    # Sync routes run in the threadpool; the sampler sees them there
+    assert "test_profiling_pytest.py:slow" in artifact.read_text()
+    assert int(response.headers["X-Profile-Samples"]) > 0
+
+
+def test_header_ignored_for_non_admins_and_without_header(monkeypatch, tmp_path):
+    client = make_app(monkeypatch, tmp_path, admin=False)
+    assert "X-Profile-Artifact" not in client.get("/slow", headers={"X-Profile": "1"}).headers
+
+    client = make_app(monkeypatch, tmp_path, admin=True)
+    assert "X-Profile-Artifact" not in client.get("/slow").headers
+    assert list(tmp_path.iterdir()) == []
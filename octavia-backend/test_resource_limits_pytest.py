@@ -0,0 +1,98 @@
+"""Tests for per-resource admission control shared by worker processes."""
+import multiprocessing
+import os
+from contextlib import nullcontext
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import resource_limits
+from app.resource_limits import ResourcePool
+
+fork = multiprocessing.get_context("fork")
+
+
+def hold(pool, units, seconds):
+    pool.acquire(units)
+    time.sleep(seconds)
+    pool.release(units)
+
+
+def test_acquire_waits_until_units_fit():
+    pool = ResourcePool("test", 4)
+    taken = pool.acquire(3)
+
+    with pytest.raises(TimeoutError):
+        pool.acquire(2, timeout=0.2)
+    assert pool.acquire(1, timeout=0.2) == 1
+
+    pool.release(taken)
+    assert pool.acquire(2, timeout=0.2) == 2
+    assert pool.in_use == 3
+
+
+def test_oversized_request_runs_alone():
+    pool = ResourcePool("test", 4)
+
+    assert pool.acquire(10, timeout=0.2) == 4
+    with pytest.raises(TimeoutError):
+        pool.acquire(1, timeout=0.2)
+
+
+def test_pool_is_shared_with_forked_processes():
+    pool = ResourcePool("test", 2)
+    child = fork.Process(target=hold, args=(pool, 2, 1.0))
+    child.start()
+    try:
+        deadline = time.monotonic() + 5
+        while pool.in_use < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        with pytest.raises(TimeoutError):
+            pool.acquire(1, timeout=0.2)
+        assert pool.acquire(1, timeout=5) == 1
+    finally:
+        child.join()
+
+
+def test_units_of_dead_holder_are_reclaimed():
+    pool = ResourcePool("test", 2)
+    child = fork.Process(target=hold, args=(pool, 2, 30))
+    child.start()
+    deadline = time.monotonic() + 5
+    while pool.in_use < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    child.kill()
+    child.join()
+
+    assert pool.acquire(2, timeout=2) == 2
+
+
+def test_limited_reserves_by_model_size(monkeypatch):
+    reserved = []
+    monkeypatch.setattr(resource_limits, "reserve", lambda **needs: reserved.append(needs) or nullcontext())
+
+    @resource_limits.limited("transcribe")
+    def task(job_id, model_size="base"):
+        return job_id
+
+    assert task("a", model_size="large") == "a"
+    assert task("b") == "b"
+    assert [needs["ram_mb"] for needs in reserved] == [
+        resource_limits.MODEL_RAM_MB["large"], resource_limits.MODEL_RAM_MB["base"]
+    ]
+
+
+
+def test_units_of_reused_pid_are_reclaimed():
+    pool = ResourcePool("test", 2)
+    # A live process that did not take the reservation: same PID, different start time
+    pid = os.getppid()
+    pool._holders[0:3] = [pid, resource_limits.process_start_time(pid) + 1, 2]
+
+    assert pool.acquire(2, timeout=2) == 2
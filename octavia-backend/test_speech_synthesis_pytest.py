@@ -0,0 +1,140 @@
+"""Tests for segment-level synthesis: retries, progress and WAV concatenation."""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import speech_synthesis, tts_cache
+
+
+@pytest.fixture(autouse=True)
+def no_tts_cache(monkeypatch):
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_ENABLED", False)
+
+
+def fake_engine(failures=None):
+    """Write a tone whose length encodes the text; fail the first N calls per text."""
+    failures = dict(failures or {})
+
+    def synthesize(text, output_path, voice_id=None, speed=1.0):
+        if failures.get(text, 0) > 0:
+            failures[text] -= 1
+            raise RuntimeError("engine crashed")
+        sf.write(output_path, np.full(len(text) * 100, 0.1, dtype='float32'), 22050)
+        return output_path
+
+    return synthesize
+
+
+def test_segments_synthesized_with_progress_and_empty_segments_skipped(monkeypatch, tmp_path):
+    monkeypatch.setattr(speech_synthesis, "_synthesize_segment", fake_engine())
+    progress = []
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        paths = speech_synthesis.synthesize_segments(
+            ["hola", "", "mundo"], str(tmp_path), progress_callback=lambda d, t: progress.append((d, t)), pool=pool
+        )
+
+    assert paths[1] is None
+    assert Path(paths[0]).exists() and Path(paths[2]).exists()
+    assert progress == [(1, 2), (2, 2)]
+
+
+def test_failed_segment_is_retried_alone(monkeypatch, tmp_path):
+    monkeypatch.setattr(speech_synthesis, "_synthesize_segment", fake_engine({"mundo": 1}))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        paths = speech_synthesis.synthesize_segments(["hola", "mundo"], str(tmp_path), pool=pool)
+
+    assert all(Path(p).exists() for p in paths)
+
+
+def test_segment_failing_past_retry_budget_raises(monkeypatch, tmp_path):
+    monkeypatch.setattr(speech_synthesis, "TTS_SEGMENT_RETRIES", 1)
+    monkeypatch.setattr(speech_synthesis, "_synthesize_segment", fake_engine({"mundo": 5}))
+
+    with ThreadPoolExecutor(max_workers=1) as pool, pytest.raises(RuntimeError):
+        speech_synthesis.synthesize_segments(["mundo"], str(tmp_path), pool=pool)
+
+
+def test_concatenate_wavs_joins_in_order(tmp_path):
+    first, second = tmp_path / "a.wav", tmp_path / "b.wav"
+    sf.write(first, np.full(100, 0.25, dtype='float32'), 16000)
+    sf.write(second, np.full(50, -0.25, dtype='float32'), 16000)
+
+    output = speech_synthesis.concatenate_wavs([str(first), None, str(second)], str(tmp_path / "out.wav"))
+    audio, rate = sf.read(output, dtype='float32')
+
+    assert rate == 16000
+    assert len(audio) == 150
+    assert audio[0] > 0 > audio[-1]
+    assert speech_synthesis.concatenate_wavs([None], str(tmp_path / "none.wav")) is None
+
+
+def echo(value):
+    return value
+
+
+def hang(seconds):
+    time.sleep(seconds)
+    return "late"
+
+
+def fail():
+    raise ValueError("bad text")
+
+
+def test_engine_pool_runs_requests_in_engine_processes():
+    pool = speech_synthesis.TTSEnginePool(size=2, timeout=5, initializer=None)
+    try:
+        assert [pool.submit(echo, i).result() for i in range(4)] == [0, 1, 2, 3]
+        with pytest.raises(RuntimeError, match="bad text"):
+            pool.submit(fail).result()
+    finally:
+        pool.shutdown()
+
+
+def test_wedged_engine_is_restarted_after_timeout():
+    pool = speech_synthesis.TTSEnginePool(size=1, timeout=0.5, initializer=None)
+    try:
+        engine = pool._engines.queue[0]
+        wedged_pid = engine.process.pid
+
+        with pytest.raises(RuntimeError, match="did not answer"):
+            pool.submit(hang, 30).result()
+
+        assert engine.process.pid != wedged_pid
+        assert pool.submit(echo, "ok").result() == "ok"
+    finally:
+        pool.shutdown()
+
+
+def test_dead_engine_is_replaced_before_use():
+    pool = speech_synthesis.TTSEnginePool(size=1, timeout=5, initializer=None)
+    try:
+        engine = pool._engines.queue[0]
+        engine.process.kill()
+        engine.process.join()
+
+        assert pool.submit(echo, "alive").result() == "alive"
+    finally:
+        pool.shutdown()
+
+
+def test_daemonic_process_falls_back_to_in_process_engine(monkeypatch):
+    monkeypatch.setattr(speech_synthesis, "_pool", None)
+    monkeypatch.setattr(speech_synthesis, "engines_can_spawn", lambda: False)
+    monkeypatch.setattr(speech_synthesis, "_init_engine", lambda: None)
+
+    pool = speech_synthesis.get_tts_pool()
+    try:
+        assert isinstance(pool, ThreadPoolExecutor)
+        assert pool.submit(echo, "in-process").result() == "in-process"
+    finally:
+        speech_synthesis.shutdown_tts_pool()
@@ -4,6 +4,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.core.database import init_db
 from app.db import SessionLocal
 from app.job_model import Job, JobStatus
 from app import models
@@ -21,6 +22,8 @@ def setup_module():
     db.close()
 
 
+# Tables are created at app startup, not on import
+init_db()
 client = TestClient(app)
 
 # Test token (would normally come from login endpoint)
@@ -0,0 +1,60 @@
+"""Tests for zero-copy outputs: hardlink, reflink, or reference to the source."""
+import errno
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import storage
+
+
+def make_source(tmp_path):
+    source = tmp_path / "video.mp4"
+    source.write_bytes(b"\x00" * 4096)
+    return source
+
+
+def test_hardlink_shares_the_inode(tmp_path):
+    source = make_source(tmp_path)
+    target = tmp_path / "video_translated.mp4"
+
+    result = storage.link_or_reference(str(source), str(target))
+
+    assert result == str(target)
+    assert os.stat(target).st_ino == os.stat(source).st_ino
+
+
+def test_existing_target_is_replaced(tmp_path):
+    source = make_source(tmp_path)
+    target = tmp_path / "video_translated.mp4"
+    target.write_bytes(b"stale")
+
+    storage.link_or_reference(str(source), str(target))
+
+    assert target.read_bytes() == source.read_bytes()
+
+
+def test_falls_back_to_reference_without_copying(monkeypatch, tmp_path):
+    source = make_source(tmp_path)
+    target = tmp_path / "video_translated.mp4"
+
+    def cross_device(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(storage.os, "link", cross_device)
+    monkeypatch.setattr(storage, "_reflink", lambda src, dst: False)
+
+    assert storage.link_or_reference(str(source), str(target)) == str(source)
+    assert not target.exists()
+
+
+def test_same_file_across_path_forms(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "UPLOAD_DIR", Path("uploads"))
+    stored = "users/u1/video/in.mp4"
+
+    assert storage.is_same_file("uploads/users/u1/video/in.mp4", stored)
+    assert storage.is_same_file(str(tmp_path / "uploads" / stored), stored)
+    assert storage.is_same_file("users\\u1\\video\\in.mp4", stored)
+    assert not storage.is_same_file("users/u1/video/out.mp4", stored)
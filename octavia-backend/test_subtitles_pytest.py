@@ -0,0 +1,74 @@
+"""Tests for SRT/WebVTT rendering and the soft-subtitle mux command."""
+import sys
+from pathlib import Path
+
+import ffmpeg
+import pytest
+from pydantic import ValidationError
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import subtitles
+from app.upload_schemas import VideoTranslateRequest
+from app.video_routes import VideoTranslateRequest as RouteVideoTranslateRequest
+
+SEGMENTS = [
+    {"start": 0.0, "end": 2.5, "text": "Hello", "translated_text": "Hola"},
+    {"start": 2.5, "end": 3.0, "text": "", "translated_text": ""},
+    {"start": 3661.25, "end": 3662.0, "text": "World", "translated_text": "Mundo"},
+]
+
+
+def test_timestamps():
+    assert subtitles.format_timestamp(3661.25) == "01:01:01,250"
+    assert subtitles.format_timestamp(0.0015, ".") == "00:00:00.002"
+
+
+def test_srt_numbers_cues_and_skips_empty_segments():
+    srt = subtitles.to_srt(SEGMENTS)
+
+    assert srt.startswith("1\n00:00:00,000 --> 00:00:02,500\nHola\n")
+    assert "2\n01:01:01,250 --> 01:01:02,000\nMundo\n" in srt
+    assert "3\n" not in srt
+
+
+def test_webvtt_header_and_dot_separator():
+    vtt = subtitles.to_webvtt(SEGMENTS)
+
+    assert vtt.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:02.500\nHola\n")
+
+
+def test_long_text_wraps_to_two_lines():
+    text = "palabra " * 20
+    cue = subtitles.to_srt([{"start": 0, "end": 4, "translated_text": text}])
+
+    assert len(cue.strip().split("\n")[2:]) == 2
+
+
+def test_segment_without_timestamps_spans_duration(tmp_path):
+    paths = subtitles.write_subtitles([{"translated_text": "Todo"}], str(tmp_path / "out"), duration=12.0)
+
+    assert "00:00:00,000 --> 00:00:12,000" in Path(paths["srt"]).read_text(encoding="utf-8")
+    assert Path(paths["vtt"]).exists()
+
+
+def test_mux_copies_streams_and_uses_container_subtitle_codec(monkeypatch, tmp_path):
+    from app.video_processor import VideoProcessor
+
+    commands = []
+    monkeypatch.setattr(ffmpeg, "run", lambda stream, **kwargs: commands.append(stream.compile()))
+
+    VideoProcessor().mux_subtitles("in.mp4", "subs.srt", str(tmp_path / "out.mp4"), language="es")
+    args = commands[0]
+
+    assert args[args.index("-vcodec") + 1] == "copy"
+    assert args[args.index("-acodec") + 1] == "copy"
+    assert args[args.index("-scodec") + 1] == "mov_text"
+
+
+def test_unknown_output_mode_is_rejected():
+    """A misspelled mode is a validation error (422), not a silent full dub."""
+    assert VideoTranslateRequest(file_id="f", storage_path="p", output_mode="subtitles").output_mode == "subtitles"
+    for request_cls, fields in ((VideoTranslateRequest, {"file_id": "f"}), (RouteVideoTranslateRequest, {})):
+        with pytest.raises(ValidationError):
+            request_cls(storage_path="p", output_mode="subtitle", **fields)
@@ -0,0 +1,52 @@
+"""Tests for the synthetic benchmark media and sample-rate handling on load."""
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "scripts"))
+
+from generate_test_audio import speech_like, speech_like_blocks, write_wav
+from app.workers import load_audio_without_ffmpeg
+
+
+def test_speech_like_audio_is_deterministic_per_seed():
+    first = speech_like(3.0, sr=16000, channels=2, seed=4)
+
+    assert first.shape == (48000, 2)
+    assert np.array_equal(first, speech_like(3.0, sr=16000, channels=2, seed=4))
+    assert not np.array_equal(first, speech_like(3.0, sr=16000, channels=2, seed=5))
+    assert np.abs(first).max() <= 0.5
+
+
+def test_speech_like_audio_has_pauses():
+    audio = speech_like(20.0, sr=16000, seed=0)[:, 0]
+    frame_energy = (audio[: len(audio) // 160 * 160].reshape(-1, 160) ** 2).mean(axis=1)
+
+    silent = frame_energy < 1e-4
+    assert 0.05 < silent.mean() < 0.6
+
+
+def test_streamed_blocks_match_whole_signal_and_write_as_one_wav(tmp_path):
+    whole = speech_like(5.0, sr=16000, channels=2, seed=3)
+    blocks = list(speech_like_blocks(5.0, sr=16000, channels=2, seed=3, block_frames=1000))
+
+    assert all(block.dtype == np.float32 and len(block) <= 1000 for block in blocks)
+    assert np.allclose(np.concatenate(blocks), whole, atol=1e-6)
+
+    path = tmp_path / "streamed.wav"
+    write_wav(path, iter(blocks), 16000)
+    with wave.open(str(path)) as wf:
+        assert (wf.getnchannels(), wf.getnframes()) == (2, 80000)
+
+
+def test_load_audio_downmixes_and_resamples_to_16k(tmp_path):
+    path = tmp_path / "stereo_44k.wav"
+    write_wav(path, speech_like(2.0, sr=44100, channels=2, seed=1), 44100)
+
+    audio = load_audio_without_ffmpeg(str(path), sr=16000)
+
+    assert audio.ndim == 1
+    assert abs(len(audio) - 32000) <= 1
@@ -0,0 +1,120 @@
+"""Tests for model-affinity routing and the per-process model cache."""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import metrics, model_cache, task_routing
+
+
+@pytest.fixture(autouse=True)
+def fresh_queue_depths(monkeypatch):
+    monkeypatch.setattr(metrics, "_queue_depth_cache", {"time": 0.0, "depths": {}})
+
+
+def test_model_keys_for_job_types():
+    """Jobs route by the model they need."""
+    assert task_routing.model_key_for_job("transcribe", {"model_size": "large"}) == "asr.whisper.large"
+    assert task_routing.model_key_for_job("video_translate", {}) == "asr.whisper.base"
+    assert task_routing.model_key_for_job(
+        "translate", {"source_language": "en", "target_language": "es"}
+    ) == "mt.en-es"
+    assert task_routing.model_key_for_job("synthesize", {}) is None
+
+
+def test_unserved_model_queue_falls_back_to_priority_queue(monkeypatch):
+    """Without warm workers for a model, the job goes to the priority queue."""
+    monkeypatch.setattr(task_routing, "MODEL_AFFINITY_QUEUES", {"asr.whisper.base"})
+
+    assert task_routing.select_queue("asr.whisper.large", "urgent") == "urgent"
+    assert task_routing.select_queue(None, "default") == "default"
+
+
+def test_served_model_queue_is_selected(monkeypatch):
+    """Jobs land on the model queue while its backlog is small."""
+    monkeypatch.setattr(task_routing, "MODEL_AFFINITY_QUEUES", {"asr.whisper.base"})
+    monkeypatch.setattr(task_routing, "queue_depth", lambda name: 2)
+
+    assert task_routing.select_queue("asr.whisper.base", "default") == "asr.whisper.base"
+
+
+def test_deep_model_queue_overflows(monkeypatch):
+    """A backed-up model queue overflows to the priority queue instead of starving jobs."""
+    monkeypatch.setattr(task_routing, "MODEL_AFFINITY_QUEUES", {"asr.whisper.base"})
+    monkeypatch.setattr(task_routing, "queue_depth", lambda name: task_routing.MODEL_QUEUE_MAX_BACKLOG)
+
+    assert task_routing.select_queue("asr.whisper.base", "default") == "default"
+
+
+def test_queue_depth_is_read_once_per_ttl(monkeypatch):
+    """Routing reuses the cached broker read instead of connecting per job."""
+    reads = []
+    monkeypatch.setattr(task_routing, "MODEL_AFFINITY_QUEUES", {"asr.whisper.base"})
+    monkeypatch.setattr(task_routing, "queue_depth", lambda name: reads.append(name) or 0)
+
+    for _ in range(5):
+        assert task_routing.select_queue("asr.whisper.base", "default") == "asr.whisper.base"
+
+    assert reads.count("asr.whisper.base") == 1
+
+
+def test_worker_queues_include_overflow(monkeypatch):
+    """Workers consume their warm model queues plus every priority queue."""
+    monkeypatch.setenv("WORKER_WARM_MODELS", "asr.whisper.base, mt.en-es")
+
+    assert task_routing.worker_queues() == ["asr.whisper.base", "mt.en-es", "urgent", "default", "low"]
+
+
+def test_model_cache_reuses_and_evicts(monkeypatch):
+    """Cached models are reused and the least recently used one is evicted."""
+    model_cache.clear()
+    monkeypatch.setattr(model_cache, "MODEL_CACHE_SIZE", 2)
+    loads = []
+
+    def loader(key):
+        def _load():
+            loads.append(key)
+            return object()
+        return _load
+
+    first = model_cache.get_model("asr.whisper.base", loader("base"))
+    assert model_cache.get_model("asr.whisper.base", loader("base")) is first
+    model_cache.get_model("mt.en-es", loader("mt"))
+    model_cache.get_model("asr.whisper.large", loader("large"))
+
+    assert loads == ["base", "mt", "large"]
+    assert model_cache.cached_model_keys() == ["mt.en-es", "asr.whisper.large"]
+    model_cache.clear()
+
+
+def test_model_load_blocks_only_its_own_key(monkeypatch):
+    """A slow load does not stall other models, and concurrent misses load once."""
+    model_cache.clear()
+    monkeypatch.setattr(model_cache, "MODEL_CACHE_SIZE", 2)
+    release = threading.Event()
+    loads = []
+
+    def slow_load():
+        loads.append("slow")
+        release.wait(5)
+        return "slow-model"
+
+    waiters = [threading.Thread(target=model_cache.get_model, args=("asr.whisper.large", slow_load)) for _ in range(2)]
+    for waiter in waiters:
+        waiter.start()
+    try:
+        start = time.monotonic()
+        assert model_cache.get_model("mt.en-es", lambda: "fast-model") == "fast-model"
+        assert time.monotonic() - start < 1
+    finally:
+        release.set()
+        for waiter in waiters:
+            waiter.join()
+
+    assert loads == ["slow"]
+    assert model_cache.get_model("asr.whisper.large", slow_load) == "slow-model"
+    model_cache.clear()
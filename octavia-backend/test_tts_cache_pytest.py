@@ -0,0 +1,96 @@
+"""Tests for the content-addressed TTS segment cache."""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import speech_synthesis, tts_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_ENABLED", True)
+    monkeypatch.setattr(tts_cache, "_cache_bytes", None)
+    return tmp_path / "cache"
+
+
+def write_wav(path, samples=1600):
+    sf.write(path, np.full(samples, 0.1, dtype='float32'), 16000)
+    return str(path)
+
+
+def test_key_ignores_whitespace_but_not_voice_language_or_speed():
+    base = tts_cache.cache_key("Hola  mundo ", "default", "es", 1.0, engine="e1")
+
+    assert base == tts_cache.cache_key(" Hola mundo", None, "es", 1.0, engine="e1")
+    assert base != tts_cache.cache_key("Hola mundo", "voice-2", "es", 1.0, engine="e1")
+    assert base != tts_cache.cache_key("Hola mundo", "default", "pt", 1.0, engine="e1")
+    assert base != tts_cache.cache_key("Hola mundo", "default", "es", 1.25, engine="e1")
+    assert base != tts_cache.cache_key("Hola mundo", "default", "es", 1.0, engine="e2")
+
+
+def test_store_then_fetch_roundtrip(tmp_path):
+    key = tts_cache.cache_key("hola", None, "es", 1.0)
+    tts_cache.store(key, write_wav(tmp_path / "in.wav"))
+
+    fetched = tts_cache.fetch(key, str(tmp_path / "out.flac"))
+    audio, rate = sf.read(fetched, dtype='float32')
+
+    assert rate == 16000
+    assert len(audio) == 1600
+    assert tts_cache.fetch("0" * 64, str(tmp_path / "miss.flac")) is None
+
+
+def test_eviction_removes_least_recently_used(tmp_path, cache_dir):
+    keys = [tts_cache.cache_key(f"text {i}", None, "en", 1.0) for i in range(3)]
+    for age, key in enumerate(keys):
+        tts_cache.store(key, write_wav(tmp_path / f"{age}.wav", samples=16000))
+        os.utime(tts_cache._entry_path(key), (1000 + age, 1000 + age))
+
+    entry_size = tts_cache._entry_path(keys[0]).stat().st_size
+    tts_cache.evict(max_bytes=entry_size * 2)
+
+    assert not tts_cache._entry_path(keys[0]).exists()
+    assert tts_cache._entry_path(keys[2]).exists()
+
+
+def test_store_scans_only_when_over_budget(monkeypatch, tmp_path, cache_dir):
+    scans = []
+    scan = tts_cache._scan
+    monkeypatch.setattr(tts_cache, "_scan", lambda: scans.append(1) or scan())
+    keys = [tts_cache.cache_key(f"text {i}", None, "en", 1.0) for i in range(6)]
+
+    for i, key in enumerate(keys[:4]):
+        tts_cache.store(key, write_wav(tmp_path / f"{i}.wav", samples=16000))
+    assert len(scans) == 1  # the seeding scan only
+
+    entry_size = tts_cache._entry_path(keys[0]).stat().st_size
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_MAX_MB", entry_size * 5 / (1024 * 1024))
+    for i, key in enumerate(keys[4:], start=4):
+        tts_cache.store(key, write_wav(tmp_path / f"{i}.wav", samples=16000))
+
+    assert len(scans) == 2
+    assert len(list(cache_dir.glob("*/*.flac"))) == 5
+
+
+def test_synthesis_skips_cached_segments(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_synthesize(text, output_path, voice_id=None, speed=1.0):
+        calls.append(text)
+        return write_wav(output_path)
+
+    monkeypatch.setattr(speech_synthesis, "_synthesize_segment", fake_synthesize)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        speech_synthesis.synthesize_segments(["hola", "adios"], str(tmp_path / "run1"), pool=pool, language="es")
+        paths = speech_synthesis.synthesize_segments(["hola", "otra"], str(tmp_path / "run2"), pool=pool, language="es")
+
+    assert calls == ["hola", "adios", "otra"]
+    assert paths[0].endswith(".flac") and Path(paths[0]).exists()
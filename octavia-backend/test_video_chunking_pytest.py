@@ -0,0 +1,83 @@
+"""Tests for segment-parallel processing helpers of long videos."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app import video_chunking
+
+
+def test_should_chunk_by_duration_unless_overridden(monkeypatch):
+    monkeypatch.setattr(video_chunking, "CHUNKED_MIN_DURATION", 3600)
+
+    assert video_chunking.should_chunk(7200)
+    assert not video_chunking.should_chunk(600)
+    assert not video_chunking.should_chunk(None)
+    assert video_chunking.should_chunk(600, requested=True)
+    assert not video_chunking.should_chunk(7200, requested=False)
+
+
+def test_transcription_window_overlaps_both_edges():
+    assert video_chunking.transcription_window({"start": 0.0, "end": 600.0}, overlap=5) == (0.0, 605.0)
+    assert video_chunking.transcription_window({"start": 600.0, "end": 1200.0}, overlap=5) == (595.0, 610.0)
+
+
+def test_boundary_segment_kept_by_exactly_one_piece():
+    first, second = {"start": 0.0, "end": 600.0}, {"start": 600.0, "end": 1200.0}
+    # Both windows hear the same boundary sentence, in source time
+    boundary = {"start": 597.0, "end": 602.0, "text": "across the cut"}
+    first_segments = [{"start": 10.0, "end": 12.0, "text": "early"}, boundary]
+    second_segments = [dict(boundary), {"start": 700.0, "end": 702.0, "text": "later"}]
+
+    kept = video_chunking.keep_own_segments(first_segments, first) + \
+        video_chunking.keep_own_segments(second_segments, second)
+
+    # The midpoint (599.5s) lies in the first piece, so only the first piece keeps it
+    assert [s["text"] for s in kept] == ["early", "across the cut", "later"]
+
+
+def test_shift_segments_moves_timestamps_without_mutating():
+    segments = [{"start": 1.0, "end": 2.0, "text": "hi"}]
+
+    shifted = video_chunking.shift_segments(segments, 595.0)
+
+    assert shifted == [{"start": 596.0, "end": 597.0, "text": "hi"}]
+    assert segments[0]["start"] == 1.0
+
+
+def test_plan_pieces_covers_duration_without_slivers():
+    pieces = video_chunking.plan_pieces(3900.0, chunk_seconds=600)
+
+    assert len(pieces) == 6
+    assert [p["start"] for p in pieces] == [0, 600, 1200, 1800, 2400, 3000]
+    assert pieces[-1]["end"] == 3900.0
+    assert all(p["count"] == 6 for p in pieces)
+    assert video_chunking.plan_pieces(100.0, chunk_seconds=600) == [{"index": 0, "count": 1, "start": 0, "end": 100.0}]
+
+
+def test_join_piece_tracks_places_each_track_at_its_offset(tmp_path):
+    rate = 1000
+    first, second = tmp_path / "p0.wav", tmp_path / "p1.wav"
+    sf.write(first, np.full(1500, 0.25, dtype=np.float32), rate, subtype='PCM_16')
+    # One sample longer than its slot; the join trims it to the total length
+    sf.write(second, np.full(1001, -0.25, dtype=np.float32), rate, subtype='PCM_16')
+
+    output = video_chunking.join_piece_tracks([(1.5, str(second)), (0.0, str(first))], str(tmp_path / "dub.wav"), 2.5, rate)
+    audio, out_rate = sf.read(output, dtype='float32')
+
+    assert out_rate == rate
+    assert len(audio) == 2500
+    assert np.allclose(audio[:1500], 0.25, atol=1e-3)
+    assert np.allclose(audio[1500:], -0.25, atol=1e-3)
+
+
+def test_chunking_requires_a_shared_result_backend(monkeypatch):
+    from app import celery_tasks
+
+    monkeypatch.setitem(celery_tasks.app.conf, "result_backend", "cache+memory://")
+    assert not celery_tasks.chords_supported()
+    monkeypatch.setitem(celery_tasks.app.conf, "result_backend", "redis://localhost:6379/0")
+    assert celery_tasks.chords_supported()
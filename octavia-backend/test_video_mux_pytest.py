@@ -0,0 +1,53 @@
+"""Tests for the single-pass dub mux command."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.video_processor import VideoProcessor
+
+
+def option(args, flag):
+    return args[args.index(flag) + 1]
+
+
+def test_mux_copies_video_and_encodes_dub_once_with_faststart():
+    args = VideoProcessor().build_merge_command(
+        Path("in.mp4"), Path("dub.wav"), Path("out.mp4"),
+        keep_original_audio=False, streaming="faststart", dub_language="es",
+    ).compile()
+
+    assert args.count("-i") == 2
+    assert option(args, "-c:v") == "copy"
+    assert option(args, "-c:a:0") == "aac"
+    assert option(args, "-b:a:0") == "128k"
+    assert option(args, "-movflags") == "+faststart"
+    assert [args[i + 1] for i, a in enumerate(args) if a == "-map"] == ["0:v:0", "1:a:0"]
+
+
+def test_original_audio_kept_as_secondary_copied_track():
+    processor = VideoProcessor()
+    processor.get_video_metadata = lambda path: {"has_audio": True}
+
+    args = processor.build_merge_command(
+        Path("in.mp4"), Path("dub.wav"), Path("out.mp4"),
+        keep_original_audio=True, streaming="fragmented", original_language="en",
+    ).compile()
+
+    assert [args[i + 1] for i, a in enumerate(args) if a == "-map"] == ["0:v:0", "1:a:0", "0:a:0"]
+    assert option(args, "-c:a:1") == "copy"
+    assert option(args, "-disposition:a:1") == "0"
+    assert option(args, "-metadata:s:a:1") == "language=en"
+    assert "frag_keyframe" in option(args, "-movflags")
+
+
+def test_source_without_audio_gets_dub_only():
+    processor = VideoProcessor()
+    processor.get_video_metadata = lambda path: {"has_audio": False}
+
+    args = processor.build_merge_command(
+        Path("in.mkv"), Path("dub.wav"), Path("out.mkv"), keep_original_audio=True,
+    ).compile()
+
+    assert "0:a:0" not in args
+    assert "-movflags" not in args